@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章查询性能测试：逐个公众号查询（N+1） vs 批量查询
+
+用法:
+    python benchmarks/bench_batched_fetch.py [--latency 0.001] [--feeds 10 100 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standin_db import StandInConnection, populate
+from src.core.database import DatabaseManager
+
+
+def fetch_per_feed(db, feeds, recent_days):
+    all_articles = []
+    for feed in feeds:
+        all_articles.extend(db.get_recent_articles(feed['id'], recent_days))
+    return all_articles
+
+
+def fetch_bulk(db, feeds, recent_days):
+    return db.get_recent_articles_bulk([feed['id'] for feed in feeds], recent_days)
+
+
+def run(feed_count, latency, articles_per_feed, recent_days):
+    db = DatabaseManager()
+    db.connection = StandInConnection(latency=latency)
+    populate(db.connection, feed_count, articles_per_feed)
+    feeds = db.get_all_feeds()
+
+    results = {}
+    for name, fetch in (('per_feed', fetch_per_feed), ('bulk', fetch_bulk)):
+        db.connection.query_count = 0
+        start = time.perf_counter()
+        articles = fetch(db, feeds, recent_days)
+        results[name] = (time.perf_counter() - start, db.connection.query_count, articles)
+
+    per_feed_ids = [a['id'] for a in results['per_feed'][2]]
+    bulk_ids = [a['id'] for a in results['bulk'][2]]
+    assert per_feed_ids == bulk_ids, "批量查询结果与逐个查询不一致"
+
+    per_feed_time, per_feed_queries, _ = results['per_feed']
+    bulk_time, bulk_queries, _ = results['bulk']
+    print(f"{feed_count:>6} {len(bulk_ids):>9} "
+          f"{per_feed_time * 1000:>12.1f} {per_feed_queries:>8} "
+          f"{bulk_time * 1000:>10.1f} {bulk_queries:>6} "
+          f"{per_feed_time / bulk_time:>8.1f}x")
+    db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N+1查询与批量查询性能对比")
+    parser.add_argument('--latency', type=float, default=0.001, help="每次查询模拟的网络往返延迟（秒）")
+    parser.add_argument('--feeds', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--articles-per-feed', type=int, default=10)
+    parser.add_argument('--recent-days', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"模拟往返延迟: {args.latency * 1000:.1f}ms, 每个公众号 {args.articles_per_feed} 篇文章")
+    print(f"{'feeds':>6} {'articles':>9} {'per_feed(ms)':>12} {'queries':>8} "
+          f"{'bulk(ms)':>10} {'queries':>6} {'speedup':>9}")
+    for feed_count in args.feeds:
+        run(feed_count, args.latency, args.articles_per_feed, args.recent_days)
+
+
+if __name__ == '__main__':
+    main()
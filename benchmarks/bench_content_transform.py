@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+content转换测试：各转换模式的吞吐量（MB/s）和输出体积
+
+默认使用项目根目录的样例 result.json，文章较少时可通过 --repeat 放大测量量。
+
+用法:
+    python benchmarks/bench_content_transform.py [--input result.json] [--repeat 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.content_transform import ContentTransformer, MODE_CLEAN, MODE_TEXT, MODE_EXCERPT
+
+
+def measure(transformer, contents, repeat):
+    input_bytes = sum(len(content.encode('utf-8')) for content in contents) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [transformer.transform(content) for content in contents]
+    elapsed = time.perf_counter() - start
+    output_bytes = sum(len(output.encode('utf-8')) for output in outputs) * repeat
+    return input_bytes / elapsed / 1e6, output_bytes / input_bytes
+
+
+def main():
+    default_input = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result.json')
+    parser = argparse.ArgumentParser(description="content转换吞吐量和体积对比")
+    parser.add_argument('--input', default=default_input)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        contents = [record.get('content') or '' for record in json.load(f)]
+    total = sum(len(content.encode('utf-8')) for content in contents)
+    print(f"{len(contents)} 篇文章，content共 {total / 1024:.1f} KB，重复 {args.repeat} 次")
+
+    modes = [
+        ('clean（去样式+组件）', ContentTransformer(MODE_CLEAN)),
+        ('clean（仅去样式）', ContentTransformer(MODE_CLEAN, remove_widgets=False)),
+        ('clean（仅去组件）', ContentTransformer(MODE_CLEAN, strip_styles=False)),
+        ('text', ContentTransformer(MODE_TEXT)),
+        ('excerpt(200)', ContentTransformer(MODE_EXCERPT, excerpt_length=200)),
+    ]
+    for name, transformer in modes:
+        throughput, ratio = measure(transformer, contents, args.repeat)
+        print(f"  {name:<20} {throughput:8.2f} MB/s  输出体积 {ratio * 100:6.1f}%（减少 {(1 - ratio) * 100:.1f}%）")
+
+
+if __name__ == '__main__':
+    main()
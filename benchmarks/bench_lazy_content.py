@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两阶段读取测试：一次性读取content vs 先读元数据、只为转换缓存未命中的文章加载content
+
+使用替身数据库统计查询次数和返回的数据量（近似网络传输量），content转换模式为clean。
+第二次生成前修改 --edited 比例的文章，模拟定时生成时大部分文章未变化的情况。
+
+用法:
+    python benchmarks/bench_lazy_content.py [--feeds 200] [--articles-per-feed 30] [--edited 0.05]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standin_db import StandInConnection, populate
+from src.core.data_processor import DataProcessor
+from src.core.database import DatabaseManager
+from src.core.transform_cache import TransformCache
+
+TRANSFORM = {'mode': 'clean'}
+
+
+def generate_eager(db, feeds, cache, recent_days):
+    articles = db.get_recent_articles_bulk([feed['id'] for feed in feeds], recent_days)
+    return DataProcessor(recent_days, TRANSFORM, transform_cache=cache).process_data(feeds, articles)
+
+
+def generate_lazy(db, feeds, cache, recent_days):
+    articles = db.get_recent_articles_bulk([feed['id'] for feed in feeds], recent_days,
+                                           include_content=False, content_digest=True)
+    processor = DataProcessor(recent_days, TRANSFORM, {'chunk_size': 500}, transform_cache=cache)
+    return processor.process_data(feeds, articles, db.get_article_contents)
+
+
+def measure(generate, db, feeds, cache, recent_days):
+    db.connection.query_count = 0
+    db.connection.bytes_fetched = 0
+    start = time.perf_counter()
+    records = generate(db, feeds, cache, recent_days)
+    return records, time.perf_counter() - start, db.connection.query_count, db.connection.bytes_fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一次性读取与两阶段读取的数据量对比")
+    parser.add_argument('--feeds', type=int, default=200)
+    parser.add_argument('--articles-per-feed', type=int, default=30)
+    parser.add_argument('--content-size', type=int, default=20000, help="每篇文章content的字符数")
+    parser.add_argument('--edited', type=float, default=0.05, help="第二次生成前修改的文章比例")
+    parser.add_argument('--recent-days', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    db = DatabaseManager()
+    db.connection = StandInConnection()
+    # 文章分布在比 recent_days 少一天的范围内，两次生成之间不会有文章滑出时间窗口，比较的是同一批文章
+    populate(db.connection, args.feeds, args.articles_per_feed, content_size=args.content_size,
+             days=max(args.recent_days - 1, 0))
+    feeds = db.get_all_feeds()
+
+    workdir = tempfile.mkdtemp(prefix='bench_lazy_content_')
+    try:
+        print(f"{args.feeds * args.articles_per_feed} 篇文章，第二次生成前修改 {args.edited:.0%}")
+        for name, generate in (('eager', generate_eager), ('lazy', generate_lazy)):
+            with TransformCache(os.path.join(workdir, f"{name}.sqlite3")) as cache:
+                cold = measure(generate, db, feeds, cache, args.recent_days)
+                # 修改部分文章后再次生成（缓存已预热）
+                step = max(int(1 / args.edited), 1) if args.edited else 0
+                if step:
+                    db.connection.sqlite.execute(
+                        "UPDATE articles SET content = content || '<p>修改</p>' WHERE rowid % ? = 0", (step,))
+                warm = measure(generate, db, feeds, cache, args.recent_days)
+                if step:
+                    db.connection.sqlite.execute(
+                        "UPDATE articles SET content = substr(content, 1, length(content) - 9) WHERE rowid % ? = 0",
+                        (step,))
+            for label, (_, elapsed, queries, size) in (('首次', cold), ('再次', warm)):
+                print(f"{name:>6} {label}: 查询 {queries:4d} 次, 读取 {size / 1024 / 1024:7.1f} MB, 耗时 {elapsed:.2f}s")
+            if name == 'eager':
+                expected = warm[0]
+            else:
+                assert warm[0] == expected, "两阶段读取结果与一次性读取不一致"
+        print("两种读取方式结果一致")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+输出格式对比：JSON（缩进/紧凑）、NDJSON、MessagePack 的写入耗时、解析耗时、
+读到第一条记录的耗时和文件体积（含gzip后体积）
+
+使用样例 result.json 的文章复制出 --articles 篇文章（id和发布时间各不相同）。
+
+用法:
+    python benchmarks/bench_output_formats.py [--articles 2000]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+import yaml
+
+from src.utils.file_manager import FileManager
+
+
+def load_records(path, count):
+    with open(path, 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+    return [dict(samples[i % len(samples)], id=f"{i}", publish_time=1753600000 + i) for i in range(count)]
+
+
+def parse_json(path):
+    with open(path, 'rb') as f:
+        return json.load(f)
+
+
+def first_json(path):
+    return parse_json(path)[0]
+
+
+def parse_ndjson(path):
+    with open(path, 'rb') as f:
+        return [json.loads(line) for line in f]
+
+
+def first_ndjson(path):
+    with open(path, 'rb') as f:
+        return json.loads(f.readline())
+
+
+def parse_msgpack(path):
+    with open(path, 'rb') as f:
+        return list(msgpack.Unpacker(f))
+
+
+def first_msgpack(path):
+    with open(path, 'rb') as f:
+        return next(iter(msgpack.Unpacker(f)))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    default_input = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result.json')
+    parser = argparse.ArgumentParser(description="输出格式写入/解析耗时和体积对比")
+    parser.add_argument('--input', default=default_input)
+    parser.add_argument('--articles', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    records = load_records(args.input, args.articles)
+    workdir = tempfile.mkdtemp()
+    try:
+        config_path = os.path.join(workdir, 'config.yaml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump({'file': {'storage_path': workdir, 'url_prefix': ''}}, f)
+        file_manager = FileManager(config_path)
+
+        def write_json(filename, compact):
+            return lambda: file_manager.publish_json_stream(iter(records), filename=filename, compact=compact,
+                                                            skip_unchanged=False)
+
+        def write_format(output_format):
+            def write():
+                writer = file_manager.open_format_writer(output_format, 'stream.json')
+                for record in records:
+                    writer.add(record)
+                writer.commit(None)
+            return write
+
+        cases = [
+            ('JSON（缩进）', 'pretty.json', write_json('pretty.json', False), parse_json, first_json),
+            ('JSON（紧凑）', 'compact.json', write_json('compact.json', True), parse_json, first_json),
+            ('NDJSON', 'stream.ndjson', write_format('ndjson'), parse_ndjson, first_ndjson),
+            ('MessagePack', 'stream.msgpack', write_format('msgpack'), parse_msgpack, first_msgpack),
+        ]
+
+        print(f"{args.articles} 篇文章")
+        print(f"  {'格式':<12}{'写入':>9}{'解析':>9}{'首条记录':>10}{'体积':>11}{'gzip后':>10}")
+        for name, filename, write, parse, first in cases:
+            write_time, _ = timed(write)
+            path = os.path.join(workdir, filename)
+            parse_time, parsed = timed(parse, path)
+            assert parsed == records, f"{name} 解析结果与原始记录不一致"
+            first_time, _ = timed(first, path)
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                compressed = len(gzip.compress(f.read(), compresslevel=6))
+            print(f"  {name:<12}{write_time * 1000:7.0f}ms{parse_time * 1000:7.0f}ms{first_time * 1000:8.1f}ms"
+                  f"{size / 1e6:9.2f}MB{compressed / 1e6:8.2f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
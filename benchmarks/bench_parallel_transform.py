@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并行content转换测试：不同进程数下的处理耗时和加速比
+
+使用样例 result.json 的文章内容复制出 --articles 篇文章，依次测试串行和 1..N 个进程。
+
+用法:
+    python benchmarks/bench_parallel_transform.py [--articles 2000] [--mode clean] [--chunk-size 32]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.data_processor import DataProcessor
+
+
+def load_articles(path, count):
+    with open(path, 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+    feeds = [{'id': 'MP_BENCH', 'mp_name': '测试公众号', 'mp_intro': ''}]
+    articles = []
+    for i in range(count):
+        sample = samples[i % len(samples)]
+        articles.append({'id': str(i), 'mp_id': 'MP_BENCH', 'title': sample['title'], 'url': sample['url'],
+                         'content': sample['content'], 'description': sample['description'], 'publish_time': i})
+    return feeds, articles
+
+
+def timed(processor, feeds, articles):
+    start = time.perf_counter()
+    result = processor.process_data(feeds, articles)
+    return time.perf_counter() - start, result
+
+
+def main():
+    default_input = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result.json')
+    parser = argparse.ArgumentParser(description="并行content转换加速比")
+    parser.add_argument('--input', default=default_input)
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--mode', default='clean')
+    parser.add_argument('--chunk-size', type=int, default=32)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    feeds, articles = load_articles(args.input, args.articles)
+    transform = {'mode': args.mode}
+
+    serial, expected = timed(DataProcessor(3, transform), feeds, articles)
+    print(f"{args.articles} 篇文章，mode={args.mode}，CPU核数 {os.cpu_count()}")
+    print(f"  串行       {serial:7.2f} s")
+
+    counts = sorted({min(2 ** i, args.max_workers) for i in range(args.max_workers.bit_length() + 1)})
+    for workers in counts:
+        processor = DataProcessor(3, transform, {'enabled': True, 'workers': workers,
+                                                 'chunk_size': args.chunk_size, 'min_articles': 0})
+        elapsed, result = timed(processor, feeds, articles)
+        assert result == expected, "并行结果与串行结果不一致"
+        print(f"  {workers:2d} 个进程  {elapsed:7.2f} s  加速 {serial / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章记录内存占用测试：字典记录 vs ArticleRecord
+
+使用 tracemalloc 统计合并后记录列表的内存占用（不含输入数据），并校验两种记录序列化结果一致。
+合成数据模拟数据库返回的行：每篇文章的mp_id都是独立的字符串对象。
+
+用法:
+    python benchmarks/bench_record_memory.py [--articles 100000] [--feeds 200]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.data_processor import DataProcessor
+
+
+def make_dataset(feed_count, article_count):
+    feeds = [{'id': f"MP_WXS_{3000000000 + i}", 'mp_name': f"测试公众号{i}", 'mp_intro': f"公众号{i}的简介" * 5}
+             for i in range(feed_count)]
+    articles = []
+    for i in range(article_count):
+        articles.append({
+            'id': f"{2650000000 + i}_1",
+            'mp_id': f"MP_WXS_{3000000000 + i % feed_count}",
+            'title': f"文章标题{i}",
+            'url': f"https://mp.weixin.qq.com/s/{i:022d}",
+            'content': '',
+            'description': f"摘要{i}",
+            'publish_time': 1753600000 + i,
+        })
+    return feeds, articles
+
+
+def build_dict_records(feeds, articles):
+    """改为ArticleRecord之前的实现：每篇文章一个9个键的字典"""
+    feeds_dict = {feed['id']: feed for feed in feeds}
+    return [{
+        'id': article.get('id', ''),
+        'mp_id': article['mp_id'],
+        'mp_name': feeds_dict[article['mp_id']].get('mp_name', ''),
+        'mp_intro': feeds_dict[article['mp_id']].get('mp_intro', ''),
+        'title': article.get('title', ''),
+        'url': article.get('url', ''),
+        'content': article.get('content', ''),
+        'description': article.get('description', ''),
+        'publish_time': article.get('publish_time', 0)
+    } for article in articles if article.get('mp_id') in feeds_dict]
+
+
+def build_article_records(feeds, articles):
+    return DataProcessor(3).process_data(feeds, articles)
+
+
+def measure(build, feeds, articles):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(feeds, articles)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, elapsed, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字典记录与ArticleRecord的内存占用对比")
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--feeds', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"{args.articles} 篇文章，{args.feeds} 个公众号")
+    results = {}
+    for name, build in (('dict', build_dict_records), ('ArticleRecord', build_article_records)):
+        # 每种实现使用新生成的输入，mp_id字符串不会被上一次测试驻留
+        feeds, articles = make_dataset(args.feeds, args.articles)
+        records, elapsed, current, peak = measure(build, feeds, articles)
+        results[name] = records
+        print(f"{name:>14}: 记录占用 {current / 1024 / 1024:6.1f} MB（每条 {current / len(records):5.0f} B），"
+              f"峰值 {peak / 1024 / 1024:6.1f} MB，耗时 {elapsed:.2f}s")
+        del records, articles
+
+    expected = json.dumps(results['dict'], ensure_ascii=False)
+    actual = json.dumps(results['ArticleRecord'], ensure_ascii=False, default=lambda record: record.to_dict())
+    assert actual == expected, "两种记录序列化结果不一致"
+    print("两种记录序列化结果一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+生成流程内存占用测试：一次性加载 vs 流式管道
+
+使用 tracemalloc 统计两种模式下 Python 堆内存峰值，并校验两种模式输出的文件一致。
+
+用法:
+    python benchmarks/bench_streaming_memory.py [--feeds 200] [--articles-per-feed 30] [--content-size 20000]
+"""
+
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standin_db import StandInConnection, populate
+from src.core.database import DatabaseManager
+from src.core.data_processor import DataProcessor
+from src.utils.file_manager import FileManager
+
+
+def build_buffered(db, file_manager, recent_days):
+    feeds = db.get_all_feeds()
+    articles = db.get_recent_articles_bulk([feed['id'] for feed in feeds], recent_days)
+    processed = DataProcessor(recent_days).process_data(feeds, articles)
+    file_manager.save_json_file(processed)
+    return len(processed)
+
+
+def build_streaming(db, file_manager, recent_days):
+    feeds = db.get_all_feeds()
+    articles = db.iter_recent_articles_bulk([feed['id'] for feed in feeds], recent_days)
+    records = DataProcessor(recent_days).iter_process(feeds, articles)
+    _, count = file_manager.save_json_stream(records)
+    return count
+
+
+def measure(build, db, file_manager, recent_days):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = build(db, file_manager, recent_days)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一次性加载与流式生成的内存峰值对比")
+    parser.add_argument('--feeds', type=int, default=200)
+    parser.add_argument('--articles-per-feed', type=int, default=30)
+    parser.add_argument('--content-size', type=int, default=20000, help="每篇文章content的字符数")
+    parser.add_argument('--recent-days', type=int, default=7)
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.connection = StandInConnection()
+    populate(db.connection, args.feeds, args.articles_per_feed, content_size=args.content_size)
+
+    workdir = tempfile.mkdtemp(prefix='bench_streaming_')
+    try:
+        file_manager = FileManager()
+        outputs = {}
+        for name, build in (('buffered', build_buffered), ('streaming', build_streaming)):
+            file_manager.storage_path = os.path.join(workdir, name)
+            os.makedirs(file_manager.storage_path)
+            count, elapsed, peak = measure(build, db, file_manager, args.recent_days)
+            outputs[name] = os.path.join(file_manager.storage_path, file_manager.generate_filename())
+            print(f"{name:>10}: {count} 条记录, 耗时 {elapsed:.2f}s, "
+                  f"内存峰值 {peak / 1024 / 1024:.1f} MB, 文件 {os.path.getsize(outputs[name]) / 1024 / 1024:.1f} MB")
+        assert filecmp.cmp(outputs['buffered'], outputs['streaming'], shallow=False), "两种模式输出不一致"
+        print("两种模式输出文件一致")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
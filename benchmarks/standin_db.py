@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地替身数据库
+
+使用内存SQLite模拟MySQL的feeds/articles表，提供与PyMySQL连接兼容的最小接口
+（``cursor()`` 上下文管理器、``execute``、``fetchone``、``fetchall``、迭代），并可为每次查询注入固定的
+网络往返延迟，用于在没有MySQL的环境中对 ``DatabaseManager`` 做性能测试。
+``bytes_fetched`` 统计返回的数据量（字符串按UTF-8字节数），近似网络传输量。
+"""
+
+import hashlib
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE feeds (
+  id TEXT PRIMARY KEY,
+  mp_name TEXT,
+  mp_cover TEXT,
+  mp_intro TEXT,
+  status INTEGER,
+  sync_time INTEGER,
+  update_time INTEGER,
+  created_at TEXT,
+  updated_at TEXT,
+  faker_id TEXT
+);
+CREATE TABLE articles (
+  id TEXT PRIMARY KEY,
+  mp_id TEXT,
+  title TEXT,
+  pic_url TEXT,
+  url TEXT,
+  content TEXT,
+  description TEXT,
+  status INTEGER,
+  publish_time INTEGER,
+  created_at TEXT,
+  updated_at TEXT,
+  is_export INTEGER
+);
+CREATE INDEX idx_articles_mp_time ON articles (mp_id, publish_time);
+"""
+
+
+class StandInCursor:
+    """模拟PyMySQL的DictCursor"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.sqlite.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def execute(self, sql, params=None):
+        # 模拟一次网络往返
+        if self._connection.latency:
+            time.sleep(self._connection.latency)
+        self._connection.query_count += 1
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params or ()))
+
+    def _to_dict(self, columns, row):
+        self._connection.bytes_fetched += sum(
+            len(value.encode('utf-8')) if isinstance(value, str) else 8 for value in row if value is not None)
+        return dict(zip(columns, row))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None:
+            return None
+        return self._to_dict([column[0] for column in self._cursor.description], row)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def fetchall(self):
+        columns = [column[0] for column in self._cursor.description]
+        return [self._to_dict(columns, row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """模拟PyMySQL连接"""
+
+    def __init__(self, latency: float = 0.0):
+        self.sqlite = sqlite3.connect(':memory:', check_same_thread=False)
+        self.sqlite.executescript(SCHEMA)
+        # MySQL的MD5()，返回十六进制小写摘要
+        self.sqlite.create_function(
+            'MD5', 1, lambda value: None if value is None else hashlib.md5(str(value).encode('utf-8')).hexdigest(),
+            deterministic=True)
+        self.latency = latency
+        self.query_count = 0
+        self.bytes_fetched = 0
+
+    def cursor(self, cursorclass=None):
+        # SQLite游标本身按需读取，DictCursor与SSDictCursor行为一致
+        return StandInCursor(self)
+
+    def ping(self, reconnect=False):
+        return True
+
+    def close(self):
+        self.sqlite.close()
+
+
+def populate(connection: StandInConnection, feed_count: int, articles_per_feed: int,
+             content_size: int = 2000, seed: int = 42, days: int = 7):
+    """填充测试数据，文章发布时间分布在最近 ``days`` 天内"""
+    rng = random.Random(seed)
+    now = int(datetime.now().timestamp())
+    feeds = []
+    articles = []
+    for f in range(feed_count):
+        mp_id = f"MP_WXS_{f:06d}"
+        feeds.append((mp_id, f"公众号{f}", '', f"公众号{f}的简介", 1, now, now, None, None, None))
+        for a in range(articles_per_feed):
+            articles.append((
+                f"{mp_id}_{a}", mp_id, f"文章标题 {f}-{a}", '', f"https://mp.weixin.qq.com/s/{f}_{a}",
+                '<section style="color: red">' + '正文' * (content_size // 2) + '</section>',
+                f"文章摘要 {f}-{a}", 1, now - rng.randint(0, days * 86400), None, None, 0
+            ))
+    connection.sqlite.executemany("INSERT INTO feeds VALUES (?,?,?,?,?,?,?,?,?,?)", feeds)
+    connection.sqlite.executemany("INSERT INTO articles VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", articles)
+    connection.sqlite.commit()
@@ -38,13 +38,18 @@ def main():
         logger.info(f"调试模式: {app_config['debug']}")
         logger.info("=" * 50)
         
-        # 创建并启动应用
-        app = create_app()
-        app.run(
-            host=app_config['host'],
-            port=app_config['port'],
-            debug=app_config['debug']
-        )
+        if app_config['debug']:
+            # 调试模式使用Flask开发服务器
+            app = create_app()
+            app.run(
+                host=app_config['host'],
+                port=app_config['port'],
+                debug=app_config['debug']
+            )
+        else:
+            # 生产模式使用多进程/多线程WSGI服务器
+            from src.api.server import run_production_server
+            run_production_server(config)
         
     except KeyboardInterrupt:
         logger.info("服务被用户中断")
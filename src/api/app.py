@@ -1,19 +1,30 @@
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request, send_from_directory
 import logging
 import yaml
 import os
+import re
 import sys
+import mimetypes
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.core.database import DatabaseManager
-from src.core.data_processor import DataProcessor
-from src.utils.file_manager import FileManager
+from src.core.database import get_pool_stats
+from src.core.jobs import get_job_manager
+from src.core.pipeline import run_generation, get_transform_cache_path
+from src.core.transform_cache import get_transform_cache_stats
+from src.core.article_index import get_article_index, InvalidCursorError
+from src.core.search_index import SearchIndex
+from src.core.change_log import ChangeLog, BuildExpiredError
+from src.core.feeds import FEED_FORMATS, get_feed_filename
+from src.core.scheduler import start_scheduler, get_scheduler, GENERATE_JOB_KEY
+from src.utils.config import install_reload_signal_handler
+from src.utils.file_manager import FileManager, OUTPUT_FORMATS, SHARD_DIR
 from src.utils.security import (
     require_api_key, 
     require_ip_whitelist, 
     rate_limit, 
+    content_rate_limit, 
     validate_request, 
     log_request
 )
@@ -59,59 +70,51 @@ def load_config():
         logger.error(f"加载配置文件失败: {e}")
         raise
 
+def _is_true(value) -> bool:
+    """解析布尔型查询参数"""
+    return str(value or '').lower() in ('1', 'true', 'yes')
+
 @app.route('/generate', methods=['GET'])
 @log_request
 @validate_request
 @rate_limit
 def generate_json():
-    """生成JSON文件的API接口"""
+    """生成JSON文件的API接口
+    
+    同时到达的生成请求会合并为一次生成；``async=1`` 时立即返回任务ID，
+    通过 ``/jobs/<job_id>`` 查询任务状态。
+    """
     try:
         # 加载配置
         config = load_config()
-        recent_days = config['data']['recent_days']
-        
-        logger.info(f"开始生成JSON文件，获取最近{recent_days}天的数据")
+        full = _is_true(request.args.get('full'))
         
-        # 初始化组件
-        file_manager = FileManager()
-        data_processor = DataProcessor(recent_days)
+        # 全量生成排在进行中的生成之后执行，所有生成共用一个key，不会同时发布
+        job_manager = get_job_manager(config)
+        if full:
+            job = job_manager.queue(GENERATE_JOB_KEY, run_generation, config, full=True)
+        else:
+            job = job_manager.submit(GENERATE_JOB_KEY, run_generation, config)
         
-        # 获取数据
-        with DatabaseManager() as db:
-            # 获取所有feeds
-            feeds = db.get_all_feeds()
-            logger.info(f"获取到 {len(feeds)} 个公众号")
-            
-            all_articles = []
-            # 循环获取每个公众号的文章
-            for feed in feeds:
-                mp_id = feed['id']
-                articles = db.get_recent_articles(mp_id, recent_days)
-                logger.info(f"公众号 {feed.get('mp_name', mp_id)} 获取到 {len(articles)} 篇文章")
-                all_articles.extend(articles)
-            
-            # 处理数据
-            processed_data = data_processor.process_data(feeds, all_articles)
-            
-            # 保存JSON文件
-            filename = file_manager.save_json_file(processed_data)
-            file_url = file_manager.get_file_url(filename)
-            
-            # 清理旧文件
-            file_manager.cleanup_old_files()
-            
-            logger.info(f"JSON文件生成成功: {filename}")
-            
+        if _is_true(request.args.get('async')):
             return jsonify({
-                "code": 200,
-                "msg": "成功",
-                "fileUrl": file_url,
+                "code": 202,
+                "msg": "任务已提交",
                 "data": {
-                    "filename": filename,
-                    "record_count": len(processed_data),
-                    "recent_days": recent_days
+                    "job_id": job.id,
+                    "status": job.status,
+                    "status_url": f"/jobs/{job.id}"
                 }
-            })
+            }), 202
+        
+        result = dict(job.wait())
+        file_url = result.pop('fileUrl')
+        return jsonify({
+            "code": 200,
+            "msg": "成功",
+            "fileUrl": file_url,
+            "data": result
+        })
             
     except Exception as e:
         logger.error(f"生成JSON文件失败: {e}")
@@ -121,35 +124,100 @@ def generate_json():
             "fileUrl": ""
         }), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+@log_request
+@validate_request
+def job_status(job_id):
+    """后台任务状态查询接口"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({
+            "code": 404,
+            "msg": "任务不存在",
+            "error": f"任务 {job_id} 不存在或已过期"
+        }), 404
+    return jsonify({
+        "code": 200,
+        "msg": "成功",
+        "data": job.to_dict()
+    })
+
+def _negotiate_encoding(file_manager, filename):
+    """根据 Accept-Encoding 选择预压缩版本，返回 (实际文件名, 编码)"""
+    for encoding in ('br', 'gzip'):
+        if request.accept_encodings[encoding] > 0:
+            variant = file_manager.get_variant_filename(filename, encoding)
+            if variant:
+                return variant, encoding
+    return filename, None
+
+def _send_published_file(file_manager, filename, mimetype=None):
+    """返回已发布的文件
+    
+    存在预压缩版本（.br/.gz）且客户端支持时直接返回压缩文件，使用发布时计算的内容哈希作为ETag，
+    支持条件请求和 Range 请求。文件不存在时返回404。
+    """
+    storage_path = file_manager.storage_path
+    file_path = os.path.join(storage_path, filename)
+    
+    if not os.path.isfile(file_path):
+        logger.error(f"文件不存在: {file_path}")
+        return jsonify({
+            "code": 404,
+            "msg": "文件不存在",
+            "fileUrl": ""
+        }), 404
+    
+    served_filename, encoding = _negotiate_encoding(file_manager, filename)
+    if mimetype is None:
+        mimetype = next((mime for extension, mime in OUTPUT_FORMATS.values() if filename.endswith(extension)), None)
+        mimetype = mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    
+    # 使用发布时计算的内容哈希作为ETag，不同编码的版本使用不同的ETag
+    meta = file_manager.get_file_meta(filename)
+    etag = True
+    if meta:
+        etag = meta['etag'] + (f"-{encoding}" if encoding else '')
+    
+    # send_from_directory 会处理 If-None-Match/If-Modified-Since（返回304）和 Range 请求
+    logger.info(f"下载文件: {os.path.join(storage_path, served_filename)}")
+    response = send_from_directory(storage_path, served_filename, as_attachment=False,
+                                   mimetype=mimetype, etag=etag, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # 要求客户端每次使用条件请求验证缓存
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/files/<filename>')
+@app.route('/files/shards/<filename>', defaults={'directory': SHARD_DIR})
 @log_request
 @validate_request
 @rate_limit
-def download_file(filename):
-    """文件下载接口"""
+def download_file(filename, directory=None):
+    """文件下载接口
+    
+    存在预压缩版本（.br/.gz）且客户端支持时直接返回压缩文件，不在请求时压缩。
+    支持 ETag/Last-Modified 条件请求（内容未变化时返回304）和 Range 断点续传。
+    ``?format=ndjson|msgpack`` 返回同名的其他格式文件（需在 ``file.formats`` 中启用）。
+    ``/files/shards/<filename>`` 下载按公众号拆分的文件及其清单 ``manifest.json``。
+    """
     try:
-        config = load_config()
-        storage_path = config['file']['storage_path']
-        
-        # 转换为绝对路径
-        import os
-        if not os.path.isabs(storage_path):
-            # 如果是相对路径，转换为绝对路径
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            storage_path = os.path.join(project_root, storage_path)
-        
-        file_path = os.path.join(storage_path, filename)
-        
-        if not os.path.exists(file_path):
-            logger.error(f"文件不存在: {file_path}")
-            return jsonify({
-                "code": 404,
-                "msg": "文件不存在",
-                "fileUrl": ""
-            }), 404
+        file_manager = FileManager()
+        if directory:
+            filename = f"{directory}/{filename}"
         
-        logger.info(f"下载文件: {file_path}")
-        return send_from_directory(storage_path, filename, as_attachment=False)
+        output_format = request.args.get('format')
+        if output_format:
+            if output_format not in OUTPUT_FORMATS:
+                return jsonify({
+                    "code": 400,
+                    "msg": "参数错误",
+                    "error": f"不支持的格式: {output_format}，可选: {', '.join(OUTPUT_FORMATS)}"
+                }), 400
+            filename = file_manager.get_format_filename(filename, output_format)
+        return _send_published_file(file_manager, filename)
         
     except Exception as e:
         logger.error(f"文件下载失败: {e}")
@@ -159,6 +227,205 @@ def download_file(filename):
             "fileUrl": ""
         }), 404
 
+# content文件名为sha256十六进制摘要
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+@app.route('/files/content/<content_hash>')
+@log_request
+@validate_request
+@content_rate_limit
+def download_content(content_hash):
+    """content文件下载接口
+    
+    拆分输出时每篇文章的content按内容哈希保存，同一URL的内容永不改变，返回长期缓存的响应头。
+    """
+    file_manager = FileManager()
+    filename = file_manager.get_content_filename(content_hash)
+    if not CONTENT_HASH_PATTERN.match(content_hash) or \
+            not os.path.isfile(os.path.join(file_manager.storage_path, filename)):
+        return jsonify({
+            "code": 404,
+            "msg": "文件不存在",
+            "fileUrl": ""
+        }), 404
+    
+    served_filename, encoding = _negotiate_encoding(file_manager, filename)
+    etag = content_hash + (f"-{encoding}" if encoding else '')
+    response = send_from_directory(file_manager.storage_path, served_filename, as_attachment=False,
+                                   mimetype='text/html', etag=etag, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
+
+def _split_param(name):
+    """解析逗号分隔的查询参数"""
+    value = request.args.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def _int_param(name, default=None):
+    """解析整数查询参数，格式错误时抛出ValueError"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 必须是整数")
+
+@app.route('/articles', methods=['GET'])
+@log_request
+@validate_request
+@rate_limit
+def list_articles():
+    """文章查询接口
+    
+    从发布时构建的索引中查询（content按需从 result.json 读取），支持按公众号、发布时间范围过滤，
+    基于游标分页和字段投影。
+    """
+    try:
+        mp_ids = _split_param('mp_id')
+        since = _int_param('since')
+        until = _int_param('until')
+        limit = min(max(_int_param('limit', 20), 1), 200)
+        fields = _split_param('fields')
+        exclude = _split_param('exclude')
+    except ValueError as e:
+        return jsonify({
+            "code": 400,
+            "msg": "参数错误",
+            "error": str(e)
+        }), 400
+    
+    file_manager = FileManager()
+    index = get_article_index(file_manager, file_manager.generate_filename())
+    if index is None:
+        return jsonify({
+            "code": 404,
+            "msg": "数据尚未生成",
+            "error": "请先调用 /generate 生成数据"
+        }), 404
+    
+    try:
+        result = index.query(mp_ids=mp_ids, since=since, until=until, cursor=request.args.get('cursor'),
+                             limit=limit, fields=fields, exclude=exclude)
+    except InvalidCursorError as e:
+        return jsonify({
+            "code": 400,
+            "msg": "参数错误",
+            "error": str(e)
+        }), 400
+    
+    result['etag'] = index.etag
+    return jsonify({
+        "code": 200,
+        "msg": "成功",
+        "data": result
+    })
+
+@app.route('/search', methods=['GET'])
+@log_request
+@validate_request
+@rate_limit
+def search_articles():
+    """全文搜索接口
+    
+    在标题、摘要和正文中搜索，中文按二元组匹配，结果按相关度排序并分页。
+    """
+    query = request.args.get('q', '').strip()
+    try:
+        if not query:
+            raise ValueError("缺少参数 q")
+        page = max(_int_param('page', 1), 1)
+        page_size = min(max(_int_param('page_size', 20), 1), 100)
+    except ValueError as e:
+        return jsonify({
+            "code": 400,
+            "msg": "参数错误",
+            "error": str(e)
+        }), 400
+    
+    file_manager = FileManager()
+    result = SearchIndex(file_manager.get_state_path('search.sqlite3')).search(
+        query, page=page, page_size=page_size, mp_ids=_split_param('mp_id'))
+    if result is None:
+        return jsonify({
+            "code": 404,
+            "msg": "搜索索引尚未生成",
+            "error": "请先调用 /generate 生成数据"
+        }), 404
+    
+    return jsonify({
+        "code": 200,
+        "msg": "成功",
+        "data": result
+    })
+
+@app.route('/changes', methods=['GET'])
+@log_request
+@validate_request
+@rate_limit
+def list_changes():
+    """增量接口
+    
+    返回构建号 ``since`` 之后新增、修改和删除的文章，客户端保存返回的 ``build`` 作为下次请求的 ``since``。
+    ``since`` 对应的增量已过期时返回410，客户端需要重新下载全量数据。
+    """
+    try:
+        since = _int_param('since', 0)
+        if since < 0:
+            raise ValueError("参数 since 不能小于0")
+        result = ChangeLog(FileManager()).get_changes(since)
+    except BuildExpiredError as e:
+        return jsonify({
+            "code": 410,
+            "msg": "增量已过期，请重新下载全量数据",
+            "error": str(e)
+        }), 410
+    except ValueError as e:
+        return jsonify({
+            "code": 400,
+            "msg": "参数错误",
+            "error": str(e)
+        }), 400
+    
+    return jsonify({
+        "code": 200,
+        "msg": "成功",
+        "data": result
+    })
+
+@app.route('/feed.xml', methods=['GET'])
+@log_request
+@validate_request
+@rate_limit
+def feed():
+    """订阅接口
+    
+    ``format`` 为 atom（默认）或 rss；指定 ``mp_id`` 时返回单个公众号的订阅（需启用 ``feeds.per_mp``）。
+    支持 ETag 条件请求，订阅内容未变化时返回304。
+    """
+    feed_format = request.args.get('format', 'atom')
+    if feed_format not in FEED_FORMATS:
+        return jsonify({
+            "code": 400,
+            "msg": "参数错误",
+            "error": f"不支持的订阅格式: {feed_format}，可选: {', '.join(FEED_FORMATS)}"
+        }), 400
+    
+    try:
+        filename = get_feed_filename(feed_format, request.args.get('mp_id') or None)
+        return _send_published_file(FileManager(), filename, f"{FEED_FORMATS[feed_format]}; charset=utf-8")
+    except Exception as e:
+        logger.error(f"订阅获取失败: {e}")
+        return jsonify({
+            "code": 500,
+            "msg": f"订阅获取失败: {str(e)}"
+        }), 500
+
 @app.route('/health', methods=['GET'])
 @log_request
 @validate_request
@@ -170,6 +437,24 @@ def health_check():
         "timestamp": "2024-01-01 00:00:00"
     })
 
+@app.route('/stats', methods=['GET'])
+@log_request
+@validate_request
+@require_ip_whitelist
+@require_api_key
+def stats():
+    """运行统计接口"""
+    scheduler = get_scheduler()
+    return jsonify({
+        "code": 200,
+        "msg": "成功",
+        "data": {
+            "db_pool": get_pool_stats(),
+            "scheduler": scheduler.stats() if scheduler else None,
+            "transform_cache": get_transform_cache_stats(get_transform_cache_path(FileManager()))
+        }
+    })
+
 @app.route('/', methods=['GET'])
 @log_request
 @validate_request
@@ -192,10 +477,59 @@ def index():
                 "auth": "需要API密钥",
                 "rate_limit": "每分钟10次"
             },
+            "job": {
+                "url": "/jobs/<job_id>",
+                "method": "GET",
+                "description": "查询后台生成任务状态（/generate?async=1 返回的任务ID）",
+                "auth": "无需API密钥",
+                "rate_limit": "无限制"
+            },
             "download": {
                 "url": "/files/<filename>",
                 "method": "GET", 
-                "description": "下载文件",
+                "description": "下载文件（参数: format=json|ndjson|msgpack）",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟10次"
+            },
+            "shards": {
+                "url": "/files/shards/<mp_id>.json",
+                "method": "GET",
+                "description": "下载单个公众号的文章（清单: /files/shards/manifest.json）",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟10次"
+            },
+            "content": {
+                "url": "/files/content/<hash>",
+                "method": "GET",
+                "description": "下载单篇文章的content（index.json 中的 content_hash），可永久缓存",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟600次（单独计数）"
+            },
+            "articles": {
+                "url": "/articles",
+                "method": "GET",
+                "description": "查询文章（参数: mp_id, since, until, cursor, limit, fields, exclude）",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟10次"
+            },
+            "search": {
+                "url": "/search",
+                "method": "GET",
+                "description": "全文搜索（参数: q, mp_id, page, page_size）",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟10次"
+            },
+            "feed": {
+                "url": "/feed.xml",
+                "method": "GET",
+                "description": "Atom/RSS 2.0订阅（参数: format=atom|rss, mp_id）",
+                "auth": "无需API密钥",
+                "rate_limit": "每分钟10次"
+            },
+            "changes": {
+                "url": "/changes",
+                "method": "GET",
+                "description": "增量同步（参数: since，上次返回的构建号）",
                 "auth": "无需API密钥",
                 "rate_limit": "每分钟10次"
             },
@@ -205,6 +539,13 @@ def index():
                 "description": "健康检查",
                 "auth": "无需API密钥",
                 "rate_limit": "无限制"
+            },
+            "stats": {
+                "url": "/stats",
+                "method": "GET",
+                "description": "运行统计（连接池、定时任务、content转换缓存等）",
+                "auth": "启用api_key_required/ip_whitelist_enabled时需要API密钥且IP在白名单中",
+                "rate_limit": "无限制"
             }
         },
         "usage": {
@@ -214,7 +555,9 @@ def index():
     })
 
 def create_app():
-    """创建Flask应用实例"""
+    """创建Flask应用实例，并按配置启动定时生成任务"""
+    install_reload_signal_handler()
+    start_scheduler(load_config())
     return app
 
 if __name__ == '__main__':
@@ -223,7 +566,7 @@ if __name__ == '__main__':
         app_config = config['app']
         
         logger.info(f"启动服务: {app_config['host']}:{app_config['port']}")
-        app.run(
+        create_app().run(
             host=app_config['host'],
             port=app_config['port'],
             debug=app_config['debug']
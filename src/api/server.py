@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+生产环境WSGI服务
+
+Linux/Mac 使用 gunicorn 多进程（每个进程多线程）运行应用，Windows 使用 waitress 多线程运行。
+连接池、任务线程池、限流器等进程级状态都会在子进程 fork 之后重新创建，
+定时任务也在 fork 之后启动，避免在父进程中启动的线程丢失。
+"""
+
+import os
+import sys
+import logging
+
+from src.utils.config import load_config
+
+logger = logging.getLogger(__name__)
+
+
+def get_server_options(config: dict) -> dict:
+    """读取 ``server`` 配置并补全默认值"""
+    app_config = config['app']
+    server_config = config.get('server') or {}
+    return {
+        'host': app_config['host'],
+        'port': app_config['port'],
+        'workers': server_config.get('workers') or (os.cpu_count() or 1) * 2 + 1,
+        'threads': server_config.get('threads', 4),
+        'keepalive': server_config.get('keepalive', 5),
+        'timeout': server_config.get('timeout', 120),
+        'graceful_timeout': server_config.get('graceful_timeout', 30),
+        'max_requests': server_config.get('max_requests', 0),
+        'max_requests_jitter': server_config.get('max_requests_jitter', 0),
+        'preload_app': server_config.get('preload_app', False),
+    }
+
+
+def init_worker():
+    """工作进程初始化：fork之后启动定时任务等进程级后台线程"""
+    from src.core.scheduler import start_scheduler
+    start_scheduler(load_config())
+
+
+def post_fork(server, worker):
+    """gunicorn钩子：工作进程fork之后执行"""
+    init_worker()
+    logger.info(f"工作进程已启动: pid={worker.pid}")
+
+
+def run_gunicorn():
+    """使用gunicorn运行应用"""
+    from gunicorn.app.base import BaseApplication
+    
+    class GunicornApplication(BaseApplication):
+        def load_config(self):
+            # 启动及收到SIGHUP平滑重启时调用，重新读取 server 配置
+            options = get_server_options(load_config())
+            settings = {
+                'bind': f"{options['host']}:{options['port']}",
+                'workers': options['workers'],
+                'threads': options['threads'],
+                'worker_class': 'gthread' if options['threads'] > 1 else 'sync',
+                'keepalive': options['keepalive'],
+                'timeout': options['timeout'],
+                'graceful_timeout': options['graceful_timeout'],
+                'max_requests': options['max_requests'],
+                'max_requests_jitter': options['max_requests_jitter'],
+                'preload_app': options['preload_app'],
+                'accesslog': '-',
+                'post_fork': post_fork,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            from src.api.app import app
+            return app
+    
+    GunicornApplication().run()
+
+
+def run_waitress(options: dict):
+    """使用waitress运行应用（Windows，单进程多线程）"""
+    from waitress import serve
+    from src.api.app import app
+    
+    init_worker()
+    serve(app, host=options['host'], port=options['port'],
+          threads=options['threads'], channel_timeout=options['timeout'])
+
+
+def run_production_server(config: dict = None):
+    """启动生产环境WSGI服务"""
+    options = get_server_options(config or load_config())
+    if sys.platform.startswith('win'):
+        logger.info(f"使用waitress启动服务: {options['host']}:{options['port']}, 线程数={options['threads']}")
+        run_waitress(options)
+    else:
+        logger.info(f"使用gunicorn启动服务: {options['host']}:{options['port']}, "
+                    f"进程数={options['workers']}, 每进程线程数={options['threads']}")
+        run_gunicorn()
@@ -0,0 +1,250 @@
+import os
+import json
+import base64
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from itertools import islice, repeat
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 索引文件（.state目录下）：首行为已发布文件的版本，其后每行为一条记录的 [位置, 长度, 元数据]
+INDEX_STATE_FILE = 'article_index.ndjson'
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无效"""
+
+
+def encode_cursor(key: Tuple[int, str]) -> str:
+    """将 (publish_time, id) 编码为分页游标"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """解析分页游标"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        publish_time, article_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return int(publish_time), str(article_id)
+    except Exception:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}")
+
+
+class ArticleIndex:
+    """文章内存索引
+    
+    所有文章按 ``(publish_time, id)`` 升序保存在有序数组中，另按 mp_id 分组保存一份。
+    时间范围和分页游标通过二分查找定位，单次查询为 O(log n + limit)。
+    结果按发布时间倒序返回，游标为上一页最后一条的 ``(publish_time, id)``。
+    
+    ``records`` 可以只包含元数据（不含content），此时 ``refs`` 为各记录对应的引用，
+    查询结果需要content时通过 ``load_record(ref)`` 读取完整记录。
+    """
+    
+    def __init__(self, records: Iterable[Dict[str, Any]], etag: str = None, refs: Iterable[Any] = None,
+                 load_record: Callable[[Any], Dict[str, Any]] = None):
+        self.etag = etag
+        self._load_record = load_record
+        entries = sorted(((self._key(record), (record, ref)) for record, ref in zip(records, refs or repeat(None))),
+                         key=lambda entry: entry[0])
+        self._keys = [key for key, _ in entries]
+        self._records = [entry for _, entry in entries]
+        
+        # 按公众号分组的有序数组
+        self._by_mp = {}
+        for key, entry in entries:
+            keys, records = self._by_mp.setdefault(entry[0].get('mp_id'), ([], []))
+            keys.append(key)
+            records.append(entry)
+    
+    @staticmethod
+    def _key(record: Dict[str, Any]) -> Tuple[int, str]:
+        return int(record.get('publish_time') or 0), str(record.get('id', ''))
+    
+    def __len__(self):
+        return len(self._records)
+    
+    @staticmethod
+    def _slice_desc(keys: List[tuple], records: List[dict], since: Optional[int],
+                    until: Optional[int], before: Optional[Tuple[int, str]]):
+        """返回满足条件的记录（倒序迭代器）"""
+        lo = bisect_left(keys, (since, '')) if since is not None else 0
+        hi = len(keys)
+        if until is not None:
+            hi = min(hi, bisect_left(keys, (until + 1, '')))
+        if before is not None:
+            hi = min(hi, bisect_left(keys, before))
+        return ((keys[i], records[i]) for i in range(hi - 1, lo - 1, -1))
+    
+    def query(self, mp_ids: List[str] = None, since: int = None, until: int = None,
+              cursor: str = None, limit: int = 20, fields: List[str] = None,
+              exclude: List[str] = None) -> Dict[str, Any]:
+        """查询文章
+        
+        ``mp_ids`` 过滤公众号，``since``/``until`` 为发布时间范围（含边界），
+        ``fields`` 指定返回的字段，``exclude`` 指定不返回的字段（例如 content）。
+        """
+        before = decode_cursor(cursor) if cursor else None
+        if mp_ids:
+            # 多个公众号时按发布时间倒序归并
+            sources = [self._slice_desc(*self._by_mp[mp_id], since, until, before)
+                       for mp_id in dict.fromkeys(mp_ids) if mp_id in self._by_mp]
+            matches = heapq.merge(*sources, key=lambda entry: entry[0], reverse=True)
+        else:
+            matches = self._slice_desc(self._keys, self._records, since, until, before)
+        
+        page = list(islice(matches, limit + 1))
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        items = [self._project(entry, fields, exclude) for _, entry in page]
+        return {
+            'items': items,
+            'count': len(items),
+            'next_cursor': encode_cursor(page[-1][0]) if has_more else None,
+        }
+    
+    def _project(self, entry: tuple, fields: List[str] = None, exclude: List[str] = None) -> Dict[str, Any]:
+        record, ref = entry
+        needs_content = 'content' in fields if fields else not (exclude and 'content' in exclude)
+        if needs_content and self._load_record is not None:
+            record = self._load_record(ref)
+        if fields:
+            record = {field: record[field] for field in fields if field in record}
+        if exclude:
+            record = {field: value for field, value in record.items() if field not in exclude}
+        return record
+
+
+class _RecordReader:
+    """按位置从已发布的JSON文件中读取单条记录
+    
+    打开时校验文件与元数据一致；之后文件被重新发布（原子替换）时，已打开的文件仍是索引对应的版本。
+    """
+    
+    def __init__(self, file_path: str, meta: Dict[str, Any]):
+        self._file = open(file_path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        if stat.st_size != meta.get('size') or stat.st_mtime_ns != meta.get('mtime_ns'):
+            self._file.close()
+            raise ValueError(f"文件已变化: {file_path}")
+        self._lock = threading.Lock()
+    
+    def __del__(self):
+        file = getattr(self, '_file', None)
+        if file is not None:
+            file.close()
+    
+    def read(self, ref: Tuple[int, int]) -> Dict[str, Any]:
+        offset, length = ref
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        return json.loads(data.decode('utf-8'))
+
+
+class ArticleIndexBuilder:
+    """随发布过程构建 /articles 使用的索引
+    
+    只保存每条记录的元数据（不含content）和记录在已发布JSON文件中的字节位置（由
+    ``FileManager.publish_json_stream`` 的 ``on_record`` 回调提供），content在查询时按位置读取。
+    提交时写入索引文件并替换当前进程的索引，其他工作进程读取索引文件，不需要解析整个JSON文件。
+    """
+    
+    def __init__(self, file_manager, filename: str):
+        self.file_manager = file_manager
+        self.filename = filename
+        self.index_path = file_manager.get_state_path(INDEX_STATE_FILE)
+        self.entries = []
+    
+    def add(self, record: Dict[str, Any], offset: int, length: int):
+        """记录一条已写入的记录"""
+        self.entries.append((offset, length, {key: value for key, value in record.items() if key != 'content'}))
+    
+    def is_current(self, etag: str) -> bool:
+        """索引文件是否对应指定版本的数据"""
+        header = _read_index_header(self.index_path)
+        return header is not None and header.get('etag') == etag and header.get('filename') == self.filename
+    
+    def commit(self, etag: str):
+        """写入索引文件，并替换当前进程的索引"""
+        index_filename = os.path.relpath(self.index_path, self.file_manager.storage_path)
+        with self.file_manager.atomic_open(index_filename) as file:
+            file.write(json.dumps({'etag': etag, 'filename': self.filename}) + '\n')
+            for entry in self.entries:
+                file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        with _index_lock:
+            _load_locked(self.file_manager, self.filename)
+        self.entries = []
+    
+    def abort(self):
+        """放弃本次构建"""
+        self.entries = []
+
+
+def _read_index_header(index_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(index_path, encoding='utf-8') as file:
+            return json.loads(file.readline())
+    except (OSError, ValueError):
+        return None
+
+
+# 进程级索引缓存，按已发布文件的ETag失效
+_index_cache: Dict[str, ArticleIndex] = {}
+_index_lock = threading.Lock()
+
+
+def _load_locked(file_manager, filename: str) -> Optional[ArticleIndex]:
+    """读取索引文件并放入缓存（持有锁时调用）
+    
+    索引文件与已发布文件版本不一致（正在重新发布）时返回None。
+    """
+    meta = file_manager.get_file_meta(filename)
+    file_path = os.path.join(file_manager.storage_path, filename)
+    if meta is None:
+        _index_cache.pop(file_path, None)
+        return None
+    
+    try:
+        with open(file_manager.get_state_path(INDEX_STATE_FILE), encoding='utf-8') as file:
+            header = json.loads(file.readline())
+            if header.get('etag') != meta['etag'] or header.get('filename') != filename:
+                return None
+            reader = _RecordReader(file_path, meta)
+            records = []
+            refs = []
+            for line in file:
+                offset, length, record = json.loads(line)
+                records.append(record)
+                refs.append((offset, length))
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取文章索引失败: {e}")
+        return None
+    
+    index = ArticleIndex(records, etag=meta['etag'], refs=refs, load_record=reader.read)
+    _index_cache[file_path] = index
+    logger.info(f"文章索引加载完成: {filename}，共 {len(index)} 条记录")
+    return index
+
+
+def get_article_index(file_manager, filename: str) -> Optional[ArticleIndex]:
+    """获取文章索引，已发布文件变化（例如由其他工作进程重新生成）时重新加载
+    
+    已发布文件已替换但索引文件尚未更新时，继续使用上一版本的索引。
+    """
+    meta = file_manager.get_file_meta(filename)
+    if meta is None:
+        return None
+    file_path = os.path.join(file_manager.storage_path, filename)
+    index = _index_cache.get(file_path)
+    if index is not None and index.etag == meta['etag']:
+        return index
+    with _index_lock:
+        cached = _index_cache.get(file_path)
+        if cached is not None and cached.etag == meta['etag']:
+            return cached
+        return _load_locked(file_manager, filename) or cached
@@ -0,0 +1,73 @@
+import sys
+from typing import Dict, Any, Iterator, Tuple
+
+# 输出字段及顺序，与生成的JSON文件一致
+FIELDS = ('id', 'mp_id', 'mp_name', 'mp_intro', 'title', 'url', 'content', 'description', 'publish_time')
+
+
+class ArticleRecord:
+    """合并后的文章记录
+
+    生成流程内部使用的紧凑表示：``__slots__`` 对象没有每条记录的字典开销，公众号级别的字段
+    （``mp_id``/``mp_name``/``mp_intro``）引用同一公众号共享的驻留字符串。
+    提供 ``get``/``[]``/``items`` 等只读的字典式访问，序列化时才通过 ``to_dict`` 转换为字典
+    （``json.dumps``/``msgpack`` 的 ``default`` 回调）。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, id, mp_id, mp_name, mp_intro, title, url, content, description, publish_time):
+        self.id = id
+        self.mp_id = mp_id
+        self.mp_name = mp_name
+        self.mp_intro = mp_intro
+        self.title = title
+        self.url = url
+        self.content = content
+        self.description = description
+        self.publish_time = publish_time
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELDS
+
+    def keys(self) -> Tuple[str, ...]:
+        return FIELDS
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((name, getattr(self, name)) for name in FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，字段顺序与输出文件一致"""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ArticleRecord):
+            return all(getattr(self, name) == getattr(other, name) for name in FIELDS)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord(id={self.id!r}, mp_id={self.mp_id!r}, title={self.title!r})"
+
+
+def intern_value(value):
+    """驻留字符串，使相同的公众号字段在所有记录中共享同一个对象"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def record_default(obj):
+    """``json.dumps``/``msgpack`` 的 ``default`` 回调：序列化时把 ``ArticleRecord`` 转换为字典"""
+    if isinstance(obj, ArticleRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
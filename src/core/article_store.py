@@ -0,0 +1,170 @@
+import os
+import time
+import sqlite3
+import logging
+from typing import List, Dict, Any, Iterator, Tuple
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# 本地保存的文章字段（DataProcessor 需要的字段）
+ARTICLE_COLUMNS = ('id', 'mp_id', 'title', 'url', 'content', 'description', 'publish_time')
+# 默认的全量同步间隔（秒）
+DEFAULT_FULL_SYNC_INTERVAL = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY,
+    mp_id TEXT NOT NULL,
+    title TEXT,
+    url TEXT,
+    content TEXT,
+    description TEXT,
+    publish_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_mp_time ON articles (mp_id, publish_time DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_time ON articles (publish_time);
+CREATE TABLE IF NOT EXISTS watermarks (
+    mp_id TEXT PRIMARY KEY,
+    publish_time INTEGER NOT NULL,
+    article_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ArticleStore:
+    """本地持久化的文章窗口
+    
+    保存最近 ``recent_days`` 天内的文章，并记录每个公众号已读取到的
+    ``(publish_time, id)`` 水位线。每次同步只从数据库读取水位线之后的新文章，
+    同时删除滑出时间窗口的文章，生成成本与新文章数量相关而不是与窗口大小相关。
+    
+    注意：水位线只能发现新发布的文章，已有文章的修改、删除或补录的旧文章
+    需要通过全量同步（``full=True``）更新，``sync`` 的 ``full_sync_interval`` 用于定期自动全量同步。
+    """
+    
+    def __init__(self, db_path: str):
+        """初始化文章存储"""
+        self.db_path = db_path
+        self.connection = None
+    
+    def open(self):
+        """打开本地存储"""
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(self.db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+    
+    def close(self):
+        """关闭本地存储"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    @staticmethod
+    def time_range(recent_days: int) -> Tuple[int, int]:
+        """计算最近几天的时间戳范围"""
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=recent_days)
+        return int(start_time.timestamp()), int(end_time.timestamp())
+    
+    def _get_meta(self, key: str):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+    
+    def _set_meta(self, key: str, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+    
+    def get_watermarks(self) -> Dict[str, tuple]:
+        """获取各公众号的水位线"""
+        rows = self.connection.execute("SELECT mp_id, publish_time, article_id FROM watermarks")
+        return {row['mp_id']: (row['publish_time'], row['article_id']) for row in rows}
+    
+    def sync(self, db, mp_ids: List[str], recent_days: int, full: bool = False,
+             full_sync_interval: float = 0) -> Dict[str, int]:
+        """从数据库同步新文章，返回本次新增和淘汰的文章数量
+        
+        ``db`` 为已连接的 ``DatabaseManager``。时间窗口天数变化时自动全量同步；
+        ``full_sync_interval`` 大于0时，距离上次全量同步超过该秒数也自动全量同步，
+        使已有文章的修改和删除最迟在一个间隔后生效。
+        """
+        try:
+            start_timestamp, end_timestamp = self.time_range(recent_days)
+            # 写事务，避免并发同步互相覆盖
+            self.connection.execute("BEGIN IMMEDIATE")
+            
+            if not full and full_sync_interval > 0:
+                full_synced_at = self._get_meta('full_synced_at')
+                full = full_synced_at is None or time.time() - float(full_synced_at) >= full_sync_interval
+            if full or self._get_meta('recent_days') != str(recent_days):
+                logger.info("本地文章存储全量同步")
+                self.connection.execute("DELETE FROM articles")
+                self.connection.execute("DELETE FROM watermarks")
+                self._set_meta('full_synced_at', time.time())
+            
+            # 删除已停用的公众号
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS active_feeds (mp_id TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM active_feeds")
+            self.connection.executemany("INSERT OR IGNORE INTO active_feeds (mp_id) VALUES (?)",
+                                        [(mp_id,) for mp_id in mp_ids])
+            self.connection.execute("DELETE FROM articles WHERE mp_id NOT IN (SELECT mp_id FROM active_feeds)")
+            self.connection.execute("DELETE FROM watermarks WHERE mp_id NOT IN (SELECT mp_id FROM active_feeds)")
+            
+            # 淘汰滑出时间窗口的文章
+            evicted = self.connection.execute(
+                "DELETE FROM articles WHERE publish_time < ?", (start_timestamp,)).rowcount
+            
+            # 读取水位线之后的新文章
+            watermarks = self.get_watermarks()
+            added = 0
+            insert_sql = (f"INSERT OR REPLACE INTO articles ({', '.join(ARTICLE_COLUMNS)}) "
+                          f"VALUES ({', '.join(['?'] * len(ARTICLE_COLUMNS))})")
+            for row in db.iter_articles_since(mp_ids, watermarks, start_timestamp, end_timestamp):
+                self.connection.execute(insert_sql, tuple(row.get(column) for column in ARTICLE_COLUMNS))
+                mark = (row['publish_time'], str(row['id']))
+                current = watermarks.get(row['mp_id'])
+                if current is None or mark > (current[0], current[1]):
+                    watermarks[row['mp_id']] = mark
+                added += 1
+            
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO watermarks (mp_id, publish_time, article_id) VALUES (?, ?, ?)",
+                [(mp_id, mark[0], mark[1]) for mp_id, mark in watermarks.items()])
+            self._set_meta('recent_days', recent_days)
+            self.connection.commit()
+            
+            logger.info(f"本地文章存储同步完成: 新增 {added} 篇, 淘汰 {evicted} 篇")
+            return {'added': added, 'evicted': evicted}
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"本地文章存储同步失败: {e}")
+            raise
+    
+    def iter_articles(self, recent_days: int) -> Iterator[Dict[str, Any]]:
+        """按 mp_id 分组、组内按发布时间倒序遍历窗口内的文章"""
+        start_timestamp, end_timestamp = self.time_range(recent_days)
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(ARTICLE_COLUMNS)} FROM articles "
+            f"WHERE publish_time >= ? AND publish_time <= ? "
+            f"ORDER BY mp_id, publish_time DESC",
+            (start_timestamp, end_timestamp))
+        for row in cursor:
+            yield dict(row)
+    
+    def count(self) -> int:
+        """本地保存的文章数量"""
+        return self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
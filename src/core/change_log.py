@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import logging
+from typing import Dict, Any, Optional
+
+from src.core.article_record import record_default
+
+logger = logging.getLogger(__name__)
+
+# 增量文件目录（相对存储目录）
+CHANGES_DIR = 'changes'
+# 默认保留的增量数量
+DEFAULT_RETENTION = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS builds (
+    build INTEGER PRIMARY KEY,
+    etag TEXT,
+    created_at REAL NOT NULL,
+    added INTEGER NOT NULL,
+    updated INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class BuildExpiredError(Exception):
+    """请求的构建号早于保留的最早增量，需要重新下载全量数据"""
+
+
+def record_digest(record: Dict[str, Any]) -> str:
+    """计算记录内容的摘要"""
+    data = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'),
+                      default=record_default).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ChangeLogBuilder:
+    """随发布过程计算与上一次构建相比的增量
+
+    本地保存上一次构建中每篇文章的摘要。本次构建的每条记录与之比较，得到新增（added）、
+    修改（updated）和删除（removed，滑出时间窗口或公众号停用）的文章。有变化时分配递增的构建号，
+    将增量写入 ``changes/<build>.json``，只保留最近 ``retention`` 个增量。
+
+    收到第一条记录（或提交）时开启 ``BEGIN IMMEDIATE`` 事务后才读取上一次构建的快照，
+    多个进程同时构建时依次进行，不会基于同一个快照生成重复的增量。
+    新增和修改的记录随到达写入临时文件，提交时拼接成增量文件，内存中只保存文章ID和摘要。
+    """
+
+    def __init__(self, file_manager, retention: int = DEFAULT_RETENTION):
+        self.file_manager = file_manager
+        self.retention = retention
+        self.db_path = file_manager.get_state_path('changes.sqlite3')
+        self.changes_path = os.path.join(file_manager.storage_path, CHANGES_DIR)
+        self.connection = _connect(self.db_path)
+        self.previous = None
+        self.current = {}
+        self.added = None
+        self.updated = None
+        self.counts = {'added': 0, 'updated': 0}
+        self.build = None
+
+    def _begin(self):
+        """开启事务并读取上一次构建的快照"""
+        if self.previous is not None:
+            return
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.previous = dict(self.connection.execute("SELECT id, digest FROM snapshot"))
+        os.makedirs(self.changes_path, exist_ok=True)
+        self.added = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.changes_path)
+        self.updated = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.changes_path)
+
+    def _write(self, kind: str, record: Dict[str, Any]):
+        file = self.added if kind == 'added' else self.updated
+        if self.counts[kind]:
+            file.write(',')
+        json.dump(record, file, ensure_ascii=False, separators=(',', ':'), default=record_default)
+        self.counts[kind] += 1
+
+    def add(self, record: Dict[str, Any]):
+        """比较一条记录与上一次构建"""
+        self._begin()
+        article_id = str(record.get('id', ''))
+        digest = record_digest(record)
+        self.current[article_id] = digest
+        previous = self.previous.get(article_id)
+        if previous is None:
+            self._write('added', record)
+        elif previous != digest:
+            self._write('updated', record)
+
+    def is_current(self, etag: str) -> bool:
+        """本地快照是否已与指定版本的数据比较过（无论是否生成了增量）"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'etag'").fetchone()
+        if row is None:
+            # 旧版本的状态库没有记录比较过的版本，使用最近一次构建
+            row = self.connection.execute("SELECT etag FROM builds ORDER BY build DESC LIMIT 1").fetchone()
+        return row is not None and row[0] == etag
+
+    def commit(self, etag: str) -> Optional[int]:
+        """有变化时写入增量并更新本地快照，返回新的构建号"""
+        try:
+            self._begin()
+            removed = [article_id for article_id in self.previous if article_id not in self.current]
+            added, updated = self.counts['added'], self.counts['updated']
+            # 记录快照已与该版本比较过，之后数据版本不变时不再重复比较
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('etag', ?)", (etag,))
+            if not (added or updated or removed):
+                logger.info("文章无变化，不生成增量")
+                self.connection.commit()
+                return None
+
+            row = self.connection.execute("SELECT MAX(build) FROM builds").fetchone()
+            self.build = (row[0] or 0) + 1
+
+            # 与 json.dump 整个增量的结果相同，记录从临时文件逐块复制
+            filename = f"{CHANGES_DIR}/{self.build}.json"
+            with self.file_manager.atomic_open(filename) as file:
+                file.write(f'{{"build":{self.build},"created_at":{int(time.time())},"added":[')
+                self.added.seek(0)
+                shutil.copyfileobj(self.added, file)
+                file.write('],"updated":[')
+                self.updated.seek(0)
+                shutil.copyfileobj(self.updated, file)
+                file.write('],"removed":')
+                json.dump(removed, file, ensure_ascii=False, separators=(',', ':'))
+                file.write('}')
+
+            self.connection.execute("DELETE FROM snapshot")
+            self.connection.executemany("INSERT INTO snapshot (id, digest) VALUES (?, ?)", self.current.items())
+            self.connection.execute(
+                "INSERT INTO builds (build, etag, created_at, added, updated, removed) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.build, etag, time.time(), added, updated, len(removed)))
+
+            # 只保留最近的增量
+            expired = [row[0] for row in self.connection.execute(
+                "SELECT build FROM builds WHERE build <= ?", (self.build - self.retention,))]
+            self.connection.execute("DELETE FROM builds WHERE build <= ?", (self.build - self.retention,))
+            self.connection.commit()
+
+            for build in expired:
+                try:
+                    os.remove(os.path.join(self.changes_path, f"{build}.json"))
+                except OSError:
+                    pass
+
+            logger.info(f"生成增量 #{self.build}: 新增 {added} 篇, 修改 {updated} 篇, 删除 {len(removed)} 篇")
+            return self.build
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"生成增量失败: {e}")
+            raise
+        finally:
+            self._close()
+
+    def abort(self):
+        """放弃本次构建"""
+        self._close()
+
+    def _close(self):
+        for file in (self.added, self.updated):
+            if file is not None:
+                file.close()
+        self.added = self.updated = None
+        self.connection.close()
+
+
+class ChangeLog:
+    """读取已生成的增量"""
+
+    def __init__(self, file_manager):
+        self.file_manager = file_manager
+        self.db_path = file_manager.get_state_path('changes.sqlite3')
+
+    def get_changes(self, since: int) -> Dict[str, Any]:
+        """合并构建号 ``since`` 之后的所有增量
+
+        同一篇文章多次变化时只返回最终结果：``since`` 时已存在且仍存在的为修改，
+        之后新增的为新增，``since`` 时已存在但已删除的为删除。
+        ``since`` 早于保留的最早增量时抛出 ``BuildExpiredError``。
+        """
+        connection = _connect(self.db_path)
+        try:
+            oldest, latest = connection.execute("SELECT MIN(build), MAX(build) FROM builds").fetchone()
+        finally:
+            connection.close()
+
+        latest = latest or 0
+        if since > latest:
+            raise ValueError(f"构建号 {since} 不存在，最新构建号为 {latest}")
+        if since < latest and since < oldest - 1:
+            raise BuildExpiredError(f"构建号 {since} 之后的增量已过期，最早可用 {oldest - 1}")
+
+        # article_id -> (since时是否存在, 当前记录，已删除时为None)
+        states = {}
+
+        def apply(article_id, record, existed_before):
+            existed = states[article_id][0] if article_id in states else existed_before
+            states[article_id] = (existed, record)
+
+        for build in range(since + 1, latest + 1):
+            try:
+                with open(os.path.join(self.file_manager.storage_path, CHANGES_DIR, f"{build}.json"),
+                          encoding='utf-8') as file:
+                    delta = json.load(file)
+            except FileNotFoundError:
+                # 读取构建号之后，并发的构建按保留数量删除了这个增量
+                raise BuildExpiredError(f"构建号 {since} 之后的增量已过期")
+            for record in delta['added']:
+                apply(str(record['id']), record, False)
+            for record in delta['updated']:
+                apply(str(record['id']), record, True)
+            for article_id in delta['removed']:
+                apply(article_id, None, True)
+
+        result = {'since': since, 'build': latest, 'added': [], 'updated': [], 'removed': []}
+        for article_id, (existed, record) in states.items():
+            if record is None:
+                if existed:
+                    result['removed'].append(article_id)
+            elif existed:
+                result['updated'].append(record)
+            else:
+                result['added'].append(record)
+        return result
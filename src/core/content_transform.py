@@ -0,0 +1,209 @@
+import logging
+from html import escape
+from html.parser import HTMLParser
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 转换逻辑的版本，修改转换结果时递增，使已缓存的结果失效
+TRANSFORM_VERSION = 1
+
+# 转换模式
+MODE_NONE = 'none'        # 原样输出
+MODE_CLEAN = 'clean'      # 清理HTML：去掉内联样式、微信专用组件
+MODE_TEXT = 'text'        # 纯文本
+MODE_EXCERPT = 'excerpt'  # 纯文本摘要
+MODES = (MODE_NONE, MODE_CLEAN, MODE_TEXT, MODE_EXCERPT)
+
+# 微信专用组件（公众号名片、样式标记等），在微信外无法渲染
+WECHAT_WIDGET_TAGS = frozenset({'mp-common-profile', 'mp-style-type', 'mp-miniprogram', 'mpvoice', 'mpvideosnap'})
+# 不包含可见文本的标签
+INVISIBLE_TAGS = frozenset({'script', 'style', 'template', 'noscript'})
+# 提取文本时换行的块级标签
+BLOCK_TAGS = frozenset({'p', 'div', 'section', 'br', 'li', 'tr', 'blockquote', 'pre',
+                        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figure', 'figcaption', 'hr'})
+
+
+class _HTMLCleaner(HTMLParser):
+    """流式清理HTML：逐个标签处理并直接输出，不构建DOM
+
+    未修改的标签和实体按原文输出，保证清理前后除被移除的部分外完全一致。
+    """
+
+    def __init__(self, strip_styles: bool = True, remove_widgets: bool = True):
+        super().__init__(convert_charrefs=False)
+        self.strip_styles = strip_styles
+        self.remove_tags = (WECHAT_WIDGET_TAGS if remove_widgets else frozenset()) | INVISIBLE_TAGS
+        self.parts = []
+        self._skip_tag = None
+        self._skip_depth = 0
+
+    def _start(self, tag, attrs, closed):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag and not closed:
+                self._skip_depth += 1
+            return
+        if tag in self.remove_tags:
+            if not closed:
+                self._skip_tag = tag
+                self._skip_depth = 1
+            return
+
+        if self.strip_styles and any(name == 'style' for name, _ in attrs):
+            text = ''.join(
+                f' {name}' if value is None else f' {name}="{escape(value, quote=True)}"'
+                for name, value in attrs if name != 'style'
+            )
+            self.parts.append(f"<{tag}{text}{' /' if closed else ''}>")
+        else:
+            self.parts.append(self.get_starttag_text())
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, True)
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self._skip_tag is None:
+            self.parts.append(data)
+
+    def handle_entityref(self, name):
+        if self._skip_tag is None:
+            self.parts.append(f"&{name};")
+
+    def handle_charref(self, name):
+        if self._skip_tag is None:
+            self.parts.append(f"&#{name};")
+
+    def handle_decl(self, decl):
+        self.parts.append(f"<!{decl}>")
+
+    def handle_comment(self, data):
+        # 注释不输出
+        pass
+
+    def result(self) -> str:
+        return ''.join(self.parts)
+
+
+class _TextExtractor(HTMLParser):
+    """流式提取HTML中的可见文本，块级标签处换行"""
+
+    def __init__(self, skip_tags=WECHAT_WIDGET_TAGS | INVISIBLE_TAGS):
+        super().__init__(convert_charrefs=True)
+        self.skip_tags = skip_tags
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skip_tags:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.skip_tags:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def result(self) -> str:
+        lines = (' '.join(line.split()) for line in ''.join(self.parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+def _feed(parser: HTMLParser, html: str) -> str:
+    parser.feed(html)
+    parser.close()
+    return parser.result()
+
+
+def clean_html(html: str, strip_styles: bool = True, remove_widgets: bool = True) -> str:
+    """清理HTML：去掉内联样式、微信专用组件、脚本和注释"""
+    if not html:
+        return ''
+    return _feed(_HTMLCleaner(strip_styles, remove_widgets), html)
+
+
+def html_to_text(html: str) -> str:
+    """提取HTML中的可见文本，段落之间以换行分隔"""
+    if not html:
+        return ''
+    return _feed(_TextExtractor(), html)
+
+
+def make_excerpt(text: str, length: int) -> str:
+    """截取纯文本摘要，超出长度时以省略号结尾"""
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + '…'
+
+
+class ContentTransformer:
+    """文章正文转换
+
+    - ``none``: 原样输出
+    - ``clean``: 去掉内联样式（``strip_styles``）和微信专用组件（``remove_widgets``）
+    - ``text``: 纯文本
+    - ``excerpt``: 纯文本摘要，长度为 ``excerpt_length``
+    """
+
+    def __init__(self, mode: str = MODE_NONE, strip_styles: bool = True, remove_widgets: bool = True,
+                 excerpt_length: int = 200):
+        if mode not in MODES:
+            raise ValueError(f"不支持的content转换模式: {mode}，可选: {', '.join(MODES)}")
+        self.mode = mode
+        self.strip_styles = strip_styles
+        self.remove_widgets = remove_widgets
+        self.excerpt_length = excerpt_length
+
+    @classmethod
+    def from_config(cls, transform_config: Optional[Dict[str, Any]]) -> Optional['ContentTransformer']:
+        """根据 ``data.content_transform`` 配置创建转换器，未配置或模式为none时返回None"""
+        transform_config = transform_config or {}
+        mode = transform_config.get('mode', MODE_NONE)
+        if mode == MODE_NONE:
+            return None
+        return cls(
+            mode=mode,
+            strip_styles=transform_config.get('strip_styles', True),
+            remove_widgets=transform_config.get('remove_widgets', True),
+            excerpt_length=transform_config.get('excerpt_length', 200)
+        )
+
+    @property
+    def version(self) -> str:
+        """转换版本，包含转换逻辑版本和影响结果的配置"""
+        return (f"{TRANSFORM_VERSION}:{self.mode}:{int(self.strip_styles)}:{int(self.remove_widgets)}:"
+                f"{self.excerpt_length}")
+
+    def transform(self, html: str) -> str:
+        """转换一篇文章的content"""
+        if not html or self.mode == MODE_NONE:
+            return html
+        if self.mode == MODE_CLEAN:
+            return clean_html(html, self.strip_styles, self.remove_widgets)
+        text = html_to_text(html)
+        if self.mode == MODE_EXCERPT:
+            return make_excerpt(text, self.excerpt_length)
+        return text
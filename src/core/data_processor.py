@@ -1,44 +1,228 @@
+import os
 import json
 import logging
-from typing import List, Dict, Any
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 
+from src.core.article_record import ArticleRecord, intern_value
+from src.core.content_transform import ContentTransformer
+from src.core.transform_cache import TransformCache, content_hash
+
 logger = logging.getLogger(__name__)
 
+# 并行处理默认参数
+DEFAULT_PARALLEL_CHUNK_SIZE = 32
+DEFAULT_PARALLEL_MIN_ARTICLES = 200
+
+# 两阶段读取时按文章ID批量加载content的函数（``DatabaseManager.get_article_contents``）
+ContentLoader = Callable[[List[str]], Dict[str, Any]]
+# 两阶段读取时每批至少处理的文章数，与 ``get_article_contents`` 每次查询的ID数量一致
+CONTENT_LOAD_BATCH_SIZE = 500
+
+
+def _validate_content(transformer: ContentTransformer, content) -> str:
+    if not content:
+        return ''
+    
+    # 确保content是字符串类型
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    
+    if transformer is not None:
+        content = transformer.transform(content)
+    
+    return content.strip()
+
+
+def _transform_contents(transformer: ContentTransformer, contents: List[str]) -> List[str]:
+    """进程池任务：转换一批content"""
+    return [_validate_content(transformer, content) for content in contents]
+
+
 class DataProcessor:
-    def __init__(self, recent_days: int = 3):
-        """初始化数据处理器"""
+    def __init__(self, recent_days: int = 3, content_transform: Dict[str, Any] = None,
+                 parallel: Dict[str, Any] = None, transform_cache: TransformCache = None,
+                 include_content: bool = True):
+        """初始化数据处理器
+        
+        ``content_transform`` 为 ``data.content_transform`` 配置，未配置时content原样输出。
+        ``parallel`` 为 ``data.parallel`` 配置，启用后content转换分批交给进程池执行。
+        ``transform_cache`` 为已打开的转换缓存，文章未修改时复用上次的转换结果。
+        ``include_content`` 为False时输出的content为空字符串（``data.include_content``）。
+        """
         self.recent_days = recent_days
+        self.include_content = include_content
+        self.content_transformer = ContentTransformer.from_config(content_transform)
+        self.transform_cache = transform_cache
+        
+        parallel = parallel or {}
+        self.parallel_enabled = parallel.get('enabled', False)
+        self.parallel_workers = parallel.get('workers') or os.cpu_count() or 1
+        self.parallel_chunk_size = max(parallel.get('chunk_size', DEFAULT_PARALLEL_CHUNK_SIZE), 1)
+        self.parallel_min_articles = parallel.get('min_articles', DEFAULT_PARALLEL_MIN_ARTICLES)
     
-    def process_data(self, feeds: List[Dict[str, Any]], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def process_data(self, feeds: List[Dict[str, Any]], articles: List[Dict[str, Any]],
+                     content_loader: Optional[ContentLoader] = None) -> List[ArticleRecord]:
         """处理数据，合并feeds和articles信息"""
-        result = []
+        result = list(self.iter_process(feeds, articles, content_loader))
+        
+        logger.info(f"处理完成，共生成 {len(result)} 条记录")
+        return result
+    
+    def iter_process(self, feeds: List[Dict[str, Any]], articles: Iterable[Dict[str, Any]],
+                     content_loader: Optional[ContentLoader] = None) -> Iterator[ArticleRecord]:
+        """逐条合并feeds和articles信息，适用于流式读取的文章
         
-        # 创建feeds字典，方便查找
-        feeds_dict = {feed['id']: feed for feed in feeds}
+        两阶段读取时 ``articles`` 只包含元数据（可带数据库端计算的 ``content_md5``），
+        ``content_loader`` 按批加载content，并且只为需要转换（转换缓存未命中）的文章加载；
+        此时每批至少 ``CONTENT_LOAD_BATCH_SIZE`` 篇，缓存未命中较多时也不会按 ``chunk_size`` 的小批次逐批查询数据库。
+        """
+        # 创建feeds字典，方便查找；公众号字段驻留后由该公众号的所有文章共享
+        feeds_dict = {
+            feed['id']: (intern_value(feed['id']), intern_value(feed.get('mp_name', '')),
+                         intern_value(feed.get('mp_intro', '')))
+            for feed in feeds
+        }
         
-        for article in articles:
-            mp_id = article.get('mp_id')
-            if mp_id and mp_id in feeds_dict:
-                feed = feeds_dict[mp_id]
+        matched = (
+            (article, feeds_dict[article.get('mp_id')])
+            for article in articles
+            if article.get('mp_id') and article.get('mp_id') in feeds_dict
+        )
+        
+        if not self.include_content:
+            for article, feed in matched:
+                yield self._build_record(article, feed, '')
+            return
+        
+        if self.content_transformer is None and content_loader is None:
+            for article, feed in matched:
+                yield self._build_record(article, feed, article.get('content', ''))
+            return
+        
+        chunk_size = self.parallel_chunk_size
+        if content_loader is not None:
+            chunk_size = max(chunk_size, CONTENT_LOAD_BATCH_SIZE)
+        chunks = iter(lambda: list(islice(matched, chunk_size)), [])
+        if self.content_transformer is None:
+            for chunk in chunks:
+                contents = self._get_contents(chunk, range(len(chunk)), content_loader)
+                for (article, feed), content in zip(chunk, contents):
+                    yield self._build_record(article, feed, content)
+            return
+        yield from self._iter_transformed(chunks, content_loader)
+    
+    def _iter_transformed(self, chunks: Iterator[List[Tuple[Dict[str, Any], tuple]]],
+                          content_loader: Optional[ContentLoader] = None) -> Iterator[ArticleRecord]:
+        """分批转换content，按输入顺序输出
+        
+        每批先查询转换缓存，只转换未命中的文章。启用并行处理时，前 ``min_articles`` 篇
+        未命中的文章在当前进程中串行转换（小批量不值得启动进程池），之后的批次交给进程池：
+        只把content发送给子进程，其余字段留在当前进程中合并；同时处理中的批次数量有上限，
+        流式输入时内存占用仍然有界。
+        """
+        executor = None
+        in_flight = deque()
+        max_in_flight = self.parallel_workers * 2
+        transformed = 0
+        try:
+            for chunk in chunks:
+                outputs, hashes = self._lookup_cache(chunk, content_loader)
+                missed = [i for i, output in enumerate(outputs) if output is None]
                 
-                # 构建单个对象
-                item = {
-                    'id': article.get('id', ''),  # 添加articles表的id
-                    'mp_id': mp_id,
-                    'mp_name': feed.get('mp_name', ''),
-                    'mp_intro': feed.get('mp_intro', ''),
-                    'title': article.get('title', ''),
-                    'url': article.get('url', ''),
-                    'content': article.get('content', ''),
-                    'description': article.get('description', ''),
-                    'publish_time': article.get('publish_time', 0)
-                }
+                if executor is None and self.parallel_enabled and transformed >= self.parallel_min_articles:
+                    logger.info(f"并行处理content，进程数 {self.parallel_workers}，每批 {self.parallel_chunk_size} 篇")
+                    # 服务进程中有其他线程（请求、定时任务）持有的锁，fork出的子进程可能死锁，使用spawn启动
+                    executor = ProcessPoolExecutor(max_workers=self.parallel_workers,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+                transformed += len(missed)
                 
-                result.append(item)
+                if executor is None:
+                    results = [self.validate_content(content)
+                               for content in self._get_contents(chunk, missed, content_loader)]
+                    yield from self._merge_chunk(chunk, outputs, hashes, missed, results)
+                    continue
+                
+                future = None
+                if missed:
+                    contents = self._get_contents(chunk, missed, content_loader)
+                    future = executor.submit(_transform_contents, self.content_transformer, contents)
+                in_flight.append((chunk, outputs, hashes, missed, future))
+                if len(in_flight) >= max_in_flight:
+                    yield from self._merge_future(*in_flight.popleft())
+            
+            while in_flight:
+                yield from self._merge_future(*in_flight.popleft())
+        finally:
+            if executor is not None:
+                # 提前结束时取消尚未开始的批次（Python 3.8 的 shutdown 不支持 cancel_futures）
+                for *_, future in in_flight:
+                    if future is not None:
+                        future.cancel()
+                executor.shutdown()
+    
+    @staticmethod
+    def _get_contents(chunk, indices, content_loader: Optional[ContentLoader]) -> List[Any]:
+        """取出指定文章的content，两阶段读取时未读取content的文章一次批量加载"""
+        articles = [chunk[i][0] for i in indices]
+        pending = [article.get('id') for article in articles if 'content' not in article]
+        loaded = content_loader(pending) if pending and content_loader is not None else {}
+        return [article['content'] if 'content' in article else loaded.get(article.get('id'), '')
+                for article in articles]
+    
+    def _lookup_cache(self, chunk, content_loader: Optional[ContentLoader] = None) -> Tuple[List[str], List[str]]:
+        """查询转换缓存，返回各文章的缓存结果（未命中为None）和content哈希
         
-        logger.info(f"处理完成，共生成 {len(result)} 条记录")
-        return result
+        两阶段读取时使用数据库端计算的 ``content_md5``，不需要先加载content；
+        既没有content也没有摘要的文章先加载content再计算哈希。
+        """
+        if self.transform_cache is None:
+            return [None] * len(chunk), None
+        unhashed = [i for i, (article, _) in enumerate(chunk)
+                    if 'content' not in article and 'content_md5' not in article]
+        for i, content in zip(unhashed, self._get_contents(chunk, unhashed, content_loader)):
+            chunk[i][0]['content'] = content
+        hashes = [article['content_md5'] if 'content' not in article else content_hash(article['content'])
+                  for article, _ in chunk]
+        keys = [(str(article.get('id', '')), digest) for (article, _), digest in zip(chunk, hashes)]
+        return self.transform_cache.get_many(keys, self.content_transformer.version), hashes
+    
+    def _merge_future(self, chunk, outputs, hashes, missed, future) -> Iterator[ArticleRecord]:
+        results = future.result() if future is not None else []
+        yield from self._merge_chunk(chunk, outputs, hashes, missed, results)
+    
+    def _merge_chunk(self, chunk, outputs, hashes, missed, results) -> Iterator[ArticleRecord]:
+        for i, result in zip(missed, results):
+            outputs[i] = result
+        if self.transform_cache is not None and missed:
+            self.transform_cache.put_many(
+                [(str(chunk[i][0].get('id', '')), hashes[i], outputs[i]) for i in missed],
+                self.content_transformer.version)
+        for (article, feed), content in zip(chunk, outputs):
+            yield self._build_record(article, feed, content)
+    
+    def _build_record(self, article: Dict[str, Any], feed: tuple, content: str) -> ArticleRecord:
+        """构建单个对象
+        
+        ``feed`` 为驻留后的 ``(mp_id, mp_name, mp_intro)``，mp_id使用公众号的ID对象，
+        不保留数据库每行返回的副本。
+        """
+        mp_id, mp_name, mp_intro = feed
+        return ArticleRecord(
+            article.get('id', ''),  # 添加articles表的id
+            mp_id,
+            mp_name,
+            mp_intro,
+            article.get('title', ''),
+            article.get('url', ''),
+            content,
+            article.get('description', ''),
+            article.get('publish_time', 0)
+        )
     
     def format_timestamp(self, timestamp: int) -> str:
         """格式化时间戳为可读格式"""
@@ -48,14 +232,4 @@ class DataProcessor:
     
     def validate_content(self, content: str) -> str:
         """验证和清理content内容"""
-        if not content:
-            return ''
-        
-        # 确保content是字符串类型
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        
-        # 这里可以添加更多的内容验证逻辑
-        # 例如：移除危险标签、验证HTML格式等
-        
-        return content.strip() 
\ No newline at end of file
+        return _validate_content(self.content_transformer, content)
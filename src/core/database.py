@@ -1,6 +1,10 @@
 import pymysql
 import logging
-from typing import List, Dict, Any
+import os
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Callable, Iterator
 from datetime import datetime, timedelta
 from src.utils.config import load_config
 
@@ -8,6 +12,332 @@ from src.utils.config import load_config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 查询的列，只读取生成输出需要的字段（DataProcessor 使用的字段）
+FEED_COLUMNS = ('id', 'mp_name', 'mp_intro')
+ARTICLE_COLUMNS = ('id', 'mp_id', 'title', 'url', 'content', 'description', 'publish_time')
+ARTICLE_METADATA_COLUMNS = tuple(column for column in ARTICLE_COLUMNS if column != 'content')
+# content的摘要（与 transform_cache.content_hash 一致），在数据库端计算，不传输content
+CONTENT_DIGEST_COLUMN = "MD5(COALESCE(content, '')) AS content_md5"
+
+
+def _article_columns(include_content: bool = True, content_digest: bool = False) -> str:
+    """articles查询的列
+    
+    ``include_content`` 为False时只读取元数据（两阶段读取时content随后通过 ``get_article_contents`` 按需加载）；
+    ``content_digest`` 为True时额外读取content的摘要 ``content_md5``，用于在加载content前查询转换缓存。
+    """
+    columns = list(ARTICLE_COLUMNS if include_content else ARTICLE_METADATA_COLUMNS)
+    if content_digest:
+        columns.append(CONTENT_DIGEST_COLUMN)
+    return ', '.join(columns)
+
+
+class PoolTimeoutError(Exception):
+    """等待可用连接超时"""
+
+
+class _PooledConnection:
+    """连接池中的连接及其元数据"""
+    __slots__ = ('connection', 'created_at', 'last_used')
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """线程安全的数据库连接池
+    
+    - 连接数量在 ``min_size`` 与 ``max_size`` 之间，连接耗尽时最多等待 ``borrow_timeout`` 秒
+    - 借出前对空闲超过 ``health_check_interval`` 秒的连接执行 ping 检查
+    - 空闲超过 ``idle_timeout`` 秒的连接被回收（保留 ``min_size`` 个）
+    - 存活超过 ``max_lifetime`` 秒的连接在归还或借出时被关闭重建
+    """
+    
+    def __init__(self, connect_func: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 borrow_timeout: float = 10.0, idle_timeout: float = 300.0,
+                 max_lifetime: float = 3600.0, health_check: bool = True,
+                 health_check_interval: float = 5.0):
+        if max_size < 1:
+            raise ValueError("max_size 必须大于0")
+        self._connect_func = connect_func
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.borrow_timeout = borrow_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        
+        self._cond = threading.Condition()
+        self._idle = deque()       # 空闲连接，尾部为最近归还的连接
+        self._in_use = {}          # id(connection) -> _PooledConnection
+        self._size = 0             # 已创建及正在创建的连接总数
+        self._closed = False
+        self.pid = os.getpid()
+        
+        # 统计信息
+        self._created = 0
+        self._closed_count = 0
+        self._borrows = 0
+        self._timeouts = 0
+        self._health_check_failures = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        
+        self._fill_min_size()
+    
+    def _fill_min_size(self):
+        """预先创建最小数量的连接，失败时仅记录日志"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._create()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                logger.warning(f"连接池预创建连接失败: {e}")
+                return
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+    
+    def _create(self) -> _PooledConnection:
+        connection = self._connect_func()
+        with self._cond:
+            self._created += 1
+        logger.info("数据库连接成功")
+        return _PooledConnection(connection)
+    
+    def _close_entry(self, entry: _PooledConnection):
+        """关闭连接（调用方需已将其从计数中移除）"""
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._closed_count += 1
+    
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        return bool(self.max_lifetime) and now - entry.created_at >= self.max_lifetime
+    
+    def _evict_idle_locked(self, now: float) -> List[_PooledConnection]:
+        """取出需要回收的空闲连接（持有锁时调用）"""
+        evicted = []
+        kept = deque()
+        while self._idle:
+            entry = self._idle.popleft()
+            idle_too_long = (self.idle_timeout and now - entry.last_used >= self.idle_timeout
+                             and self._size - len(evicted) > self.min_size)
+            if idle_too_long or self._expired(entry, now):
+                evicted.append(entry)
+            else:
+                kept.append(entry)
+        self._idle = kept
+        self._size -= len(evicted)
+        if evicted:
+            self._cond.notify(len(evicted))
+        return evicted
+    
+    def _is_healthy(self, entry: _PooledConnection, now: float) -> bool:
+        if not self.health_check or now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.connection.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"连接健康检查失败，丢弃连接: {e}")
+            with self._cond:
+                self._health_check_failures += 1
+            return False
+    
+    def acquire(self):
+        """借出一个连接"""
+        start = time.monotonic()
+        deadline = start + self.borrow_timeout
+        while True:
+            entry = None
+            evicted = []
+            try:
+                with self._cond:
+                    while True:
+                        if self._closed:
+                            raise RuntimeError("连接池已关闭")
+                        now = time.monotonic()
+                        evicted.extend(self._evict_idle_locked(now))
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            break
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeoutError(
+                                f"等待数据库连接超时({self.borrow_timeout}秒)，连接池已满({self.max_size})")
+                        self._cond.wait(remaining)
+            finally:
+                for stale in evicted:
+                    self._close_entry(stale)
+            
+            if entry is None:
+                try:
+                    entry = self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(entry, time.monotonic()):
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                self._close_entry(entry)
+                continue
+            
+            waited = time.monotonic() - start
+            with self._cond:
+                self._in_use[id(entry.connection)] = entry
+                self._borrows += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+            return entry.connection
+    
+    def release(self, connection, discard: bool = False):
+        """归还连接，``discard`` 为True时直接关闭"""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            logger.warning("归还的连接不属于该连接池，直接关闭")
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+        
+        if not discard:
+            try:
+                # 结束隐式事务，避免下一个借用者读到旧快照
+                connection.rollback()
+            except Exception as e:
+                logger.warning(f"重置连接状态失败，丢弃连接: {e}")
+                discard = True
+        
+        now = time.monotonic()
+        with self._cond:
+            if discard or self._closed or self._expired(entry, now):
+                self._size -= 1
+                self._cond.notify()
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._close_entry(entry)
+    
+    def close(self):
+        """关闭连接池及所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
+    
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计信息"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'borrowed': len(self._in_use),
+                'idle': len(self._idle),
+                'total_borrows': self._borrows,
+                'total_created': self._created,
+                'total_closed': self._closed_count,
+                'timeouts': self._timeouts,
+                'health_check_failures': self._health_check_failures,
+                'wait_time_total': round(self._wait_time_total, 6),
+                'wait_time_avg': round(self._wait_time_total / self._borrows, 6) if self._borrows else 0.0,
+                'wait_time_max': round(self._wait_time_max, 6),
+            }
+
+
+# 进程级连接池，按数据库地址区分
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _create_connection(db_config: dict):
+    """创建一个新的数据库连接"""
+    return pymysql.connect(
+        host=db_config['host'],
+        port=db_config['port'],
+        user=db_config['user'],
+        password=db_config['password'],
+        database=db_config['database'],
+        charset=db_config['charset'],
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def get_connection_pool(db_config: dict) -> ConnectionPool:
+    """获取（必要时创建）当前进程的连接池
+    
+    fork出的子进程不会复用父进程的连接，而是重新创建连接池。
+    """
+    key = (db_config['host'], db_config['port'], db_config['user'], db_config['database'])
+    pid = os.getpid()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.pid != pid:
+            pool_config = db_config.get('pool') or {}
+            pool = ConnectionPool(
+                lambda: _create_connection(db_config),
+                min_size=pool_config.get('min_size', 1),
+                max_size=pool_config.get('max_size', 10),
+                borrow_timeout=pool_config.get('borrow_timeout', 10),
+                idle_timeout=pool_config.get('idle_timeout', 300),
+                max_lifetime=pool_config.get('max_lifetime', 3600),
+                health_check=pool_config.get('health_check', True),
+                health_check_interval=pool_config.get('health_check_interval', 5),
+            )
+            _pools[key] = pool
+            logger.info(f"创建数据库连接池: {key[0]}:{key[1]}/{key[3]} "
+                        f"(min={pool.min_size}, max={pool.max_size})")
+        return pool
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """获取当前进程所有连接池的统计信息
+    
+    按创建顺序以 ``pool-1``、``pool-2`` 命名，不暴露数据库地址。
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if pool.pid == pid]
+        return {f"pool-{index}": pool.stats() for index, pool in enumerate(pools, 1)}
+
+
+def close_all_pools():
+    """关闭当前进程的所有连接池"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        if pool.pid == os.getpid():
+            pool.close()
+
+
 class DatabaseManager:
     def __init__(self, config_path: str = None):
         """初始化数据库管理器"""
@@ -16,6 +346,7 @@ class DatabaseManager:
         else:
             self.config = self._load_config(config_path)
         self.connection = None
+        self._pool = None
     
     def _load_config(self, config_path: str) -> dict:
         """加载配置文件"""
@@ -28,34 +359,36 @@ class DatabaseManager:
             raise
     
     def connect(self):
-        """连接数据库"""
+        """连接数据库（启用连接池时从连接池借出连接）"""
         try:
             db_config = self.config['database']
-            self.connection = pymysql.connect(
-                host=db_config['host'],
-                port=db_config['port'],
-                user=db_config['user'],
-                password=db_config['password'],
-                database=db_config['database'],
-                charset=db_config['charset'],
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            logger.info("数据库连接成功")
+            pool_config = db_config.get('pool') or {}
+            if pool_config.get('enabled', True):
+                self._pool = get_connection_pool(db_config)
+                self.connection = self._pool.acquire()
+            else:
+                self.connection = _create_connection(db_config)
+                logger.info("数据库连接成功")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             raise
     
-    def disconnect(self):
-        """断开数据库连接"""
+    def disconnect(self, discard: bool = False):
+        """断开数据库连接（启用连接池时归还连接）"""
         if self.connection:
-            self.connection.close()
-            logger.info("数据库连接已断开")
+            if self._pool is not None:
+                self._pool.release(self.connection, discard=discard)
+                self._pool = None
+            else:
+                self.connection.close()
+                logger.info("数据库连接已断开")
+            self.connection = None
     
     def get_all_feeds(self) -> List[Dict[str, Any]]:
         """获取所有微信公众号信息"""
         try:
             with self.connection.cursor() as cursor:
-                sql = "SELECT * FROM feeds WHERE status = 1"
+                sql = f"SELECT {', '.join(FEED_COLUMNS)} FROM feeds WHERE status = 1 ORDER BY id"
                 cursor.execute(sql)
                 return cursor.fetchall()
         except Exception as e:
@@ -74,8 +407,8 @@ class DatabaseManager:
             end_timestamp = int(end_time.timestamp())
             
             with self.connection.cursor() as cursor:
-                sql = """
-                SELECT * FROM articles 
+                sql = f"""
+                SELECT {_article_columns()} FROM articles 
                 WHERE mp_id = %s 
                 AND publish_time >= %s 
                 AND publish_time <= %s 
@@ -88,6 +421,163 @@ class DatabaseManager:
             logger.error(f"获取articles数据失败: {e}")
             raise
     
+    def get_recent_articles_bulk(self, mp_ids: List[str], recent_days: int, chunk_size: int = 500,
+                                 include_content: bool = True, content_digest: bool = False) -> List[Dict[str, Any]]:
+        """批量获取多个公众号最近几天的文章
+
+        使用 ``WHERE mp_id IN (...)`` 一次性查询，避免逐个公众号查询的N+1问题。
+        mp_id列表过长时按 ``chunk_size`` 分批查询。返回结果按 ``mp_ids`` 的顺序分组，
+        组内按发布时间倒序，与逐个调用 ``get_recent_articles`` 的结果顺序一致。
+        ``include_content``/``content_digest`` 见 ``_article_columns``。
+        """
+        if not mp_ids:
+            return []
+        
+        try:
+            # 计算时间范围
+            end_time = datetime.now()
+            start_time = end_time - timedelta(days=recent_days)
+            
+            # 转换为时间戳
+            start_timestamp = int(start_time.timestamp())
+            end_timestamp = int(end_time.timestamp())
+            
+            # 去重并保持顺序
+            mp_ids = list(dict.fromkeys(mp_ids))
+            articles = []
+            with self.connection.cursor() as cursor:
+                for i in range(0, len(mp_ids), chunk_size):
+                    chunk = mp_ids[i:i + chunk_size]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    sql = f"""
+                    SELECT {_article_columns(include_content, content_digest)} FROM articles 
+                    WHERE mp_id IN ({placeholders}) 
+                    AND publish_time >= %s 
+                    AND publish_time <= %s 
+                    AND status = 1
+                    ORDER BY publish_time DESC
+                    """
+                    cursor.execute(sql, (*chunk, start_timestamp, end_timestamp))
+                    articles.extend(cursor.fetchall())
+            
+            # 按公众号顺序分组（稳定排序，保持组内发布时间倒序）
+            order = {mp_id: index for index, mp_id in enumerate(mp_ids)}
+            articles.sort(key=lambda article: order.get(article.get('mp_id'), len(order)))
+            return articles
+        except Exception as e:
+            logger.error(f"批量获取articles数据失败: {e}")
+            raise
+    
+    def iter_recent_articles_bulk(self, mp_ids: List[str], recent_days: int, chunk_size: int = 500,
+                                  include_content: bool = True) -> Iterator[Dict[str, Any]]:
+        """以流式方式批量获取多个公众号最近几天的文章
+
+        使用服务端游标（``SSDictCursor``）逐行读取，内存占用与单行文章大小相关，
+        而与时间窗口内的文章总数无关。结果按 mp_id 排序分组，组内按发布时间倒序，
+        与 ``get_all_feeds`` 返回的公众号顺序一致。``include_content`` 为False时不读取content。
+
+        注意：迭代过程中该连接不能执行其他查询。
+        """
+        if not mp_ids:
+            return
+        
+        # 计算时间范围
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=recent_days)
+        
+        # 转换为时间戳
+        start_timestamp = int(start_time.timestamp())
+        end_timestamp = int(end_time.timestamp())
+        
+        mp_ids = sorted(set(mp_ids))
+        for i in range(0, len(mp_ids), chunk_size):
+            chunk = mp_ids[i:i + chunk_size]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            sql = f"""
+            SELECT {_article_columns(include_content)} FROM articles 
+            WHERE mp_id IN ({placeholders}) 
+            AND publish_time >= %s 
+            AND publish_time <= %s 
+            AND status = 1
+            ORDER BY mp_id, publish_time DESC
+            """
+            cursor = self.connection.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(sql, (*chunk, start_timestamp, end_timestamp))
+                for row in cursor:
+                    yield row
+            except Exception as e:
+                logger.error(f"流式获取articles数据失败: {e}")
+                raise
+            finally:
+                cursor.close()
+    
+    def iter_articles_since(self, mp_ids: List[str], watermarks: Dict[str, tuple],
+                            start_timestamp: int, end_timestamp: int,
+                            chunk_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """以流式方式获取各公众号水位线之后的新文章
+
+        ``watermarks`` 为 ``{mp_id: (publish_time, id)}``，只返回 ``(publish_time, id)``
+        大于水位线的文章；没有水位线的公众号返回整个时间范围内的文章。
+        """
+        mp_ids = sorted(set(mp_ids))
+        for i in range(0, len(mp_ids), chunk_size):
+            chunk = mp_ids[i:i + chunk_size]
+            conditions = []
+            params = [start_timestamp, end_timestamp]
+            fresh = []
+            for mp_id in chunk:
+                if mp_id in watermarks:
+                    publish_time, article_id = watermarks[mp_id]
+                    conditions.append("(mp_id = %s AND (publish_time > %s OR (publish_time = %s AND id > %s)))")
+                    params.extend([mp_id, publish_time, publish_time, article_id])
+                else:
+                    fresh.append(mp_id)
+            if fresh:
+                conditions.append(f"mp_id IN ({', '.join(['%s'] * len(fresh))})")
+                params.extend(fresh)
+            sql = f"""
+            SELECT {_article_columns()} FROM articles 
+            WHERE publish_time >= %s 
+            AND publish_time <= %s 
+            AND status = 1
+            AND ({' OR '.join(conditions)})
+            ORDER BY mp_id, publish_time DESC
+            """
+            cursor = self.connection.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(sql, params)
+                for row in cursor:
+                    yield row
+            except Exception as e:
+                logger.error(f"增量获取articles数据失败: {e}")
+                raise
+            finally:
+                cursor.close()
+    
+    def get_article_contents(self, article_ids: List[str], chunk_size: int = 500) -> Dict[str, Any]:
+        """按文章ID批量读取content，返回 ``{文章ID: content}``
+        
+        两阶段读取的第二阶段：先读取元数据，只为需要content的文章使用 ``WHERE id IN (...)`` 分批加载。
+        """
+        contents = {}
+        if not article_ids:
+            return contents
+        
+        try:
+            article_ids = list(dict.fromkeys(article_ids))
+            with self.connection.cursor() as cursor:
+                for i in range(0, len(article_ids), chunk_size):
+                    chunk = article_ids[i:i + chunk_size]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f"SELECT id, content FROM articles WHERE id IN ({placeholders})", chunk)
+                    for row in cursor.fetchall():
+                        contents[row['id']] = row['content']
+            return contents
+        except Exception as e:
+            logger.error(f"获取文章content失败: {e}")
+            raise
+    
     def __enter__(self):
         """上下文管理器入口"""
         self.connect()
@@ -95,4 +585,7 @@ class DatabaseManager:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器出口"""
-        self.disconnect() 
\ No newline at end of file
+        # 连接层异常时不再复用该连接
+        broken = exc_type is not None and issubclass(
+            exc_type, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+        self.disconnect(discard=broken) 
\ No newline at end of file
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import logging
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from email.utils import formatdate
+from typing import Dict, Any, Optional
+from xml.sax.saxutils import XMLGenerator
+
+logger = logging.getLogger(__name__)
+
+# 订阅文件目录（相对存储目录）
+FEED_DIR = 'feeds'
+# 订阅格式及MIME类型
+FEED_FORMATS = {
+    'atom': 'application/atom+xml',
+    'rss': 'application/rss+xml',
+}
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+CONTENT_NS = 'http://purl.org/rss/1.0/modules/content/'
+DC_NS = 'http://purl.org/dc/elements/1.1/'
+
+DEFAULT_TITLE = '微信公众号合并订阅'
+DEFAULT_LINK = 'https://mp.weixin.qq.com'
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f￾￿]')
+
+
+def get_feed_filename(feed_format: str, mp_id: str = None) -> str:
+    """订阅文件相对存储目录的路径，mp_id中的特殊字符替换为下划线"""
+    name = 'all' if mp_id is None else 'mp_' + re.sub(r'[^A-Za-z0-9_-]', '_', str(mp_id))
+    return f"{FEED_DIR}/{name}.{feed_format}.xml"
+
+
+def _clean(text) -> str:
+    return _INVALID_XML_CHARS.sub('', str(text or ''))
+
+
+def _rfc3339(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp or 0, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _rfc822(timestamp: int) -> str:
+    return formatdate(timestamp or 0, usegmt=True)
+
+
+class _FeedDocument:
+    """流式写入一个订阅文件（XMLGenerator逐个元素输出，不构建DOM）
+
+    文件级的更新时间取所有文章中最新的发布时间，文章写完后才能确定，因此写在条目之后
+    （Atom和RSS 2.0都不限制子元素顺序）。相同的数据生成相同的文件，发布时可以跳过未变化的内容。
+    """
+
+    def __init__(self, file_manager, feed_format: str, mp_id: str, title: str, link: str,
+                 include_content: bool):
+        self.feed_format = feed_format
+        self.filename = get_feed_filename(feed_format, mp_id)
+        self.include_content = include_content
+        self.updated = 0
+        self.count = 0
+        os.makedirs(os.path.join(file_manager.storage_path, FEED_DIR), exist_ok=True)
+        self._stack = ExitStack()
+        self._file = self._stack.enter_context(file_manager.open_for_publish(self.filename, skip_unchanged=True))
+        self._xml = XMLGenerator(self._file, encoding='utf-8', short_empty_elements=True)
+        self._xml.startDocument()
+
+        feed_id = 'urn:wx-mp-rss-merge:' + ('all' if mp_id is None else f"mp:{mp_id}")
+        if feed_format == 'atom':
+            self._xml.startElement('feed', {'xmlns': ATOM_NS})
+            self._element('title', title)
+            self._element('id', feed_id)
+            self._xml.startElement('link', {'href': link})
+            self._xml.endElement('link')
+        else:
+            self._xml.startElement('rss', {'version': '2.0', 'xmlns:content': CONTENT_NS, 'xmlns:dc': DC_NS})
+            self._xml.startElement('channel', {})
+            self._element('title', title)
+            self._element('link', link)
+            self._element('description', title)
+
+    def _element(self, name: str, text, attrs: Dict[str, str] = None):
+        self._xml.startElement(name, attrs or {})
+        self._xml.characters(_clean(text))
+        self._xml.endElement(name)
+
+    def add(self, record: Dict[str, Any]):
+        """写入一篇文章"""
+        publish_time = record.get('publish_time') or 0
+        self.updated = max(self.updated, publish_time)
+        self.count += 1
+        if self.feed_format == 'atom':
+            self._xml.startElement('entry', {})
+            self._element('title', record.get('title'))
+            self._element('id', f"urn:wx-mp-rss-merge:article:{record.get('id')}")
+            self._xml.startElement('link', {'href': _clean(record.get('url'))})
+            self._xml.endElement('link')
+            self._element('published', _rfc3339(publish_time))
+            self._element('updated', _rfc3339(publish_time))
+            self._xml.startElement('author', {})
+            self._element('name', record.get('mp_name') or record.get('mp_id'))
+            self._xml.endElement('author')
+            if record.get('description'):
+                self._element('summary', record.get('description'))
+            if self.include_content and record.get('content'):
+                self._element('content', record.get('content'), {'type': 'html'})
+            self._xml.endElement('entry')
+        else:
+            self._xml.startElement('item', {})
+            self._element('title', record.get('title'))
+            self._element('link', record.get('url'))
+            self._element('guid', f"urn:wx-mp-rss-merge:article:{record.get('id')}", {'isPermaLink': 'false'})
+            self._element('pubDate', _rfc822(publish_time))
+            self._element('dc:creator', record.get('mp_name') or record.get('mp_id'))
+            self._element('description', record.get('description'))
+            if self.include_content and record.get('content'):
+                self._element('content:encoded', record.get('content'))
+            self._xml.endElement('item')
+
+    def close(self) -> bool:
+        """写完文件尾并发布，返回内容是否变化"""
+        if self.feed_format == 'atom':
+            self._element('updated', _rfc3339(self.updated))
+            self._xml.endElement('feed')
+        else:
+            self._element('lastBuildDate', _rfc822(self.updated))
+            self._xml.endElement('channel')
+            self._xml.endElement('rss')
+        self._xml.endDocument()
+        self._stack.close()
+        return self._file.changed
+
+    def abort(self):
+        """放弃发布"""
+        self._stack.__exit__(_Aborted, _Aborted(), None)
+
+
+class _Aborted(Exception):
+    """放弃发布"""
+
+
+class FeedWriter:
+    """随发布过程生成Atom/RSS 2.0订阅文件
+
+    全部文章的订阅文件为 ``feeds/all.<format>.xml``；启用 ``per_mp`` 时每个公众号另有
+    ``feeds/mp_<mp_id>.<format>.xml``（要求记录按公众号分组连续到达）。
+    数据版本（result.json的内容哈希）与上次生成订阅时相同时不需要生成（``is_current``）；
+    订阅文件在收到第一条记录（或提交）时才打开，跳过生成时不写入任何文件。
+    """
+
+    def __init__(self, file_manager, feeds_config: Dict[str, Any] = None):
+        feeds_config = feeds_config or {}
+        self.file_manager = file_manager
+        self.formats = [name for name in feeds_config.get('formats', list(FEED_FORMATS)) if name in FEED_FORMATS]
+        self.title = feeds_config.get('title', DEFAULT_TITLE)
+        self.link = feeds_config.get('link', DEFAULT_LINK)
+        self.per_mp = feeds_config.get('per_mp', False)
+        self.include_content = feeds_config.get('include_content', True)
+        self.state_path = file_manager.get_state_path('feeds.json')
+        # 影响生成结果的配置，变化时即使数据未变化也重新生成
+        self.signature = [self.formats, self.title, self.link, self.per_mp, self.include_content]
+
+        self._documents = None
+        self._mp_documents = []
+        self._mp_id = None
+        self.mp_ids = []
+
+    def _open(self, feed_format: str, mp_id: Optional[str], title: str) -> _FeedDocument:
+        return _FeedDocument(self.file_manager, feed_format, mp_id, title, self.link, self.include_content)
+
+    def _open_documents(self):
+        if self._documents is None:
+            self._documents = [self._open(feed_format, None, self.title) for feed_format in self.formats]
+    
+    def add(self, record: Dict[str, Any]):
+        """写入一篇文章"""
+        self._open_documents()
+        for document in self._documents:
+            document.add(record)
+        if not self.per_mp:
+            return
+
+        mp_id = record.get('mp_id')
+        if mp_id != self._mp_id:
+            self._close_mp_documents()
+            if mp_id in self.mp_ids:
+                raise ValueError(f"按公众号生成订阅要求记录按公众号分组，公众号 {mp_id} 的文章不连续")
+            self._mp_id = mp_id
+            self.mp_ids.append(mp_id)
+            title = f"{record.get('mp_name') or mp_id} - {self.title}"
+            self._mp_documents = [self._open(feed_format, mp_id, title) for feed_format in self.formats]
+        for document in self._mp_documents:
+            document.add(record)
+
+    def _close_mp_documents(self):
+        for document in self._mp_documents:
+            document.close()
+        self._mp_documents = []
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def is_current(self, etag: str) -> bool:
+        """已发布的订阅文件是否对应指定版本的数据和当前配置"""
+        state = self._load_state()
+        return state.get('etag') == etag and state.get('signature') == self.signature and all(
+            os.path.exists(os.path.join(self.file_manager.storage_path, get_feed_filename(feed_format)))
+            for feed_format in self.formats)
+
+    def commit(self, etag: str):
+        """发布订阅文件，删除已停用公众号和格式的文件"""
+        self._open_documents()
+        self._close_mp_documents()
+        changed = [document.close() for document in self._documents]
+
+        published = {get_feed_filename(feed_format) for feed_format in self.formats}
+        if self.per_mp:
+            published.update(get_feed_filename(feed_format, mp_id)
+                             for feed_format in self.formats for mp_id in self.mp_ids)
+        feed_dir = os.path.join(self.file_manager.storage_path, FEED_DIR)
+        for name in os.listdir(feed_dir):
+            filename = f"{FEED_DIR}/{name}"
+            if name.endswith('.xml') and filename not in published:
+                self.file_manager.remove_published_file(filename)
+
+        with self.file_manager.atomic_open(os.path.relpath(self.state_path, self.file_manager.storage_path)) as file:
+            json.dump({'etag': etag, 'signature': self.signature}, file)
+        logger.info(f"订阅文件生成完成: {', '.join(self.formats)}，"
+                    f"{'内容已更新' if any(changed) else '内容未变化'}")
+
+    def abort(self):
+        """放弃生成，已发布的订阅文件保持不变"""
+        for document in self._mp_documents + (self._documents or []):
+            document.abort()
+        self._mp_documents = []
+        self._documents = []
+
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Optional
+
+from src.utils.file_manager import FileManager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status, started_at);
+"""
+
+
+class Job:
+    """后台任务"""
+    
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.shareable = True
+        self._done = threading.Event()
+    
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None):
+        """等待任务完成并返回结果，任务失败时重新抛出异常"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"等待任务超时: {self.id}")
+        if self.status == FAILED:
+            raise self.error
+        return self.result
+    
+    @classmethod
+    def _from_row(cls, row) -> 'Job':
+        """从状态库的一行恢复任务（其他进程执行的任务，不能等待）"""
+        job = cls(row[1])
+        job.id, job.status, job.created_at, job.started_at, job.finished_at = row[0], row[2], row[3], row[4], row[5]
+        job.result = json.loads(row[6]) if row[6] is not None else None
+        job.error = RuntimeError(row[7]) if row[7] is not None else None
+        if job.status in (SUCCEEDED, FAILED):
+            job._done.set()
+        return job
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = str(self.error)
+        return data
+
+
+class JobManager:
+    """后台任务管理器
+    
+    任务在线程池中执行。相同 ``key`` 的任务在执行期间只会运行一次：
+    后续提交直接返回正在进行的任务，所有等待方共享同一次执行的结果（single-flight）。
+    ``queue`` 提交的任务不合并，排在进行中的同key任务之后执行。
+    已完成的任务最多保留 ``retention`` 个，供 ``/jobs/<id>`` 查询。
+    
+    指定 ``state_path`` 时用于多进程部署：
+    
+    - 任务状态同时保存在SQLite状态库中，任意进程都能查询其他进程提交的任务
+    - 相同 ``key`` 的任务通过文件锁（``<state_path>.<key>.lock``）在进程间依次执行；
+      等待期间其他进程开始并完成的同key任务，其数据不早于本任务提交时，直接共享其结果
+    """
+    
+    def __init__(self, max_workers: int = 2, retention: int = 100, state_path: str = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()     # job_id -> Job，按提交顺序
+        self._inflight = {}            # key -> Job，同key最近提交的未完成任务
+        self._key_locks = {}           # key -> 同key任务依次执行的锁
+        self.retention = retention
+        self.state_path = state_path
+        self.pid = os.getpid()
+        if state_path:
+            connection = self._connect()
+            try:
+                connection.executescript(SCHEMA)
+            finally:
+                connection.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.state_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+    
+    def _save(self, job: Job):
+        """保存任务状态到状态库"""
+        if not self.state_path:
+            return
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO jobs (id, key, status, created_at, started_at, finished_at, result, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, job.key, job.status, job.created_at, job.started_at, job.finished_at,
+                     json.dumps(job.result, ensure_ascii=False) if job.status == SUCCEEDED else None,
+                     str(job.error) if job.status == FAILED else None))
+                if job.status in (SUCCEEDED, FAILED):
+                    connection.execute(
+                        "DELETE FROM jobs WHERE status IN (?, ?) AND id NOT IN "
+                        "(SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY finished_at DESC LIMIT ?)",
+                        (SUCCEEDED, FAILED, SUCCEEDED, FAILED, self.retention))
+        finally:
+            connection.close()
+    
+    def _find_shared(self, job: Job) -> Optional[Job]:
+        """查找在本任务提交之后开始、已经成功完成的同key任务"""
+        if not self.state_path:
+            return None
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT id, key, status, created_at, started_at, finished_at, result, error FROM jobs "
+                "WHERE key = ? AND status = ? AND started_at >= ? ORDER BY started_at DESC LIMIT 1",
+                (job.key, SUCCEEDED, job.created_at)).fetchone()
+        finally:
+            connection.close()
+        return Job._from_row(row) if row else None
+    
+    def _lock_path(self, key: str) -> Optional[str]:
+        if not self.state_path or fcntl is None:
+            return None
+        return f"{self.state_path}.{key}.lock"
+    
+    @contextmanager
+    def _exclusive(self, key: str):
+        """在进程内和进程间独占执行指定key的任务"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            lock_path = self._lock_path(key)
+            if lock_path is None:
+                yield
+                return
+            with open(lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def submit(self, key: str, func: Callable, *args, **kwargs) -> Job:
+        """提交任务，相同key的任务正在执行时返回该任务"""
+        return self._submit(key, func, args, kwargs, coalesce=True)
+    
+    def queue(self, key: str, func: Callable, *args, **kwargs) -> Job:
+        """提交任务，排在相同key的进行中任务之后执行，不与之合并
+        
+        用于结果不能由普通任务代替的请求（例如全量生成）；之后提交的普通任务合并到本任务。
+        """
+        return self._submit(key, func, args, kwargs, coalesce=False)
+    
+    def _submit(self, key: str, func: Callable, args, kwargs, coalesce: bool) -> Job:
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and coalesce:
+                logger.info(f"合并到进行中的任务: {key} -> {job.id}")
+                return job
+            previous = job
+            job = Job(key)
+            job.shareable = coalesce
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._trim()
+        try:
+            self._save(job)
+            self._executor.submit(self._run, job, func, args, kwargs)
+        except Exception:
+            with self._lock:
+                if previous is not None and not previous.done:
+                    self._inflight[key] = previous
+                else:
+                    del self._inflight[key]
+                del self._jobs[job.id]
+            raise
+        return job
+    
+    def _run(self, job: Job, func: Callable, args, kwargs):
+        try:
+            with self._exclusive(job.key):
+                shared = self._find_shared(job) if job.shareable else None
+                if shared is not None:
+                    logger.info(f"合并到其他进程已完成的任务: {job.key} -> {shared.id}")
+                    job.started_at = shared.started_at
+                    job.result = shared.result
+                    job.status = SUCCEEDED
+                else:
+                    self._execute(job, func, args, kwargs)
+                # 释放锁之前保存结果，等待中的其他进程才能共享
+                job.finished_at = time.time()
+                self._save(job)
+        except Exception as e:
+            # 获取文件锁或读写状态库失败
+            logger.error(f"任务执行失败: {job.key} ({job.id}): {e}")
+            if job.status == PENDING:
+                job.error = e
+                job.status = FAILED
+        finally:
+            if job.finished_at is None:
+                job.finished_at = time.time()
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+            job._done.set()
+    
+    def _execute(self, job: Job, func: Callable, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            self._save(job)
+            job.result = func(*args, **kwargs)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"任务执行失败: {job.key} ({job.id}): {e}")
+            job.error = e
+            job.status = FAILED
+    
+    def _trim(self):
+        """清理超出保留数量的已完成任务（持有锁时调用）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.retention)]:
+            del self._jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """查询任务，当前进程没有时查询状态库"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or not self.state_path:
+            return job
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT id, key, status, created_at, started_at, finished_at, result, error FROM jobs WHERE id = ?",
+                (job_id,)).fetchone()
+        finally:
+            connection.close()
+        return Job._from_row(row) if row else None
+    
+    def is_running(self, key: str) -> bool:
+        """指定key的任务是否正在执行（包括其他进程中的任务）"""
+        with self._lock:
+            if key in self._inflight:
+                return True
+        lock_path = self._lock_path(key)
+        if lock_path is None:
+            return False
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            return False
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# 进程级任务管理器
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager(config: dict = None) -> JobManager:
+    """获取（必要时创建）当前进程的任务管理器，fork出的子进程会重新创建
+    
+    任务状态保存在存储目录的 ``.state/jobs.sqlite3`` 中，由所有工作进程共享。
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None or _job_manager.pid != os.getpid():
+            jobs_config = (config or {}).get('jobs') or {}
+            _job_manager = JobManager(
+                max_workers=jobs_config.get('max_workers', 2),
+                retention=jobs_config.get('retention', 100),
+                state_path=FileManager().get_state_path('jobs.sqlite3'),
+            )
+        return _job_manager
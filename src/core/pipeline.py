@@ -0,0 +1,210 @@
+import os
+import json
+import logging
+from contextlib import nullcontext
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+
+from src.core.database import DatabaseManager
+from src.core.data_processor import DataProcessor
+from src.core.article_store import ArticleStore, DEFAULT_FULL_SYNC_INTERVAL
+from src.core.article_index import ArticleIndexBuilder
+from src.core.search_index import SearchIndexBuilder
+from src.core.change_log import ChangeLogBuilder, DEFAULT_RETENTION
+from src.core.feeds import FeedWriter
+from src.core.transform_cache import TransformCache, DEFAULT_MAX_SIZE_MB
+from src.utils.file_manager import FileManager
+
+logger = logging.getLogger(__name__)
+
+
+def get_transform_cache_path(file_manager: FileManager) -> str:
+    """content转换缓存文件路径"""
+    return file_manager.get_state_path('transform_cache.sqlite3')
+
+
+def _open_transform_cache(config: dict, file_manager: FileManager):
+    """启用content转换和转换缓存时返回转换缓存，否则返回空的上下文"""
+    data_config = config['data']
+    cache_config = data_config.get('transform_cache', {})
+    transform_mode = (data_config.get('content_transform') or {}).get('mode', 'none')
+    if transform_mode == 'none' or not cache_config.get('enabled', False):
+        return nullcontext()
+    return TransformCache(get_transform_cache_path(file_manager),
+                          cache_config.get('max_size_mb', DEFAULT_MAX_SIZE_MB))
+
+
+def _get_sinks(config: dict, file_manager: FileManager) -> list:
+    """根据配置创建随发布过程同步写入的其他格式文件和附属索引"""
+    sinks = [file_manager.open_format_writer(output_format) for output_format in file_manager.formats]
+    if file_manager.split_output_enabled:
+        sinks.append(file_manager.open_split_output())
+    if file_manager.shards_enabled:
+        sinks.append(file_manager.open_shard_writer())
+    return sinks
+
+
+def _get_deferred_sinks(config: dict, file_manager: FileManager) -> list:
+    """根据配置创建发布完成后才接收记录的附属文件
+    
+    这些附属文件能够判断自身是否对应当前数据版本（``is_current``），数据未变化时不生成，
+    因此不随写入过程接收记录，而是在确定需要生成后从已发布文件回放记录。
+    """
+    sinks = []
+    if config.get('search', {}).get('enabled', False):
+        sinks.append(SearchIndexBuilder(file_manager.get_state_path('search.sqlite3')))
+    changes_config = config.get('changes', {})
+    if changes_config.get('enabled', False):
+        sinks.append(ChangeLogBuilder(file_manager, changes_config.get('retention', DEFAULT_RETENTION)))
+    feeds_config = config.get('feeds', {})
+    if feeds_config.get('enabled', False):
+        sinks.append(FeedWriter(file_manager, feeds_config))
+    return sinks
+
+
+def _iter_published(file_manager: FileManager, filename: str, refs: List[Tuple[int, int]]) -> Iterator[Dict[str, Any]]:
+    """按写入时记录的位置从已发布的JSON文件中逐条读取记录"""
+    with open(os.path.join(file_manager.storage_path, filename), 'rb') as file:
+        for offset, length in refs:
+            file.seek(offset)
+            yield json.loads(file.read(length).decode('utf-8'))
+
+
+def _tee(records: Iterable[Dict[str, Any]], sinks: list) -> Iterable[Dict[str, Any]]:
+    for record in records:
+        for sink in sinks:
+            sink.add(record)
+        yield record
+
+
+def _publish(config: dict, file_manager: FileManager, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """发布JSON文件，同时把每条记录交给附属索引
+    
+    /articles 使用的索引只保存元数据和记录在文件中的位置，由写入过程的 ``on_record`` 回调构建。
+    数据未变化且附属索引已对应当前版本时放弃本次构建，否则提交。
+    ``_get_deferred_sinks`` 中的附属文件（搜索索引、增量、订阅）只在数据变化或自身不是当前版本时生成，
+    记录从已发布文件回放。
+    
+    数据未变化时仍有的开销：result.json、其他格式文件、拆分索引和按公众号拆分的文件需要先写出
+    临时内容才能按内容哈希判断是否变化（之后放弃，不替换已发布的文件）；数据变化时多一次从文件回放解析。
+    """
+    filename = file_manager.generate_filename()
+    article_index = ArticleIndexBuilder(file_manager, filename)
+    sinks = _get_sinks(config, file_manager) + [article_index]
+    try:
+        published = file_manager.publish_json_stream(_tee(records, sinks[:-1]), filename=filename,
+                                                     on_record=article_index.add)
+    except Exception:
+        for sink in sinks:
+            sink.abort()
+        raise
+    
+    refs = [(offset, length) for offset, length, _ in article_index.entries]
+    for sink in sinks:
+        if published['changed'] or not sink.is_current(published['etag']):
+            sink.commit(published['etag'])
+        else:
+            sink.abort()
+    
+    pending = []
+    for sink in _get_deferred_sinks(config, file_manager):
+        if published['changed'] or not sink.is_current(published['etag']):
+            pending.append(sink)
+        else:
+            sink.abort()
+    if pending:
+        try:
+            for record in _iter_published(file_manager, filename, refs):
+                for sink in pending:
+                    sink.add(record)
+        except Exception:
+            for sink in pending:
+                sink.abort()
+            raise
+        for sink in pending:
+            sink.commit(published['etag'])
+    return published
+
+
+def run_generation(config: dict, full: bool = False) -> Dict[str, Any]:
+    """执行一次完整的生成流程：读取数据库 -> 合并数据 -> 发布文件
+    
+    ``full`` 仅在增量模式下生效，表示强制全量同步本地文章存储。
+    返回生成结果，供 ``/generate`` 接口、后台任务和定时任务共用。
+    """
+    recent_days = config['data']['recent_days']
+    
+    logger.info(f"开始生成JSON文件，获取最近{recent_days}天的数据")
+    
+    # 初始化组件
+    file_manager = FileManager()
+    
+    # 获取数据
+    include_content = config['data'].get('include_content', True)
+    with _open_transform_cache(config, file_manager) as transform_cache, DatabaseManager() as db:
+        # 两阶段读取只为转换缓存未命中的文章加载content，没有转换缓存时所有content都要加载，不如一次读取
+        lazy_content = include_content and config['data'].get('lazy_content', False)
+        if lazy_content and transform_cache is None:
+            logger.warning("未启用content转换缓存，忽略 lazy_content 配置")
+            lazy_content = False
+        data_processor = DataProcessor(recent_days, config['data'].get('content_transform'),
+                                       config['data'].get('parallel'), transform_cache, include_content)
+        
+        # 获取所有feeds
+        feeds = db.get_all_feeds()
+        logger.info(f"获取到 {len(feeds)} 个公众号")
+        
+        mp_ids = [feed['id'] for feed in feeds]
+        sync_result = None
+        if config['data'].get('incremental', False):
+            # 增量模式：只读取水位线之后的新文章，合并到本地文章存储后生成文件
+            with ArticleStore(file_manager.get_state_path('articles.sqlite3')) as store:
+                sync_result = store.sync(db, mp_ids, recent_days, full=full,
+                                         full_sync_interval=config['data'].get('full_sync_interval',
+                                                                               DEFAULT_FULL_SYNC_INTERVAL))
+                records = data_processor.iter_process(feeds, store.iter_articles(recent_days))
+                published = _publish(config, file_manager, records)
+        elif lazy_content:
+            # 两阶段读取：先读取元数据，处理时只为转换缓存未命中的文章分批加载content
+            # （服务端游标读取期间连接不能执行其他查询，元数据一次性读取）
+            articles = db.get_recent_articles_bulk(mp_ids, recent_days, include_content=False,
+                                                   content_digest=transform_cache is not None)
+            logger.info(f"共获取到 {len(articles)} 篇文章的元数据")
+            records = data_processor.iter_process(feeds, articles, db.get_article_contents)
+            published = _publish(config, file_manager, records)
+        elif config['data'].get('streaming', False):
+            # 流式模式：服务端游标逐行读取 -> 逐条合并 -> 逐条写入文件
+            articles = db.iter_recent_articles_bulk(mp_ids, recent_days, include_content=include_content)
+            records = data_processor.iter_process(feeds, articles)
+            published = _publish(config, file_manager, records)
+        else:
+            # 一次性批量获取所有公众号的文章
+            all_articles = db.get_recent_articles_bulk(mp_ids, recent_days, include_content=include_content)
+            logger.info(f"共获取到 {len(all_articles)} 篇文章")
+            
+            # 处理数据
+            processed_data = data_processor.process_data(feeds, all_articles)
+            
+            # 保存JSON文件
+            published = _publish(config, file_manager, processed_data)
+    
+    # 清理旧文件
+    file_manager.cleanup_old_files()
+    
+    filename = published['filename']
+    if published['changed']:
+        logger.info(f"JSON文件生成成功: {filename}")
+    else:
+        logger.info(f"数据未变化，保留已发布的文件: {filename}")
+    
+    result = {
+        "fileUrl": file_manager.get_file_url(filename),
+        "filename": filename,
+        "record_count": published['record_count'],
+        "recent_days": recent_days,
+        "changed": published['changed'],
+        "etag": published['etag']
+    }
+    if sync_result is not None:
+        result["new_articles"] = sync_result['added']
+        result["evicted_articles"] = sync_result['evicted']
+    return result
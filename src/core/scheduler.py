@@ -0,0 +1,241 @@
+import os
+import random
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set
+
+from src.core.jobs import get_job_manager
+from src.core.pipeline import run_generation
+from src.utils.config import load_config
+from src.utils.file_manager import FileManager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 与 /generate 接口共用的任务key，定时生成与按需生成互相合并
+GENERATE_JOB_KEY = 'generate'
+
+
+class CronExpression:
+    """五段式cron表达式：分 时 日 月 周
+    
+    支持 ``*``、``*/n``、``a-b``、``a-b/n``、``a,b,c``，周日可以写作0或7。
+    与标准cron相同，日和周都受限制时满足其一即可。
+    """
+    
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式必须包含5个字段: {expression}")
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 周日统一为0，与 datetime.isoweekday() % 7 对应
+        self.weekdays = {day % 7 for day in weekdays}
+        self.day_restricted = fields[2] != '*'
+        self.weekday_restricted = fields[4] != '*'
+    
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"cron步长必须大于0: {field}")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron字段超出范围: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        weekday_match = moment.isoweekday() % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """返回严格晚于 ``moment`` 的下一个触发时间"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron表达式没有可用的触发时间: {self.expression}")
+
+
+class GenerationScheduler:
+    """定时预生成 result.json
+    
+    按 ``interval`` 秒或 ``cron`` 表达式在后台线程中执行与 ``/generate`` 相同的生成流程，
+    每次触发额外增加 0~``jitter`` 秒的随机延迟。上一次生成仍在进行时跳过本次触发。
+    多进程部署时通过存储目录中的文件锁保证只有一个进程执行定时任务。
+    """
+    
+    def __init__(self, interval: float = 300, cron: str = None, jitter: float = 0,
+                 run_on_start: bool = True, lock_path: str = None):
+        self.interval = interval
+        self.cron = CronExpression(cron) if cron else None
+        self.jitter = jitter
+        self.run_on_start = run_on_start
+        self.lock_path = lock_path
+        self.pid = os.getpid()
+        
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        
+        # 统计信息
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run_at = None
+        self.last_status = None
+        self.last_duration = None
+        self.next_run_at = None
+    
+    def next_run_time(self, now: float) -> float:
+        """计算下一次触发的时间戳"""
+        if self.cron:
+            base = self.cron.next_after(datetime.fromtimestamp(now)).timestamp()
+        else:
+            base = now + self.interval
+        return base + (random.uniform(0, self.jitter) if self.jitter else 0)
+    
+    def _acquire_leader_lock(self) -> bool:
+        """尝试获取定时任务锁，获取成功后一直持有直到进程退出"""
+        if self._lock_file is not None or fcntl is None or not self.lock_path:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"进程 {os.getpid()} 负责执行定时生成任务")
+        return True
+    
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """执行一次定时生成，上一次生成未结束时跳过"""
+        if not self._acquire_leader_lock():
+            return None
+        job_manager = get_job_manager()
+        if job_manager.is_running(GENERATE_JOB_KEY):
+            self.skipped += 1
+            logger.info("上一次生成仍在进行，跳过本次定时生成")
+            return None
+        
+        start = time.time()
+        self.last_run_at = start
+        try:
+            config = load_config()
+            result = job_manager.submit(GENERATE_JOB_KEY, run_generation, config).wait()
+            self.last_status = 'succeeded'
+            logger.info(f"定时生成完成: {result.get('record_count')} 条记录")
+            return result
+        except Exception as e:
+            self.failures += 1
+            self.last_status = 'failed'
+            logger.error(f"定时生成失败: {e}")
+            return None
+        finally:
+            self.runs += 1
+            self.last_duration = round(time.time() - start, 3)
+    
+    def _loop(self):
+        now = time.time()
+        self.next_run_at = now if self.run_on_start else self.next_run_time(now)
+        while not self._stop.wait(max(0.0, self.next_run_at - time.time())):
+            self.run_once()
+            self.next_run_at = self.next_run_time(time.time())
+    
+    def start(self):
+        """启动后台线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='generation-scheduler', daemon=True)
+        self._thread.start()
+        schedule = f"cron '{self.cron.expression}'" if self.cron else f"每 {self.interval} 秒"
+        logger.info(f"定时生成已启动: {schedule}，随机延迟 0~{self.jitter} 秒")
+    
+    def stop(self, timeout: float = None):
+        """停止后台线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'leader': self._lock_file is not None or fcntl is None,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'last_run_at': self.last_run_at,
+            'last_status': self.last_status,
+            'last_duration': self.last_duration,
+            'next_run_at': self.next_run_at,
+        }
+
+
+# 进程级定时任务
+_scheduler: Optional[GenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(config: dict) -> Optional[GenerationScheduler]:
+    """按配置启动当前进程的定时任务，未启用时返回None"""
+    global _scheduler
+    scheduler_config = config.get('scheduler') or {}
+    if not scheduler_config.get('enabled', False):
+        return None
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.pid != os.getpid():
+            _scheduler = GenerationScheduler(
+                interval=scheduler_config.get('interval', 300),
+                cron=scheduler_config.get('cron') or None,
+                jitter=scheduler_config.get('jitter', 0),
+                run_on_start=scheduler_config.get('run_on_start', True),
+                lock_path=FileManager().get_state_path('scheduler.lock'),
+            )
+            _scheduler.start()
+        return _scheduler
+
+
+def get_scheduler() -> Optional[GenerationScheduler]:
+    """获取当前进程的定时任务"""
+    if _scheduler is not None and _scheduler.pid == os.getpid():
+        return _scheduler
+    return None
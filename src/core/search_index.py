@@ -0,0 +1,187 @@
+import os
+import re
+import sqlite3
+import logging
+from typing import List, Dict, Any, Optional
+
+from src.core.content_transform import html_to_text
+
+logger = logging.getLogger(__name__)
+
+# 按二元组切分的字符：中日韩统一表意文字、假名、韩文音节
+_CJK = '㐀-䶿一-鿿豈-﫿぀-ヿ가-힯'
+_TOKEN_PATTERN = re.compile(f"([{_CJK}]+)|((?:(?![{_CJK}])[^\\W_])+)")
+
+SCHEMA = """
+CREATE VIRTUAL TABLE docs USING fts5(title, description, body, tokenize='unicode61');
+CREATE TABLE articles (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT,
+    mp_id TEXT,
+    mp_name TEXT,
+    title TEXT,
+    url TEXT,
+    description TEXT,
+    publish_time INTEGER
+);
+CREATE INDEX idx_articles_mp ON articles (mp_id);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# bm25 列权重：标题 > 摘要 > 正文
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def tokenize(text: str) -> List[str]:
+    """分词：中日韩文字切分为重叠的二元组，其他文字按单词切分并转为小写"""
+    tokens = []
+    for cjk, word in _TOKEN_PATTERN.findall((text or '').lower()):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """将用户输入转换为FTS5查询
+    
+    每个以空格分隔的词转换为一个短语（二元组连续出现，相当于子串匹配），多个词之间为AND关系。
+    单个汉字使用前缀查询。
+    """
+    phrases = []
+    for term in query.split():
+        tokens = tokenize(term)
+        if not tokens:
+            continue
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _TOKEN_PATTERN.match(tokens[0]).group(1):
+            phrases.append(f'"{tokens[0]}"*')
+        else:
+            phrases.append('"' + ' '.join(tokens) + '"')
+    return ' '.join(phrases) or None
+
+
+class SearchIndexBuilder:
+    """在临时文件中构建搜索索引，``commit`` 时原子替换正在使用的索引
+    
+    临时文件在收到第一条记录（或提交）时才创建，``is_current`` 为真而放弃的构建不写入任何文件。
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.temp_path = f"{db_path}.{os.getpid()}.tmp"
+        self.connection = None
+        self.count = 0
+    
+    def _open(self):
+        if self.connection is None:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+            self.connection = sqlite3.connect(self.temp_path)
+            self.connection.execute("PRAGMA synchronous=OFF")
+            self.connection.executescript(SCHEMA)
+        return self.connection
+    
+    def add(self, record: Dict[str, Any]):
+        """添加一条记录"""
+        self._open()
+        self.count += 1
+        self.connection.execute(
+            "INSERT INTO articles (rowid, id, mp_id, mp_name, title, url, description, publish_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.count, record.get('id'), record.get('mp_id'), record.get('mp_name'), record.get('title'),
+             record.get('url'), record.get('description'), record.get('publish_time')))
+        self.connection.execute(
+            "INSERT INTO docs (rowid, title, description, body) VALUES (?, ?, ?, ?)",
+            (self.count,
+             ' '.join(tokenize(record.get('title'))),
+             ' '.join(tokenize(record.get('description'))),
+             ' '.join(tokenize(html_to_text(record.get('content'))))))
+    
+    def is_current(self, etag: str) -> bool:
+        """已发布的索引是否对应指定版本的数据"""
+        return SearchIndex(self.db_path).get_etag() == etag
+    
+    def commit(self, etag: str):
+        """完成构建并替换正在使用的索引"""
+        self._open()
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('etag', ?)", (etag,))
+        self.connection.execute("INSERT INTO docs (docs) VALUES ('optimize')")
+        self.connection.commit()
+        self.connection.close()
+        os.replace(self.temp_path, self.db_path)
+        logger.info(f"搜索索引构建完成，共 {self.count} 条记录")
+    
+    def abort(self):
+        """放弃构建"""
+        if self.connection is None:
+            return
+        self.connection.close()
+        self.connection = None
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class SearchIndex:
+    """基于SQLite FTS5的全文搜索索引（只读）"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not os.path.exists(self.db_path):
+            return None
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+    
+    def get_etag(self) -> Optional[str]:
+        """索引对应的数据版本"""
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'etag'").fetchone()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+    
+    def search(self, query: str, page: int = 1, page_size: int = 20, mp_ids: List[str] = None) -> Optional[Dict[str, Any]]:
+        """搜索文章，按相关度排序，索引不存在时返回None"""
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            match = build_match_query(query)
+            if match is None:
+                return {'items': [], 'total': 0, 'page': page, 'page_size': page_size}
+            
+            where = "docs MATCH ?"
+            params = [match]
+            if mp_ids:
+                where += f" AND a.mp_id IN ({', '.join(['?'] * len(mp_ids))})"
+                params.extend(mp_ids)
+            
+            total = connection.execute(
+                f"SELECT COUNT(*) FROM docs JOIN articles a ON a.rowid = docs.rowid WHERE {where}", params
+            ).fetchone()[0]
+            rows = connection.execute(
+                f"SELECT a.id, a.mp_id, a.mp_name, a.title, a.url, a.description, a.publish_time, "
+                f"bm25(docs, {', '.join(str(weight) for weight in BM25_WEIGHTS)}) AS score "
+                f"FROM docs JOIN articles a ON a.rowid = docs.rowid WHERE {where} "
+                f"ORDER BY score LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+            columns = ('id', 'mp_id', 'mp_name', 'title', 'url', 'description', 'publish_time', 'score')
+            items = []
+            for row in rows:
+                item = dict(zip(columns, row))
+                # bm25分数越小越相关，返回时取反
+                item['score'] = -item['score']
+                items.append(item)
+            return {'items': items, 'total': total, 'page': page, 'page_size': page_size}
+        finally:
+            connection.close()
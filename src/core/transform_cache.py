@@ -0,0 +1,169 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存大小上限（content转换结果的总字节数）
+DEFAULT_MAX_SIZE_MB = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    article_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    output TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (article_id, content_hash, version)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache (last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# 每次查询的 (文章ID, content哈希) 数量：不超过旧版本SQLite的999个参数上限，
+# OR 条件的表达式树深度也远低于1000层
+LOOKUP_BATCH_SIZE = 400
+
+# 累计统计项，保存在缓存文件中，多进程部署时 /stats 读取到的是所有进程的合计
+COUNTERS = ('hits', 'misses', 'evictions')
+
+
+def content_hash(content) -> str:
+    """计算content的哈希
+    
+    使用MD5，与数据库端 ``MD5(content)`` 的结果一致，两阶段读取时不加载content也能查询缓存。
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.md5(content or b'').hexdigest()
+
+
+class TransformCache:
+    """content转换结果的持久化缓存
+
+    以 ``(文章ID, content哈希, 转换版本)`` 为键保存转换结果，文章未修改且转换配置未变化时
+    直接复用上次的结果。缓存总大小超过 ``max_size_mb`` 时按最近使用时间淘汰（LRU）。
+    """
+
+    def __init__(self, db_path: str, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """初始化转换缓存"""
+        self.db_path = db_path
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def open(self):
+        """打开缓存"""
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(self.db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """淘汰超出大小上限的条目，保存统计并关闭缓存"""
+        if not self.connection:
+            return
+        try:
+            self.evict()
+            self.connection.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                [(name, getattr(self, name)) for name in COUNTERS])
+            self.connection.commit()
+            logger.info(f"content转换缓存: 命中 {self.hits}, 未命中 {self.misses}, 淘汰 {self.evictions}")
+        except Exception as e:
+            logger.error(f"保存content转换缓存失败: {e}")
+        finally:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_many(self, keys: List[Tuple[str, str]], version: str) -> List[Optional[str]]:
+        """批量查询 ``(文章ID, content哈希)`` 对应的转换结果，未命中的位置为None"""
+        if not keys:
+            return []
+
+        found = {}
+        for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[i:i + LOOKUP_BATCH_SIZE]
+            conditions = ' OR '.join(['(article_id = ? AND content_hash = ?)'] * len(batch))
+            params = [value for key in batch for value in key]
+            rows = self.connection.execute(
+                f"SELECT article_id, content_hash, output FROM cache WHERE version = ? AND ({conditions})",
+                [version] + params)
+            found.update(((row[0], row[1]), row[2]) for row in rows)
+
+        outputs = [found.get(key) for key in keys]
+        hits = [key for key in keys if key in found]
+        self.hits += len(hits)
+        self.misses += len(keys) - len(hits)
+        if hits:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE cache SET last_used = ? WHERE article_id = ? AND content_hash = ? AND version = ?",
+                [(now, article_id, digest, version) for article_id, digest in hits])
+            self.connection.commit()
+        return outputs
+
+    def put_many(self, entries: List[Tuple[str, str, str]], version: str):
+        """批量保存 ``(文章ID, content哈希, 转换结果)``"""
+        if not entries:
+            return
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO cache (article_id, content_hash, version, output, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(article_id, digest, version, output, len(output.encode('utf-8')), now)
+             for article_id, digest, output in entries])
+        self.connection.commit()
+
+    def evict(self) -> int:
+        """按最近使用时间淘汰超出大小上限的条目，返回淘汰数量"""
+        evicted = self.connection.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            " SELECT rowid FROM ("
+            "  SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC, rowid DESC) AS total FROM cache"
+            " ) WHERE total > ?)",
+            (self.max_size,)).rowcount
+        self.evictions += evicted
+        return evicted
+
+
+def get_transform_cache_stats(db_path: str) -> Optional[Dict[str, Any]]:
+    """读取缓存的累计统计信息，缓存文件不存在时返回None"""
+    if not os.path.exists(db_path):
+        return None
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        stats = {name: 0 for name in COUNTERS}
+        stats.update(connection.execute("SELECT key, value FROM meta").fetchall())
+        entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'size_bytes': size,
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else None
+        })
+        return stats
+    except sqlite3.Error as e:
+        logger.error(f"读取content转换缓存统计失败: {e}")
+        return None
+    finally:
+        connection.close()
@@ -6,11 +6,17 @@
 """
 
 import os
+import signal
+import threading
 import yaml
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 配置缓存：(文件标识, 配置)，整体替换以保证多线程下读取一致
+_config_cache = None
+_config_cache_lock = threading.Lock()
+
 def get_config_path():
     """获取配置文件路径"""
     # 获取项目根目录
@@ -19,21 +25,75 @@ def get_config_path():
     config_path = os.path.join(project_root, 'config', 'config.yaml')
     return config_path
 
+def _config_file_key(config_path):
+    """配置文件标识，文件被修改或替换、环境变量变化时改变"""
+    stat = os.stat(config_path)
+    env = os.getenv('ENVIRONMENT', 'development').lower()
+    return (config_path, stat.st_mtime_ns, stat.st_ino, stat.st_size, env)
+
+def _read_config(config_path):
+    """读取并解析配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    
+    # 根据环境自动设置URL前缀
+    return _set_url_prefix(config)
+
 def load_config():
-    """加载配置文件"""
+    """加载配置文件
+    
+    解析结果会被缓存，只有配置文件的修改时间、inode或大小变化（或收到SIGHUP）时才重新解析。
+    返回的配置在多个请求间共享，调用方不应修改。
+    """
+    global _config_cache
     try:
         config_path = get_config_path()
-        with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
-        
-        # 根据环境自动设置URL前缀
-        config = _set_url_prefix(config)
+        key = _config_file_key(config_path)
+        cache = _config_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
         
-        return config
+        with _config_cache_lock:
+            cache = _config_cache
+            if cache is not None and cache[0] == key:
+                return cache[1]
+            try:
+                config = _read_config(config_path)
+            except Exception as e:
+                if cache is None:
+                    raise
+                # 热加载失败时继续使用上一次成功加载的配置
+                logger.error(f"重新加载配置文件失败，继续使用旧配置: {e}")
+                return cache[1]
+            _config_cache = (key, config)
+            if cache is not None:
+                logger.info("配置文件已更新，重新加载")
+            return config
     except Exception as e:
         logger.error(f"加载配置文件失败: {e}")
         raise
 
+def invalidate_config_cache():
+    """清除配置缓存，下次调用 ``load_config`` 时重新解析配置文件"""
+    global _config_cache
+    with _config_cache_lock:
+        _config_cache = None
+
+def install_reload_signal_handler():
+    """收到SIGHUP时清除配置缓存（仅支持Unix，且只能在主线程中安装）"""
+    if not hasattr(signal, 'SIGHUP') or threading.current_thread() is not threading.main_thread():
+        return False
+    previous = signal.getsignal(signal.SIGHUP)
+    
+    def handle_sighup(signum, frame):
+        logger.info("收到SIGHUP信号，重新加载配置文件")
+        invalidate_config_cache()
+        if callable(previous):
+            previous(signum, frame)
+    
+    signal.signal(signal.SIGHUP, handle_sighup)
+    return True
+
 def _set_url_prefix(config):
     """根据环境设置URL前缀"""
     try:
@@ -1,12 +1,57 @@
 import json
 import os
+import re
+import gzip
+import hashlib
+import time
 import logging
-from typing import List, Dict, Any
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
+from typing import List, Dict, Any, Callable, Iterable, Tuple, Set
 from datetime import datetime
+from src.core.article_record import record_default
 from src.utils.config import load_config
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+# 预压缩文件的编码及后缀
+COMPRESSED_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+# 输出格式：扩展名及MIME类型。json为主文件（result.json），其余格式与其同名、扩展名不同
+OUTPUT_FORMATS = {
+    'json': ('.json', 'application/json'),
+    'ndjson': ('.ndjson', 'application/x-ndjson'),
+    'msgpack': ('.msgpack', 'application/msgpack'),
+}
+
+# 流式写入时每次写盘的数据块大小
+WRITE_CHUNK_SIZE = 1024 * 1024
+# 超过该时间（秒）的临时文件视为写入中断的残留文件
+STALE_TEMP_FILE_AGE = 3600
+# 内容寻址的content文件目录（相对存储目录）
+CONTENT_DIR = 'content'
+# 按公众号拆分的文件目录（相对存储目录）及清单文件名
+SHARD_DIR = 'shards'
+SHARD_MANIFEST = 'manifest.json'
+# 不再被索引引用的content文件默认保留时间（秒），仍在使用上一版索引的客户端可以继续下载
+DEFAULT_BLOB_RETENTION = 86400
+
+
 class FileManager:
     def __init__(self, config_path: str = None):
         """初始化文件管理器"""
@@ -16,6 +61,23 @@ class FileManager:
             self.config = self._load_config(config_path)
         self.storage_path = self.config['file']['storage_path']
         self.url_prefix = self.config['file']['url_prefix']
+        # 紧凑模式不缩进，内容较多时文件体积约为缩进模式的一半
+        self.compact_json = self.config['file'].get('compact_json', False)
+        # 发布文件时同时生成的预压缩版本
+        self.precompress = self._get_precompress_encodings(self.config['file'].get('precompress', []))
+        self.gzip_level = self.config['file'].get('gzip_level', 6)
+        self.brotli_quality = self.config['file'].get('brotli_quality', 5)
+        # 除result.json外同时发布的其他格式
+        self.formats = self._get_output_formats(self.config['file'].get('formats', []))
+        # 拆分输出：不含content的索引文件 + 内容寻址的content文件
+        split_output = self.config['file'].get('split_output') or {}
+        self.split_output_enabled = split_output.get('enabled', False)
+        self.split_index_filename = split_output.get('index_filename', 'index.json')
+        self.blob_retention = split_output.get('blob_retention', DEFAULT_BLOB_RETENTION)
+        # 按公众号拆分输出
+        shards = self.config['file'].get('shards') or {}
+        self.shards_enabled = shards.get('enabled', False)
+        self.shard_workers = shards.get('workers', 4)
         self._ensure_storage_directory()
     
     def _load_config(self, config_path: str) -> dict:
@@ -28,6 +90,32 @@ class FileManager:
             logger.error(f"加载配置文件失败: {e}")
             raise
     
+    @staticmethod
+    def _get_precompress_encodings(encodings) -> List[str]:
+        """校验预压缩编码配置，brotli未安装时跳过br"""
+        result = []
+        for encoding in encodings or []:
+            if encoding not in COMPRESSED_SUFFIXES:
+                logger.warning(f"不支持的预压缩编码: {encoding}")
+            elif encoding == 'br' and brotli is None:
+                logger.warning("未安装brotli，跳过br预压缩")
+            else:
+                result.append(encoding)
+        return result
+    
+    @staticmethod
+    def _get_output_formats(formats) -> List[str]:
+        """校验输出格式配置，msgpack未安装时跳过"""
+        result = []
+        for output_format in formats or []:
+            if output_format not in OUTPUT_FORMATS:
+                logger.warning(f"不支持的输出格式: {output_format}")
+            elif output_format == 'msgpack' and msgpack is None:
+                logger.warning("未安装msgpack，跳过msgpack格式")
+            elif output_format != 'json' and output_format not in result:
+                result.append(output_format)
+        return result
+    
     def _ensure_storage_directory(self):
         """确保存储目录存在"""
         try:
@@ -44,29 +132,335 @@ class FileManager:
             logger.error(f"创建存储目录失败: {e}")
             raise
     
+    def get_state_path(self, name: str) -> str:
+        """获取内部状态文件路径
+        
+        状态文件保存在存储目录的 ``.state`` 子目录中，不会被 ``/files/<filename>`` 直接访问。
+        """
+        state_dir = os.path.join(self.storage_path, '.state')
+        if not os.path.exists(state_dir):
+            os.makedirs(state_dir, exist_ok=True)
+        return os.path.join(state_dir, name)
+    
     def generate_filename(self) -> str:
         """生成固定的文件名"""
         return "result.json"
     
+    @contextmanager
+    def atomic_open(self, filename: str, mode: str = 'w', encoding: str = 'utf-8'):
+        """原子写入文件
+        
+        先写入存储目录中的临时文件，完成后 fsync 并通过 ``os.replace`` 替换目标文件，
+        读取方只会看到旧文件或完整的新文件。写入过程中出错时删除临时文件，目标文件保持不变。
+        """
+        file_path = os.path.join(self.storage_path, filename)
+        directory = os.path.dirname(file_path)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix='.tmp', dir=directory)
+        try:
+            if 'b' in mode:
+                file = os.fdopen(fd, mode)
+            else:
+                file = os.fdopen(fd, mode, encoding=encoding)
+            with file:
+                yield file
+                file.flush()
+                os.fsync(file.fileno())
+            # mkstemp 创建的文件权限为0600，发布前改为常规权限
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, file_path)
+            self._fsync_directory(directory)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    @staticmethod
+    def _fsync_directory(directory: str):
+        """同步目录项，确保rename在断电后仍然生效（Windows不支持，忽略）"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        try:
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    @contextmanager
+    def open_for_publish(self, filename: str, skip_unchanged: bool = False):
+        """打开待发布文件，返回写入器（接受文本或字节）
+        
+        内容先写入临时文件并计算哈希。``skip_unchanged`` 为True且哈希与上次发布相同时，
+        丢弃临时文件，不替换文件、不重新压缩，写入器的 ``changed`` 为False。
+        否则从临时文件生成配置的预压缩版本（``.gz``/``.br``），各文件原子替换，原文件最后替换。
+        未启用的压缩版本会被删除，避免提供过期内容。
+        """
+        previous = self.get_file_meta(filename) if skip_unchanged else None
+        writer = _PublishWriter()
+        try:
+            with self.atomic_open(filename, 'w+b') as raw:
+                writer.file = raw
+                yield writer
+                writer.flush()
+                if previous and previous['etag'] == writer.sha256.hexdigest() and self._variants_current(filename):
+                    raise _Unchanged()
+                self._write_variants(filename, raw)
+        except _Unchanged:
+            writer.changed = False
+            logger.info(f"文件内容未变化，跳过发布: {filename}")
+            return
+        
+        for encoding, suffix in COMPRESSED_SUFFIXES.items():
+            stale_path = os.path.join(self.storage_path, filename + suffix)
+            if encoding not in self.precompress and os.path.exists(stale_path):
+                os.remove(stale_path)
+        
+        # 文件替换完成后再写元数据，元数据与文件不一致时读取方会忽略元数据
+        stat = os.stat(os.path.join(self.storage_path, filename))
+        self._save_file_meta(filename, {
+            'etag': writer.sha256.hexdigest(),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'published_at': time.time(),
+        })
+    
+    def _variants_current(self, filename: str) -> bool:
+        """预压缩版本与配置一致：启用的版本都存在，未启用的版本都不存在"""
+        return all(
+            (self.get_variant_filename(filename, encoding) is not None) == (encoding in self.precompress)
+            for encoding in COMPRESSED_SUFFIXES
+        )
+    
+    def _write_variants(self, filename: str, raw):
+        """从已写完的临时文件生成预压缩版本"""
+        if not self.precompress:
+            return
+        with ExitStack() as stack:
+            outputs = []
+            for encoding in self.precompress:
+                variant = stack.enter_context(self.atomic_open(filename + COMPRESSED_SUFFIXES[encoding], 'wb'))
+                if encoding == 'gzip':
+                    # mtime固定为0，相同内容生成相同的压缩文件
+                    outputs.append(gzip.GzipFile(fileobj=variant, mode='wb', compresslevel=self.gzip_level, mtime=0))
+                else:
+                    outputs.append(_BrotliWriter(variant, self.brotli_quality))
+            raw.seek(0)
+            while True:
+                data = raw.read(WRITE_CHUNK_SIZE)
+                if not data:
+                    break
+                for output in outputs:
+                    output.write(data)
+            for output in outputs:
+                output.close()
+    
+    def _get_meta_filename(self, filename: str) -> str:
+        """元数据文件相对存储目录的路径"""
+        return os.path.relpath(self.get_state_path(f"{filename}.meta.json"), self.storage_path)
+    
+    def _save_file_meta(self, filename: str, meta: Dict[str, Any]):
+        """原子保存文件元数据"""
+        meta_filename = self._get_meta_filename(filename)
+        os.makedirs(os.path.dirname(os.path.join(self.storage_path, meta_filename)), exist_ok=True)
+        with self.atomic_open(meta_filename) as file:
+            json.dump(meta, file)
+    
+    def get_file_meta(self, filename: str) -> Dict[str, Any]:
+        """获取发布时记录的文件元数据（包含内容哈希 ``etag``）
+        
+        文件在发布之后被其他方式修改（大小或修改时间与记录不一致）时返回None。
+        """
+        try:
+            with open(os.path.join(self.storage_path, self._get_meta_filename(filename)), encoding='utf-8') as file:
+                meta = json.load(file)
+            stat = os.stat(os.path.join(self.storage_path, filename))
+        except (OSError, ValueError):
+            return None
+        if stat.st_size != meta.get('size') or stat.st_mtime_ns != meta.get('mtime_ns'):
+            return None
+        return meta
+    
+    def get_variant_filename(self, filename: str, encoding: str) -> str:
+        """获取预压缩版本的文件名，不存在时返回None"""
+        suffix = COMPRESSED_SUFFIXES.get(encoding)
+        if suffix and os.path.exists(os.path.join(self.storage_path, filename + suffix)):
+            return filename + suffix
+        return None
+    
     def save_json_file(self, data: List[Dict[str, Any]]) -> str:
         """保存JSON文件并返回文件名"""
+        filename, _ = self.save_json_stream(data)
+        return filename
+    
+    def save_json_stream(self, records: Iterable[Dict[str, Any]], filename: str = None,
+                         compact: bool = None) -> Tuple[str, int]:
+        """逐条写入JSON数组并原子发布，返回 (文件名, 记录数)"""
+        result = self.publish_json_stream(records, filename=filename, compact=compact, skip_unchanged=False)
+        return result['filename'], result['record_count']
+    
+    def publish_json_stream(self, records: Iterable[Dict[str, Any]], filename: str = None,
+                            compact: bool = None, skip_unchanged: bool = True,
+                            on_record: Callable[[Any, int, int], None] = None) -> Dict[str, Any]:
+        """逐条写入JSON数组并原子发布
+        
+        记录按块写入临时文件，写入时同步计算内容摘要，全部写完后才替换目标文件。
+        摘要与上次发布相同时（``skip_unchanged``）不替换文件，文件的修改时间和ETag保持不变。
+        ``compact`` 为True时不缩进，默认使用配置 ``file.compact_json``。
+        ``on_record(record, offset, length)`` 在每条记录写入时调用，参数为该记录的JSON在文件中的字节位置。
+        
+        返回 ``filename``、``record_count``、``changed``（是否发布了新内容）和 ``etag``。
+        """
         try:
-            filename = self.generate_filename()
-            file_path = os.path.join(self.storage_path, filename)
-            
-            # 确保数据是UTF-8编码
-            json_data = json.dumps(data, ensure_ascii=False, indent=2)
+            filename = filename or self.generate_filename()
+            if compact is None:
+                compact = self.compact_json
             
-            # 覆盖现有文件
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(json_data)
+            count = 0
+            position = 0
+            with self.open_for_publish(filename, skip_unchanged=skip_unchanged) as file:
+                chunk = []
+                chunk_size = 0
+                for record in records:
+                    if compact:
+                        prefix = '[' if count == 0 else ','
+                        item = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=record_default)
+                    else:
+                        prefix = '[\n  ' if count == 0 else ',\n  '
+                        # 与整体 indent=2 序列化的缩进保持一致
+                        item = json.dumps(record, ensure_ascii=False, indent=2,
+                                          default=record_default).replace('\n', '\n  ')
+                    chunk.append(prefix + item)
+                    if on_record is not None:
+                        length = len(item) if item.isascii() else len(item.encode('utf-8'))
+                        on_record(record, position + len(prefix), length)
+                        position += len(prefix) + length
+                    chunk_size += len(chunk[-1])
+                    count += 1
+                    if chunk_size >= WRITE_CHUNK_SIZE:
+                        file.write(''.join(chunk))
+                        chunk = []
+                        chunk_size = 0
+                if count == 0:
+                    chunk.append('[]')
+                else:
+                    chunk.append(']' if compact else '\n]')
+                file.write(''.join(chunk))
             
-            logger.info(f"JSON文件保存成功: {file_path}")
-            return filename
+            if file.changed:
+                logger.info(f"JSON文件保存成功: {os.path.join(self.storage_path, filename)}，共 {count} 条记录")
+            return {
+                'filename': filename,
+                'record_count': count,
+                'changed': file.changed,
+                'etag': file.sha256.hexdigest(),
+            }
         except Exception as e:
             logger.error(f"保存JSON文件失败: {e}")
             raise
     
+    @staticmethod
+    def get_format_filename(filename: str, output_format: str) -> str:
+        """获取指定格式的文件名，例如 result.json -> result.ndjson"""
+        return os.path.splitext(filename)[0] + OUTPUT_FORMATS[output_format][0]
+    
+    def open_format_writer(self, output_format: str, filename: str = None) -> 'FormatWriter':
+        """创建其他格式的写入器"""
+        return FormatWriter(self, output_format, filename)
+    
+    def remove_published_file(self, filename: str):
+        """删除已发布的文件及其预压缩版本和元数据"""
+        names = [filename, self._get_meta_filename(filename)]
+        names += [filename + suffix for suffix in COMPRESSED_SUFFIXES.values()]
+        for name in names:
+            file_path = os.path.join(self.storage_path, name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                logger.info(f"删除文件: {file_path}")
+    
+    @staticmethod
+    def get_shard_filename(mp_id: str) -> str:
+        """公众号拆分文件相对存储目录的路径，mp_id中的特殊字符替换为下划线"""
+        return f"{SHARD_DIR}/{re.sub(r'[^A-Za-z0-9_-]', '_', str(mp_id))}.json"
+    
+    def get_shard_manifest(self) -> Dict[str, Any]:
+        """读取已发布的拆分清单，不存在时返回None"""
+        try:
+            with open(os.path.join(self.storage_path, SHARD_DIR, SHARD_MANIFEST), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+    
+    def open_shard_writer(self) -> 'ShardWriter':
+        """创建按公众号拆分的写入器"""
+        return ShardWriter(self)
+    
+    def get_content_filename(self, content_hash: str) -> str:
+        """content文件相对存储目录的路径"""
+        return f"{CONTENT_DIR}/{content_hash}"
+    
+    def write_content_blob(self, content_hash: str, data: bytes) -> bool:
+        """保存内容寻址的content文件及其预压缩版本，已存在时不重复写入
+        
+        返回是否写入了新文件。
+        """
+        filename = self.get_content_filename(content_hash)
+        file_path = os.path.join(self.storage_path, filename)
+        written = False
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with self.atomic_open(filename, 'wb') as file:
+                file.write(data)
+            written = True
+        
+        # 启用新的预压缩编码后，已有的content文件也补齐压缩版本
+        for encoding in self.precompress:
+            if self.get_variant_filename(filename, encoding) is None:
+                with self.atomic_open(filename + COMPRESSED_SUFFIXES[encoding], 'wb') as file:
+                    if encoding == 'gzip':
+                        file.write(gzip.compress(data, compresslevel=self.gzip_level, mtime=0))
+                    else:
+                        file.write(brotli.compress(data, quality=self.brotli_quality))
+                written = True
+        return written
+    
+    def cleanup_content_blobs(self, referenced: Set[str]):
+        """清理content文件
+        
+        当前索引引用的文件更新修改时间；未被引用且超过保留时间的文件（含预压缩版本）删除。
+        """
+        content_dir = os.path.join(self.storage_path, CONTENT_DIR)
+        if not os.path.isdir(content_dir):
+            return
+        try:
+            now = time.time()
+            removed = 0
+            for name in os.listdir(content_dir):
+                file_path = os.path.join(content_dir, name)
+                if name.startswith('.'):
+                    # 写入中断残留的临时文件
+                    if name.endswith('.tmp') and now - os.path.getmtime(file_path) > STALE_TEMP_FILE_AGE:
+                        os.remove(file_path)
+                    continue
+                if name.split('.', 1)[0] in referenced:
+                    os.utime(file_path, (now, now))
+                elif now - os.path.getmtime(file_path) > self.blob_retention:
+                    os.remove(file_path)
+                    removed += 1
+            if removed:
+                logger.info(f"删除不再引用的content文件 {removed} 个")
+        except Exception as e:
+            logger.error(f"清理content文件失败: {e}")
+    
+    def open_split_output(self) -> 'SplitOutputWriter':
+        """创建拆分输出写入器"""
+        return SplitOutputWriter(self)
+    
     def get_file_url(self, filename: str) -> str:
         """获取文件的访问URL"""
         return f"{self.url_prefix}/{filename}"
@@ -75,13 +469,26 @@ class FileManager:
         """清理旧文件，保留result.json和最新的文件"""
         try:
             files = []
+            now = time.time()
             for filename in os.listdir(self.storage_path):
+                # 删除写入中断残留的临时文件
+                if filename.startswith('.') and filename.endswith('.tmp'):
+                    file_path = os.path.join(self.storage_path, filename)
+                    if now - os.path.getmtime(file_path) > STALE_TEMP_FILE_AGE:
+                        os.remove(file_path)
+                        logger.info(f"删除残留临时文件: {file_path}")
+                    continue
                 if filename.endswith('.json'):
                     file_path = os.path.join(self.storage_path, filename)
-                    # 跳过result.json文件
-                    if filename != 'result.json':
+                    # 跳过result.json和拆分输出的索引文件
+                    if filename not in ('result.json', self.split_index_filename):
                         files.append((file_path, os.path.getmtime(file_path)))
             
+            # 删除已停用格式的文件，避免 ?format= 返回过期内容
+            for output_format in OUTPUT_FORMATS:
+                if output_format != 'json' and output_format not in self.formats:
+                    self.remove_published_file(self.get_format_filename(self.generate_filename(), output_format))
+            
             # 按修改时间排序
             files.sort(key=lambda x: x[1], reverse=True)
             
@@ -104,10 +511,263 @@ class FileManager:
                     'size': stat.st_size,
                     'created_time': datetime.fromtimestamp(stat.st_ctime).isoformat(),
                     'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    'etag': (self.get_file_meta(filename) or {}).get('etag'),
                     'url': self.get_file_url(filename)
                 }
             else:
                 return None
         except Exception as e:
             logger.error(f"获取文件信息失败: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+
+class SplitOutputWriter:
+    """拆分输出
+    
+    每条记录的content按内容哈希（sha256）保存为 ``content/<hash>``，相同内容只保存一次；
+    其余字段加上 ``content_hash`` 写入索引文件（默认 ``index.json``）。content为空时
+    ``content_hash`` 为None。content文件一经写入不再修改，客户端可以永久缓存。
+    """
+    
+    def __init__(self, file_manager: FileManager, filename: str = None):
+        self.file_manager = file_manager
+        self.filename = filename or file_manager.split_index_filename
+        self.records = []
+        self.referenced = set()
+        self.blobs_written = 0
+    
+    def add(self, record: Dict[str, Any]):
+        """保存记录的content文件，并记录索引条目"""
+        content = record.get('content') or ''
+        content_hash = None
+        if content:
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            content_hash = hashlib.sha256(data).hexdigest()
+            if content_hash not in self.referenced:
+                self.referenced.add(content_hash)
+                if self.file_manager.write_content_blob(content_hash, data):
+                    self.blobs_written += 1
+        
+        # content_hash 放在原content字段的位置
+        self.records.append({
+            ('content_hash' if key == 'content' else key): (content_hash if key == 'content' else value)
+            for key, value in record.items()
+        })
+    
+    def is_current(self, etag: str) -> bool:
+        """索引文件发布时按自身内容哈希跳过未变化的内容，总是需要提交"""
+        return False
+    
+    def commit(self, etag: str) -> Dict[str, Any]:
+        """发布索引文件并清理不再引用的content文件"""
+        result = self.file_manager.publish_json_stream(self.records, filename=self.filename)
+        self.file_manager.cleanup_content_blobs(self.referenced)
+        logger.info(f"拆分输出完成: {self.filename} 共 {len(self.records)} 条记录，"
+                    f"新写入content文件 {self.blobs_written} 个")
+        return result
+    
+    def abort(self):
+        """放弃发布索引文件（已写入的content文件由后续清理删除）"""
+        self.records = []
+
+
+class ShardWriter:
+    """按公众号拆分输出
+    
+    每个公众号的文章写入 ``shards/<mp_id>.json``，并发布清单 ``shards/manifest.json``，
+    记录各文件的内容哈希、大小和文章数。一个公众号的文章全部到达后，在线程池中序列化并计算哈希，
+    与上次清单中的哈希相同时不重写文件，只有内容变化的公众号文件会被重写（含预压缩版本）。
+    排队和写入中的公众号最多为线程数的2倍，超过时等待最早提交的写入完成。
+    
+    记录需按mp_id分组连续到达（生成流程的各种模式都按公众号分组输出）。
+    """
+    
+    def __init__(self, file_manager: FileManager):
+        self.file_manager = file_manager
+        previous = file_manager.get_shard_manifest() or {}
+        self.previous = previous.get('shards', {})
+        self.shards = {}
+        self.rewritten = 0
+        workers = max(file_manager.shard_workers, 1)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shard-writer')
+        # 同时排队和写入的公众号数量上限，写入慢于读取时阻塞读取，内存占用有界
+        self._max_in_flight = workers * 2
+        self._futures = deque()
+        self._mp_id = None
+        self._records = []
+    
+    def add(self, record: Dict[str, Any]):
+        """添加一条记录，公众号变化时提交上一个公众号的文件"""
+        mp_id = record.get('mp_id')
+        if mp_id != self._mp_id:
+            self._submit()
+            if mp_id in self.shards:
+                raise ValueError(f"拆分输出要求记录按公众号分组，公众号 {mp_id} 的文章不连续")
+            self._mp_id = mp_id
+            self.shards[mp_id] = None
+        self._records.append(record)
+    
+    def _submit(self):
+        if self._mp_id is not None:
+            self._futures.append(self._executor.submit(self._write_shard, self._mp_id, self._records))
+            while len(self._futures) > self._max_in_flight:
+                self.rewritten += self._futures.popleft().result()
+        self._mp_id = None
+        self._records = []
+    
+    def _write_shard(self, mp_id: str, records: List[Dict[str, Any]]):
+        """序列化一个公众号的文件，内容变化时发布，返回是否重写了文件"""
+        if self.file_manager.compact_json:
+            text = json.dumps(records, ensure_ascii=False, separators=(',', ':'), default=record_default)
+        else:
+            text = json.dumps(records, ensure_ascii=False, indent=2, default=record_default)
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        filename = self.file_manager.get_shard_filename(mp_id)
+        
+        previous = self.previous.get(mp_id) or {}
+        meta = self.file_manager.get_file_meta(filename)
+        if previous.get('hash') != digest or not meta or meta['etag'] != digest or \
+                not self.file_manager._variants_current(filename):
+            os.makedirs(os.path.join(self.file_manager.storage_path, SHARD_DIR), exist_ok=True)
+            with self.file_manager.open_for_publish(filename) as file:
+                file.write(data)
+            rewritten = True
+        else:
+            rewritten = False
+        
+        self.shards[mp_id] = {
+            'file': filename,
+            'url': self.file_manager.get_file_url(filename),
+            'hash': digest,
+            'size': len(data),
+            'count': len(records),
+            'mp_name': records[0].get('mp_name', '') if records else '',
+        }
+        return rewritten
+    
+    def is_current(self, etag: str) -> bool:
+        """各文件按自身内容哈希跳过未变化的内容，总是需要提交"""
+        return False
+    
+    def commit(self, etag: str):
+        """等待所有文件写完，发布清单并删除已停用公众号的文件"""
+        try:
+            self._submit()
+            while self._futures:
+                self.rewritten += self._futures.popleft().result()
+        finally:
+            self._executor.shutdown()
+        
+        manifest = {'shards': self.shards}
+        with self.file_manager.open_for_publish(f"{SHARD_DIR}/{SHARD_MANIFEST}", skip_unchanged=True) as file:
+            file.write(json.dumps(manifest, ensure_ascii=False, indent=2))
+        
+        for mp_id, shard in self.previous.items():
+            if mp_id not in self.shards and shard.get('file'):
+                self.file_manager.remove_published_file(shard['file'])
+        logger.info(f"按公众号拆分输出完成: 共 {len(self.shards)} 个文件，重写 {self.rewritten} 个")
+    
+    def abort(self):
+        """放弃发布清单（已重写的公众号文件各自完整，清单保持上一版本）"""
+        self._records = []
+        # Python 3.8 的 shutdown 不支持 cancel_futures，逐个取消尚未开始的写入
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown()
+
+
+class FormatWriter:
+    """逐条写入其他格式的文件，与result.json使用相同的原子发布和预压缩流程
+    
+    - ``ndjson``: 每行一条JSON记录，可以边下载边解析，也可以追加
+    - ``msgpack``: 连续的MessagePack对象（不包裹数组），可以用 ``msgpack.Unpacker`` 流式读取
+    
+    内容与上次发布相同时不替换文件。
+    """
+    
+    def __init__(self, file_manager: FileManager, output_format: str, filename: str = None):
+        self.filename = file_manager.get_format_filename(filename or file_manager.generate_filename(), output_format)
+        self.output_format = output_format
+        if output_format == 'msgpack':
+            self._encode = msgpack.Packer(default=record_default).pack
+            self._separator = b''
+        else:
+            self._separator = ''
+            self._encode = lambda record: json.dumps(record, ensure_ascii=False, separators=(',', ':'),
+                                                    default=record_default) + '\n'
+        self._stack = ExitStack()
+        self._file = self._stack.enter_context(file_manager.open_for_publish(self.filename, skip_unchanged=True))
+        self._chunk = []
+        self._chunk_size = 0
+        self.count = 0
+    
+    def add(self, record: Dict[str, Any]):
+        """写入一条记录"""
+        data = self._encode(record)
+        self._chunk.append(data)
+        self._chunk_size += len(data)
+        self.count += 1
+        if self._chunk_size >= WRITE_CHUNK_SIZE:
+            self._flush_chunk()
+    
+    def _flush_chunk(self):
+        if self._chunk:
+            self._file.write(self._separator.join(self._chunk))
+            self._chunk = []
+            self._chunk_size = 0
+    
+    def is_current(self, etag: str) -> bool:
+        """文件按自身内容哈希跳过未变化的内容，总是需要提交"""
+        return False
+    
+    def commit(self, etag: str):
+        """完成写入并发布"""
+        self._flush_chunk()
+        self._stack.close()
+        if self._file.changed:
+            logger.info(f"{self.output_format}文件保存成功: {self.filename}，共 {self.count} 条记录")
+    
+    def abort(self):
+        """放弃发布，删除临时文件"""
+        self._chunk = []
+        self._stack.__exit__(_Aborted, _Aborted(), None)
+
+
+class _Aborted(Exception):
+    """放弃发布"""
+
+
+class _Unchanged(Exception):
+    """发布内容与上次相同"""
+
+
+class _PublishWriter:
+    """按块写入待发布文件并计算内容哈希，接受文本或字节"""
+    
+    def __init__(self):
+        self.file = None
+        self.sha256 = hashlib.sha256()
+        self.changed = True
+    
+    def write(self, text):
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        self.file.write(data)
+        self.sha256.update(data)
+    
+    def flush(self):
+        self.file.flush()
+
+
+class _BrotliWriter:
+    """与GzipFile接口一致的brotli压缩写入器"""
+    
+    def __init__(self, file, quality: int):
+        self._file = file
+        self._compressor = brotli.Compressor(quality=quality)
+    
+    def write(self, data: bytes):
+        self._file.write(self._compressor.process(data))
+    
+    def close(self):
+        self._file.write(self._compressor.finish())
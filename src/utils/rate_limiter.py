@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求频率限制模块
+
+基于令牌桶算法：每个客户端一个容量为 ``capacity`` 的令牌桶，按
+``capacity / window`` 个/秒的速度补充令牌，每个请求消耗一个令牌。
+每次检查只读写一个桶的两个数值，时间和空间复杂度均为 O(1)。
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimiter:
+    """进程内令牌桶限流器
+    
+    桶按最近访问时间排序，超过 ``window`` 秒未访问的桶（此时已经补满）
+    会被定期清理；桶数量超过 ``max_entries`` 时淘汰最久未访问的桶。
+    """
+    
+    def __init__(self, capacity: int, window: float, max_entries: int = 100000, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.window = float(window)
+        self.rate = self.capacity / self.window
+        self.max_entries = max_entries
+        self._clock = clock
+        self._buckets = OrderedDict()   # key -> [tokens, updated]
+        self._lock = threading.Lock()
+        self._last_eviction = clock()
+    
+    def allow(self, key: str) -> bool:
+        """消耗一个令牌，令牌不足时返回False"""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.capacity, now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            
+            if now - self._last_eviction >= self.window:
+                self._evict_idle(now)
+            
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            return False
+    
+    def _evict_idle(self, now: float):
+        """清理空闲的桶（持有锁时调用），从最久未访问的桶开始"""
+        self._last_eviction = now
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.window:
+                break
+            del self._buckets[key]
+    
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteRateLimiter:
+    """基于本地SQLite文件的令牌桶限流器，多个工作进程共享同一份限流状态
+    
+    与 ``MemoryRateLimiter`` 相同，超过 ``window`` 秒未访问的桶会被定期清理；
+    桶数量达到 ``max_entries`` 时，新客户端的桶会淘汰最久未访问的桶（例如伪造大量 X-Forwarded-For 时）。
+    桶数量保存在 ``bucket_count`` 表中随写入更新，检查上限不需要扫描整个表。
+    """
+    
+    def __init__(self, capacity: int, window: float, db_path: str, max_entries: int = 100000, clock=time.time):
+        self.capacity = float(capacity)
+        self.window = float(window)
+        self.rate = self.capacity / self.window
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._local = threading.local()
+        self._last_eviction = 0.0
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_buckets_updated ON buckets (updated);
+            CREATE TABLE IF NOT EXISTS bucket_count (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                count INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO bucket_count (id, count) SELECT 0, COUNT(*) FROM buckets;
+        """)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程使用独立的连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+    
+    def allow(self, key: str) -> bool:
+        """消耗一个令牌，令牌不足时返回False"""
+        now = self._clock()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                tokens = self.capacity
+                count = connection.execute("SELECT count FROM bucket_count").fetchone()[0]
+                if count >= self.max_entries:
+                    # 淘汰最久未访问的桶
+                    count -= connection.execute(
+                        "DELETE FROM buckets WHERE key IN (SELECT key FROM buckets ORDER BY updated LIMIT ?)",
+                        (count - self.max_entries + 1,)).rowcount
+                connection.execute("UPDATE bucket_count SET count = ?", (count + 1,))
+            else:
+                tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                               (key, tokens, now))
+            if now - self._last_eviction >= self.window:
+                # 超过一个窗口未访问的桶已经补满，删除不影响限流结果
+                self._last_eviction = now
+                removed = connection.execute("DELETE FROM buckets WHERE updated < ?", (now - self.window,)).rowcount
+                connection.execute("UPDATE bucket_count SET count = count - ?", (removed,))
+            connection.execute("COMMIT")
+            return allowed
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+
+# 进程级限流器，按限流范围分别保存，限流参数变化时重新创建
+_limiters = {}   # scope -> (key, limiter)
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(security_config: dict, scope: str = None):
+    """按安全配置获取当前进程的限流器
+    
+    ``scope`` 指定单独计数的限流范围（例如 ``content``），请求次数读取
+    ``rate_limit_<scope>_requests``，未配置时与默认范围相同。
+    """
+    backend = security_config.get('rate_limit_backend', 'memory')
+    requests = security_config.get('rate_limit_requests', 10)
+    if scope:
+        requests = security_config.get(f'rate_limit_{scope}_requests', requests)
+    key = (
+        os.getpid(),
+        backend,
+        requests,
+        security_config.get('rate_limit_window', 60),
+        security_config.get('rate_limit_max_entries', 100000),
+    )
+    cached = _limiters.get(scope)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _limiter_lock:
+        cached = _limiters.get(scope)
+        if cached is None or cached[0] != key:
+            _, backend, requests, window, max_entries = key
+            if backend == 'sqlite':
+                from src.utils.file_manager import FileManager
+                db_path = security_config.get('rate_limit_db_path') or \
+                    FileManager().get_state_path('rate_limit.sqlite3')
+                limiter = SQLiteRateLimiter(requests, window, db_path, max_entries)
+            else:
+                if backend != 'memory':
+                    logger.warning(f"未知的限流存储类型 {backend}，使用进程内存")
+                limiter = MemoryRateLimiter(requests, window, max_entries)
+            cached = (key, limiter)
+            _limiters[scope] = cached
+            logger.info(f"请求频率限制{f'（{scope}）' if scope else ''}: {requests}次/{window}秒, 存储: {backend}")
+        return cached[1]
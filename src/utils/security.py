@@ -10,8 +10,8 @@ import hashlib
 import hmac
 from functools import wraps
 from flask import request, jsonify, g
-from collections import defaultdict
 import logging
+from src.utils.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,6 @@ class SecurityManager:
         """初始化安全管理器"""
         self.config = config
         self.security_config = config.get('security', {})
-        self.rate_limit_data = defaultdict(list)
     
     def verify_api_key(self, api_key):
         """验证API密钥"""
@@ -35,28 +34,17 @@ class SecurityManager:
         whitelist = self.security_config.get('ip_whitelist', [])
         return client_ip in whitelist
     
-    def check_rate_limit(self, client_ip):
-        """检查请求频率限制"""
+    def check_rate_limit(self, client_ip, scope=None):
+        """检查请求频率限制
+        
+        限流状态保存在进程级（或多进程共享的）令牌桶限流器中，
+        而不是每个请求新建的 SecurityManager 上。``scope`` 指定单独计数的限流范围。
+        """
         if not self.security_config.get('rate_limit_enabled', False):
             return True
         
-        current_time = time.time()
-        window = self.security_config.get('rate_limit_window', 60)
-        max_requests = self.security_config.get('rate_limit_requests', 10)
-        
-        # 清理过期的请求记录
-        self.rate_limit_data[client_ip] = [
-            req_time for req_time in self.rate_limit_data[client_ip]
-            if current_time - req_time < window
-        ]
-        
-        # 检查请求次数
-        if len(self.rate_limit_data[client_ip]) >= max_requests:
-            return False
-        
-        # 添加当前请求
-        self.rate_limit_data[client_ip].append(current_time)
-        return True
+        key = f"{scope}:{client_ip}" if scope else client_ip
+        return get_rate_limiter(self.security_config, scope).allow(key)
     
     def get_client_ip(self):
         """获取客户端IP"""
@@ -130,6 +118,16 @@ def require_ip_whitelist(f):
 
 def rate_limit(f):
     """请求频率限制装饰器"""
+    return _rate_limit(f)
+
+def content_rate_limit(f):
+    """content文件下载的请求频率限制装饰器
+    
+    拆分输出的客户端每篇文章请求一次content，单独计数，限额为 ``rate_limit_content_requests``。
+    """
+    return _rate_limit(f, 'content')
+
+def _rate_limit(f, scope=None):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         from src.utils.config import load_config
@@ -138,7 +136,7 @@ def rate_limit(f):
         
         client_ip = security_manager.get_client_ip()
         
-        if not security_manager.check_rate_limit(client_ip):
+        if not security_manager.check_rate_limit(client_ip, scope):
             security_manager.log_security_event("请求频率超限", f"客户端IP: {client_ip}")
             return jsonify({
                 "code": 429,
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API接口测试脚本（使用Flask测试客户端和临时存储目录，无需数据库）
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import gzip
+import json
+import shutil
+import tempfile
+import logging
+import src.api.app as app_module
+import src.utils.config as config_module
+from src.core.pipeline import _publish
+from src.utils.file_manager import FileManager
+from src.core.search_index import SearchIndexBuilder
+from src.core.change_log import ChangeLogBuilder
+from src.core.feeds import FeedWriter
+from tests.test_file_manager import SAMPLE_RECORDS, create_file_manager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TemporaryStorage:
+    """将 /files 接口指向临时存储目录"""
+
+    def __init__(self, **file_config):
+        self.file_config = file_config
+
+    def __enter__(self):
+        self.workdir = tempfile.mkdtemp()
+        self.file_manager = create_file_manager(self.workdir, **self.file_config)
+        self.original_file_manager = app_module.FileManager
+        self.original_load_config = config_module.load_config
+        config_path = os.path.join(self.workdir, 'config.yaml')
+        app_module.FileManager = lambda: FileManager(config_path)
+        # 测试请求不受频率限制
+        config = dict(self.original_load_config())
+        config['security'] = dict(config.get('security', {}), rate_limit_enabled=False)
+        config_module.load_config = lambda: config
+        return self.file_manager
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        app_module.FileManager = self.original_file_manager
+        config_module.load_config = self.original_load_config
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def test_download_negotiates_precompressed_variant():
+    """按 Accept-Encoding 返回预压缩文件并设置响应头"""
+    with TemporaryStorage(precompress=['gzip']) as file_manager:
+        filename = file_manager.save_json_file(SAMPLE_RECORDS)
+        client = app_module.app.test_client()
+
+        response = client.get(f'/files/{filename}', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype == 'application/json'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == SAMPLE_RECORDS
+
+        response = client.get(f'/files/{filename}', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(response.data) == SAMPLE_RECORDS
+
+        assert client.get('/files/missing.json').status_code == 404
+
+
+def test_conditional_and_range_requests():
+    """内容未变化时返回304，支持Range请求"""
+    with TemporaryStorage(precompress=['gzip']) as file_manager:
+        filename = file_manager.save_json_file(SAMPLE_RECORDS)
+        etag = file_manager.get_file_meta(filename)['etag']
+        client = app_module.app.test_client()
+
+        response = client.get(f'/files/{filename}')
+        assert response.headers['ETag'] == f'"{etag}"'
+        last_modified = response.headers['Last-Modified']
+        body = response.data
+
+        response = client.get(f'/files/{filename}', headers={'If-None-Match': f'"{etag}"'})
+        assert response.status_code == 304 and response.data == b''
+        response = client.get(f'/files/{filename}', headers={'If-Modified-Since': last_modified})
+        assert response.status_code == 304
+
+        # 压缩版本使用不同的ETag
+        response = client.get(f'/files/{filename}', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['ETag'] == f'"{etag}-gzip"'
+
+        response = client.get(f'/files/{filename}', headers={'Range': 'bytes=0-9'})
+        assert response.status_code == 206
+        assert response.data == body[:10]
+
+        # 内容变化后ETag变化
+        file_manager.save_json_file(SAMPLE_RECORDS[:1])
+        response = client.get(f'/files/{filename}', headers={'If-None-Match': f'"{etag}"'})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != f'"{etag}"'
+
+
+def test_articles_endpoint():
+    """/articles 从已发布文件的索引中分页查询，文件更新后索引随之更新"""
+    with TemporaryStorage() as file_manager:
+        client = app_module.app.test_client()
+        assert client.get('/articles').status_code == 404
+
+        _publish({}, file_manager, SAMPLE_RECORDS)
+        response = client.get('/articles?limit=1')
+        assert response.json['data']['items'] == SAMPLE_RECORDS[:1]
+        response = client.get('/articles?limit=1&exclude=content')
+        data = response.json['data']
+        assert response.status_code == 200
+        assert [item['id'] for item in data['items']] == [SAMPLE_RECORDS[0]['id']]
+        assert 'content' not in data['items'][0]
+
+        response = client.get(f"/articles?limit=1&cursor={data['next_cursor']}&fields=id,title")
+        assert response.json['data']['items'] == [{'id': SAMPLE_RECORDS[1]['id'], 'title': SAMPLE_RECORDS[1]['title']}]
+        assert response.json['data']['next_cursor'] is None
+
+        _publish({}, file_manager, SAMPLE_RECORDS[1:])
+        assert client.get('/articles').json['data']['items'] == SAMPLE_RECORDS[1:]
+
+        assert client.get('/articles?since=abc').status_code == 400
+        assert client.get('/articles?cursor=@@').status_code == 400
+
+
+def test_download_format_parameter():
+    """?format= 返回同名的其他格式文件"""
+    with TemporaryStorage(formats=['ndjson']) as file_manager:
+        client = app_module.app.test_client()
+        writer = file_manager.open_format_writer('ndjson')
+        for record in SAMPLE_RECORDS:
+            writer.add(record)
+        writer.commit('etag')
+
+        response = client.get('/files/result.json?format=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert [json.loads(line) for line in response.data.decode('utf-8').splitlines()] == SAMPLE_RECORDS
+        response.close()
+        assert client.get('/files/result.json?format=msgpack').status_code == 404
+        assert client.get('/files/result.json?format=xml').status_code == 400
+
+
+def test_shard_download():
+    """/files/shards/ 下载清单和单个公众号的文件"""
+    with TemporaryStorage() as file_manager:
+        client = app_module.app.test_client()
+        writer = file_manager.open_shard_writer()
+        for record in SAMPLE_RECORDS:
+            writer.add(record)
+        writer.commit('etag')
+
+        manifest = client.get('/files/shards/manifest.json').json['shards']
+        shard = manifest[SAMPLE_RECORDS[0]['mp_id']]
+        response = client.get('/files/' + shard['file'])
+        assert response.status_code == 200
+        assert response.json == SAMPLE_RECORDS
+        assert response.headers['ETag'].strip('"') == shard['hash']
+        response.close()
+        assert client.get('/files/shards/unknown.json').status_code == 404
+
+
+def test_content_blob_endpoint():
+    """/files/content/<hash> 返回content文件，带长期缓存响应头"""
+    with TemporaryStorage(precompress=['gzip'], split_output={'enabled': True}) as file_manager:
+        client = app_module.app.test_client()
+        writer = file_manager.open_split_output()
+        writer.add(SAMPLE_RECORDS[0])
+        writer.commit('etag')
+        content_hash = writer.records[0]['content_hash']
+
+        response = client.get(f'/files/content/{content_hash}', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data).decode('utf-8') == SAMPLE_RECORDS[0]['content']
+        assert 'immutable' in response.headers['Cache-Control']
+        etag = response.headers['ETag']
+        response.close()
+
+        response = client.get(f'/files/content/{content_hash}', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert client.get('/files/content/' + '0' * 64).status_code == 404
+        assert client.get('/files/content/..%2Fconfig.yaml').status_code == 404
+
+
+def test_content_blob_rate_limit():
+    """/files/content/<hash> 使用单独的、更大的限额，不消耗其他接口的限额"""
+    with TemporaryStorage(split_output={'enabled': True}) as file_manager:
+        client = app_module.app.test_client()
+        writer = file_manager.open_split_output()
+        writer.add(SAMPLE_RECORDS[0])
+        writer.commit('etag')
+        content_hash = writer.records[0]['content_hash']
+        config_module.load_config()['security'].update(
+            rate_limit_enabled=True, rate_limit_backend='memory', rate_limit_requests=1,
+            rate_limit_content_requests=5)
+        headers = {'X-Forwarded-For': '198.51.100.19'}
+
+        statuses = [client.get(f'/files/content/{content_hash}', headers=headers).status_code for _ in range(6)]
+        assert statuses == [200] * 5 + [429]
+        assert client.get('/search?q=test', headers=headers).status_code != 429
+        assert client.get('/search?q=test', headers=headers).status_code == 429
+
+
+def test_search_endpoint():
+    """/search 参数校验、索引缺失和正常搜索"""
+    with TemporaryStorage() as file_manager:
+        client = app_module.app.test_client()
+        assert client.get('/search').status_code == 400
+        assert client.get('/search?q=test').status_code == 404
+
+        builder = SearchIndexBuilder(file_manager.get_state_path('search.sqlite3'))
+        for record in SAMPLE_RECORDS:
+            builder.add(record)
+        builder.commit('etag')
+
+        record = SAMPLE_RECORDS[0]
+        response = client.get('/search', query_string={'q': record['title']})
+        assert response.status_code == 200
+        assert response.json['data']['items'][0]['id'] == record['id']
+        assert client.get('/search?q=test&page=x').status_code == 400
+
+
+def test_changes_endpoint():
+    """/changes 返回增量，参数错误返回400，增量过期返回410"""
+    with TemporaryStorage() as file_manager:
+        client = app_module.app.test_client()
+        for records in (SAMPLE_RECORDS[:1], SAMPLE_RECORDS[1:]):
+            builder = ChangeLogBuilder(file_manager, retention=1)
+            for record in records:
+                builder.add(record)
+            builder.commit('etag')
+
+        data = client.get('/changes?since=1').json['data']
+        assert data['build'] == 2
+        assert data['added'] == SAMPLE_RECORDS[1:]
+        assert data['removed'] == [SAMPLE_RECORDS[0]['id']]
+        assert client.get('/changes?since=0').status_code == 410
+        assert client.get('/changes?since=3').status_code == 400
+        assert client.get('/changes?since=x').status_code == 400
+
+
+def test_feed_endpoint():
+    """/feed.xml 返回订阅文件并支持条件请求，格式错误返回400，订阅不存在返回404"""
+    with TemporaryStorage() as file_manager:
+        client = app_module.app.test_client()
+        assert client.get('/feed.xml').status_code == 404
+
+        writer = FeedWriter(file_manager, {'formats': ['atom', 'rss'], 'per_mp': True})
+        for record in SAMPLE_RECORDS:
+            writer.add(record)
+        writer.commit('etag')
+
+        response = client.get('/feed.xml')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/atom+xml'
+        assert b'<feed' in response.data
+        assert client.get('/feed.xml', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+        response = client.get(f"/feed.xml?format=rss&mp_id={SAMPLE_RECORDS[0]['mp_id']}")
+        assert response.status_code == 200 and response.mimetype == 'application/rss+xml'
+        assert client.get('/feed.xml?format=json').status_code == 400
+        assert client.get('/feed.xml?mp_id=unknown').status_code == 404
+
+
+if __name__ == '__main__':
+    test_download_negotiates_precompressed_variant()
+    test_conditional_and_range_requests()
+    test_articles_endpoint()
+    test_content_blob_endpoint()
+    test_content_blob_rate_limit()
+    test_search_endpoint()
+    test_changes_endpoint()
+    test_feed_endpoint()
+    logger.info("API接口测试通过")
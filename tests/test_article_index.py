@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章内存索引测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+import src.core.article_index as article_index_module
+from src.core.article_index import ArticleIndex, ArticleIndexBuilder, InvalidCursorError, get_article_index
+from tests.test_file_manager import create_file_manager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def make_records():
+    """3个公众号，每个公众号10篇文章，发布时间交错"""
+    records = []
+    for i in range(30):
+        records.append({
+            'id': f"article_{i:02d}",
+            'mp_id': f"MP_{i % 3}",
+            'title': f"标题{i}",
+            'content': '<p>正文</p>',
+            'publish_time': 1000 + i * 10
+        })
+    return records
+
+
+def newest_first(records):
+    return sorted(records, key=lambda r: (r['publish_time'], r['id']), reverse=True)
+
+
+def test_pagination_covers_all_records_in_order():
+    """游标分页按发布时间倒序无重复、无遗漏地返回所有记录"""
+    records = make_records()
+    index = ArticleIndex(records)
+    seen = []
+    cursor = None
+    while True:
+        page = index.query(cursor=cursor, limit=7)
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [r['id'] for r in newest_first(records)]
+
+
+def test_filters_and_projection():
+    """按公众号、时间范围过滤，字段投影"""
+    records = make_records()
+    index = ArticleIndex(records)
+
+    result = index.query(mp_ids=['MP_1'], since=1050, until=1200, limit=100, exclude=['content'])
+    expected = [r for r in newest_first(records) if r['mp_id'] == 'MP_1' and 1050 <= r['publish_time'] <= 1200]
+    assert [item['id'] for item in result['items']] == [r['id'] for r in expected]
+    assert all('content' not in item for item in result['items'])
+
+    # 多个公众号归并后仍按时间倒序，并支持分页
+    first = index.query(mp_ids=['MP_0', 'MP_2'], limit=5, fields=['id', 'publish_time'])
+    second = index.query(mp_ids=['MP_0', 'MP_2'], limit=5, cursor=first['next_cursor'])
+    expected = [r['id'] for r in newest_first(records) if r['mp_id'] in ('MP_0', 'MP_2')][:10]
+    assert [item['id'] for item in first['items'] + second['items']] == expected
+    assert set(first['items'][0]) == {'id', 'publish_time'}
+
+    assert index.query(mp_ids=['MP_UNKNOWN'])['items'] == []
+    try:
+        index.query(cursor='not-a-cursor')
+        assert False, "应当拒绝无效游标"
+    except InvalidCursorError:
+        pass
+
+
+def publish(file_manager, records):
+    """发布JSON文件并随写入过程构建索引"""
+    builder = ArticleIndexBuilder(file_manager, 'result.json')
+    published = file_manager.publish_json_stream(records, filename='result.json', on_record=builder.add)
+    builder.commit(published['etag'])
+    return builder
+
+
+def test_index_built_from_published_stream():
+    """索引只保存元数据和记录位置，content按位置从已发布文件读取；其他进程读取索引文件"""
+    workdir = tempfile.mkdtemp()
+    try:
+        for compact in (True, False):
+            file_manager = create_file_manager(workdir, compact_json=compact)
+            records = make_records()
+            records[3]['content'] = '<p>含"引号"和\n换行的正文</p>'
+            publish(file_manager, records)
+
+            index = get_article_index(file_manager, 'result.json')
+            assert all('content' not in entry[0] for entry in index._records)
+            assert index.query(limit=100)['items'] == newest_first(records)
+            assert index.query(fields=['id', 'content'], limit=1)['items'] == \
+                [{'id': newest_first(records)[0]['id'], 'content': '<p>正文</p>'}]
+
+            # 模拟其他工作进程：清空进程内缓存后从索引文件加载
+            article_index_module._index_cache.clear()
+            index = get_article_index(file_manager, 'result.json')
+            assert index.query(limit=100)['items'] == newest_first(records)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_index_survives_republish():
+    """文件已重新发布但索引文件尚未更新时继续使用上一版本的索引，并从其打开的文件读取content"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        records = make_records()
+        builder = publish(file_manager, records)
+        assert builder.is_current(file_manager.get_file_meta('result.json')['etag'])
+        index = get_article_index(file_manager, 'result.json')
+
+        # 只替换已发布文件，不更新索引文件
+        file_manager.publish_json_stream(make_records()[:5], filename='result.json')
+        assert not builder.is_current(file_manager.get_file_meta('result.json')['etag'])
+        assert get_article_index(file_manager, 'result.json') is index
+        assert index.query(limit=100)['items'] == newest_first(records)
+
+        article_index_module._index_cache.clear()
+        assert get_article_index(file_manager, 'result.json') is None
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_pagination_covers_all_records_in_order()
+    test_filters_and_projection()
+    test_index_built_from_published_stream()
+    test_index_survives_republish()
+    logger.info("文章索引测试通过")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章记录测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import json
+import shutil
+import tempfile
+import logging
+import msgpack
+from src.core.article_record import ArticleRecord, FIELDS
+from src.core.change_log import record_digest
+from src.core.data_processor import DataProcessor
+from tests.test_file_manager import SAMPLE_RECORDS, create_file_manager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEEDS = [{'id': 'MP_WXS_2391412265', 'mp_name': '老委鬼', 'mp_intro': '体育情报研究'}]
+
+
+def make_articles():
+    """模拟数据库返回的行：每行的mp_id都是独立的字符串对象"""
+    articles = []
+    for record in SAMPLE_RECORDS:
+        article = {key: record[key] for key in ('id', 'title', 'url', 'content', 'description', 'publish_time')}
+        article['mp_id'] = ''.join(list(record['mp_id']))
+        articles.append(article)
+    return articles
+
+
+def test_dict_access():
+    """字典式访问与原来的字典记录一致"""
+    record = ArticleRecord(*(SAMPLE_RECORDS[0][name] for name in FIELDS))
+    assert record.to_dict() == SAMPLE_RECORDS[0]
+    assert list(record.to_dict()) == list(SAMPLE_RECORDS[0])
+    assert record == SAMPLE_RECORDS[0]
+    assert record['title'] == record.get('title') == SAMPLE_RECORDS[0]['title']
+    assert record.get('content_hash') is None and record.get('missing', '') == ''
+    assert dict(record.items()) == SAMPLE_RECORDS[0]
+    assert not hasattr(record, '__dict__')
+    try:
+        record['missing']
+        assert False, "不存在的字段应当抛出KeyError"
+    except KeyError:
+        pass
+
+
+def test_processed_records_share_feed_strings():
+    """同一公众号的记录共享公众号字段，不保留每行的mp_id副本"""
+    records = DataProcessor(3).process_data(FEEDS, make_articles())
+    assert all(isinstance(record, ArticleRecord) for record in records)
+    assert records == SAMPLE_RECORDS
+    assert records[0].mp_id is records[1].mp_id
+    assert records[0].mp_name is records[1].mp_name
+
+
+def test_serialization_matches_dict_records():
+    """序列化结果与字典记录完全一致"""
+    workdir = tempfile.mkdtemp()
+    try:
+        records = DataProcessor(3).process_data(FEEDS, make_articles())
+        for compact in (False, True):
+            for name, data in (('records.json', records), ('dicts.json', SAMPLE_RECORDS)):
+                file_manager = create_file_manager(workdir, compact_json=compact)
+                file_manager.save_json_stream(data, filename=name)
+            with open(os.path.join(file_manager.storage_path, 'records.json'), 'rb') as file, \
+                    open(os.path.join(file_manager.storage_path, 'dicts.json'), 'rb') as expected:
+                assert file.read() == expected.read()
+
+        for output_format in ('ndjson', 'msgpack'):
+            writer = file_manager.open_format_writer(output_format)
+            for record in records:
+                writer.add(record)
+            writer.commit('etag')
+        with open(os.path.join(file_manager.storage_path, 'result.ndjson'), encoding='utf-8') as file:
+            assert [json.loads(line) for line in file] == SAMPLE_RECORDS
+        with open(os.path.join(file_manager.storage_path, 'result.msgpack'), 'rb') as file:
+            assert list(msgpack.Unpacker(file)) == SAMPLE_RECORDS
+
+        assert [record_digest(record) for record in records] == [record_digest(record) for record in SAMPLE_RECORDS]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_dict_access()
+    test_processed_records_share_feed_strings()
+    test_serialization_matches_dict_records()
+    logger.info("文章记录测试通过")
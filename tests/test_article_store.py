@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地文章存储（增量生成）测试脚本，使用SQLite替身数据库，无需MySQL
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import time
+import logging
+from benchmarks.standin_db import StandInConnection, populate
+from src.core.article_store import ArticleStore
+from src.core.database import DatabaseManager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_database(feed_count=5, articles_per_feed=10):
+    """创建填充了测试数据的替身数据库"""
+    db = DatabaseManager()
+    db.connection = StandInConnection()
+    populate(db.connection, feed_count, articles_per_feed)
+    return db
+
+
+def insert_article(db, article_id, mp_id, publish_time):
+    db.connection.sqlite.execute(
+        "INSERT INTO articles (id, mp_id, title, url, content, description, status, publish_time) "
+        "VALUES (?, ?, ?, '', '', '', 1, ?)", (article_id, mp_id, article_id, publish_time))
+    db.connection.sqlite.commit()
+
+
+def test_incremental_sync():
+    """首次同步读取整个窗口，之后只读取新文章并淘汰过期文章"""
+    workdir = tempfile.mkdtemp()
+    db = create_database()
+    try:
+        feeds = db.get_all_feeds()
+        mp_ids = [feed['id'] for feed in feeds]
+        expected = [article['id'] for article in db.iter_recent_articles_bulk(mp_ids, 3)]
+
+        with ArticleStore(os.path.join(workdir, 'articles.sqlite3')) as store:
+            result = store.sync(db, mp_ids, 3)
+            assert result['added'] == len(expected)
+            assert sorted(a['id'] for a in store.iter_articles(3)) == sorted(expected)
+
+            # 没有新文章时不读取任何数据
+            assert store.sync(db, mp_ids, 3) == {'added': 0, 'evicted': 0}
+
+            # 新发布的文章被增量读取
+            insert_article(db, 'new_article', mp_ids[0], int(time.time()))
+            assert store.sync(db, mp_ids, 3)['added'] == 1
+            assert 'new_article' in {a['id'] for a in store.iter_articles(3)}
+
+            # 滑出窗口的文章被淘汰
+            store.connection.execute("UPDATE articles SET publish_time = 0 WHERE id = 'new_article'")
+            store.connection.commit()
+            assert store.sync(db, mp_ids, 3)['evicted'] == 1
+
+            # 停用的公众号的文章被删除
+            store.sync(db, mp_ids[1:], 3)
+            assert all(a['mp_id'] != mp_ids[0] for a in store.iter_articles(3))
+    finally:
+        db.disconnect()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_full_sync_when_window_changes():
+    """时间窗口变化时自动全量同步"""
+    workdir = tempfile.mkdtemp()
+    db = create_database()
+    try:
+        mp_ids = [feed['id'] for feed in db.get_all_feeds()]
+        with ArticleStore(os.path.join(workdir, 'articles.sqlite3')) as store:
+            store.sync(db, mp_ids, 1)
+            store.sync(db, mp_ids, 7)
+            expected = [article['id'] for article in db.iter_recent_articles_bulk(mp_ids, 7)]
+            assert sorted(a['id'] for a in store.iter_articles(7)) == sorted(expected)
+    finally:
+        db.disconnect()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_periodic_full_sync():
+    """超过全量同步间隔时自动全量同步，已删除（status=0）的文章被移除"""
+    workdir = tempfile.mkdtemp()
+    db = create_database()
+    try:
+        mp_ids = [feed['id'] for feed in db.get_all_feeds()]
+        with ArticleStore(os.path.join(workdir, 'articles.sqlite3')) as store:
+            store.sync(db, mp_ids, 3, full_sync_interval=3600)
+            removed = next(store.iter_articles(3))['id']
+            db.connection.sqlite.execute("UPDATE articles SET status = 0 WHERE id = ?", (removed,))
+            db.connection.sqlite.commit()
+
+            # 间隔内只做增量同步，删除不生效
+            store.sync(db, mp_ids, 3, full_sync_interval=3600)
+            assert removed in {a['id'] for a in store.iter_articles(3)}
+
+            store.connection.execute("UPDATE meta SET value = ? WHERE key = 'full_synced_at'",
+                                     (str(time.time() - 7200),))
+            store.connection.commit()
+            store.sync(db, mp_ids, 3, full_sync_interval=3600)
+            assert removed not in {a['id'] for a in store.iter_articles(3)}
+    finally:
+        db.disconnect()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_incremental_sync()
+    test_full_sync_when_window_changes()
+    test_periodic_full_sync()
+    logger.info("本地文章存储测试通过")
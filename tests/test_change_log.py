@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+from src.core.change_log import ChangeLogBuilder, ChangeLog, BuildExpiredError
+from tests.test_file_manager import create_file_manager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def article(article_id, title='标题'):
+    return {'id': article_id, 'mp_id': 'MP_1', 'title': title, 'publish_time': 1}
+
+
+def build(file_manager, records, retention=100):
+    builder = ChangeLogBuilder(file_manager, retention)
+    for record in records:
+        builder.add(record)
+    return builder.commit(f"etag-{len(records)}")
+
+
+def ids(records):
+    return sorted(str(record['id']) for record in records)
+
+
+def test_changes_between_builds():
+    """每次构建记录新增、修改和删除，合并多个增量时只返回最终结果"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        change_log = ChangeLog(file_manager)
+        assert change_log.get_changes(0)['build'] == 0
+
+        assert build(file_manager, [article(1), article(2), article(3)]) == 1
+        # 内容未变化时不生成新的构建号
+        assert build(file_manager, [article(1), article(2), article(3)]) is None
+        # 数据版本变化但文章未变化时也记录比较过的版本，之后不再重复比较
+        builder = ChangeLogBuilder(file_manager)
+        assert not builder.is_current('etag-other')
+        for record in [article(1), article(2), article(3)]:
+            builder.add(record)
+        assert builder.commit('etag-other') is None
+        assert ChangeLogBuilder(file_manager).is_current('etag-other')
+        assert build(file_manager, [article(1, '新标题'), article(2), article(4)]) == 2
+        assert build(file_manager, [article(2), article(4, '改'), article(5)]) == 3
+
+        changes = change_log.get_changes(2)
+        assert ids(changes['added']) == ['5'] and ids(changes['updated']) == ['4']
+        assert changes['removed'] == ['1'] and changes['build'] == 3
+
+        # 构建1之后：4、5为新增（4的内容为最新），1、3删除，2未变化
+        changes = change_log.get_changes(1)
+        assert ids(changes['added']) == ['4', '5'] and changes['updated'] == []
+        assert [record['title'] for record in changes['added'] if record['id'] == 4] == ['改']
+        assert sorted(changes['removed']) == ['1', '3']
+
+        assert ids(change_log.get_changes(0)['added']) == ['2', '4', '5']
+        assert change_log.get_changes(3)['added'] == []
+        try:
+            change_log.get_changes(4)
+            assert False, "应当拒绝不存在的构建号"
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_retention():
+    """只保留最近的增量，过期的构建号需要重新下载全量数据"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        for i in range(1, 6):
+            build(file_manager, [article(i)], retention=2)
+
+        changes_dir = os.path.join(file_manager.storage_path, 'changes')
+        assert sorted(os.listdir(changes_dir)) == ['4.json', '5.json']
+        change_log = ChangeLog(file_manager)
+        assert ids(change_log.get_changes(3)['added']) == ['5']
+        try:
+            change_log.get_changes(2)
+            assert False, "应当提示增量已过期"
+        except BuildExpiredError:
+            pass
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_concurrent_builders():
+    """同时创建的构建在事务内读取快照，相同的数据只生成一个增量"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        build(file_manager, [article(1)])
+        first = ChangeLogBuilder(file_manager)
+        second = ChangeLogBuilder(file_manager)
+        assert not first.is_current('etag-2') and not second.is_current('etag-2')
+        for builder in (first, second):
+            for record in [article(1), article(2)]:
+                builder.add(record)
+            builder.commit('etag-2')
+        assert first.build == 2 and second.build is None
+        assert sorted(os.listdir(os.path.join(file_manager.storage_path, 'changes'))) == ['1.json', '2.json']
+        assert ids(ChangeLog(file_manager).get_changes(1)['added']) == ['2']
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_missing_delta_file():
+    """增量文件在读取期间被删除时提示增量已过期"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        build(file_manager, [article(1)])
+        build(file_manager, [article(1), article(2)])
+        os.remove(os.path.join(file_manager.storage_path, 'changes', '2.json'))
+        try:
+            ChangeLog(file_manager).get_changes(1)
+            assert False, "应当提示增量已过期"
+        except BuildExpiredError:
+            pass
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_changes_between_builds()
+    test_retention()
+    test_concurrent_builders()
+    test_missing_delta_file()
+    logger.info("增量测试通过")
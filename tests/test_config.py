@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+配置缓存与热加载测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+from src.utils import config as config_module
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONFIG_TEMPLATE = """
+data:
+  recent_days: {recent_days}
+file:
+  url_prefix_prod: "http://10.0.0.1:8002/files"
+  url_prefix_dev: "http://localhost:8002/files"
+"""
+
+
+def write_config(path, recent_days):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(CONFIG_TEMPLATE.format(recent_days=recent_days))
+
+
+def test_config_cache_and_reload():
+    """配置只在文件变化时重新解析，并保留URL前缀的环境选择"""
+    workdir = tempfile.mkdtemp()
+    config_path = os.path.join(workdir, 'config.yaml')
+    original_get_config_path = config_module.get_config_path
+    original_environment = os.environ.get('ENVIRONMENT')
+    config_module.get_config_path = lambda: config_path
+    config_module.invalidate_config_cache()
+    try:
+        os.environ['ENVIRONMENT'] = 'development'
+        write_config(config_path, 3)
+        first = config_module.load_config()
+        assert first['data']['recent_days'] == 3
+        assert first['file']['url_prefix'] == "http://localhost:8002/files"
+        assert config_module.load_config() is first
+
+        # 文件被替换后重新加载
+        new_path = config_path + '.new'
+        write_config(new_path, 7)
+        os.replace(new_path, config_path)
+        second = config_module.load_config()
+        assert second is not first and second['data']['recent_days'] == 7
+
+        # 环境变化后重新选择URL前缀
+        os.environ['ENVIRONMENT'] = 'production'
+        assert config_module.load_config()['file']['url_prefix'] == "http://10.0.0.1:8002/files"
+
+        # 新配置解析失败时继续使用旧配置
+        current = config_module.load_config()
+        with open(config_path, 'a', encoding='utf-8') as file:
+            file.write("data: [unclosed\n")
+        assert config_module.load_config() is current
+
+        # 手动失效后重新解析
+        write_config(config_path, 5)
+        config_module.invalidate_config_cache()
+        assert config_module.load_config()['data']['recent_days'] == 5
+    finally:
+        config_module.get_config_path = original_get_config_path
+        config_module.invalidate_config_cache()
+        if original_environment is None:
+            os.environ.pop('ENVIRONMENT', None)
+        else:
+            os.environ['ENVIRONMENT'] = original_environment
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_config_cache_and_reload()
+    logger.info("配置缓存测试通过")
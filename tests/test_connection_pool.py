@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+连接池测试脚本（使用模拟连接，无需数据库）
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import threading
+import time
+import logging
+from src.core import database
+from src.core.database import ConnectionPool, PoolTimeoutError, close_all_pools, get_connection_pool, get_pool_stats
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FakeConnection:
+    """模拟数据库连接"""
+
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError("连接已断开")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_connection_reuse():
+    """归还的连接应被复用，并在归还时结束事务"""
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=2)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    assert second is first
+    assert first.rollbacks == 1
+    pool.release(second)
+    stats = pool.stats()
+    assert stats['total_created'] == 1
+    assert stats['total_borrows'] == 2
+    assert stats['idle'] == 1 and stats['borrowed'] == 0
+
+
+def test_borrow_timeout():
+    """连接耗尽时等待超时"""
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1, borrow_timeout=0.05)
+    held = pool.acquire()
+    try:
+        pool.acquire()
+        assert False, "应当抛出 PoolTimeoutError"
+    except PoolTimeoutError:
+        pass
+    assert pool.stats()['timeouts'] == 1
+    pool.release(held)
+
+
+def test_waiter_gets_released_connection():
+    """等待中的线程能拿到其他线程归还的连接"""
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1, borrow_timeout=2)
+    held = pool.acquire()
+    result = {}
+
+    def borrow():
+        result['connection'] = pool.acquire()
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    time.sleep(0.05)
+    pool.release(held)
+    thread.join(1)
+    assert result['connection'] is held
+    assert pool.stats()['wait_time_max'] > 0
+
+
+def test_health_check_and_recycling():
+    """不健康和超过生命周期的连接被丢弃重建"""
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=2, health_check_interval=0)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.healthy = False
+    replacement = pool.acquire()
+    assert replacement is not connection and connection.closed
+    assert pool.stats()['health_check_failures'] == 1
+    pool.release(replacement)
+
+    pool.max_lifetime = 0.01
+    time.sleep(0.02)
+    recycled = pool.acquire()
+    assert recycled is not replacement and replacement.closed
+    pool.release(recycled)
+
+
+def test_idle_eviction_keeps_min_size():
+    """空闲连接回收时保留最小连接数"""
+    pool = ConnectionPool(FakeConnection, min_size=1, max_size=3, idle_timeout=0.01)
+    connections = [pool.acquire() for _ in range(3)]
+    for connection in connections:
+        pool.release(connection)
+    time.sleep(0.02)
+    pool.release(pool.acquire())
+    assert pool.stats()['size'] == 1
+
+
+def test_pool_stats_hide_address():
+    """连接池统计不暴露数据库地址"""
+    create_connection = database._create_connection
+    database._create_connection = lambda db_config: FakeConnection()
+    try:
+        db_config = {'host': '10.0.0.8', 'port': 3306, 'user': 'rss', 'database': 'we_mp_rss'}
+        get_connection_pool(db_config)
+        stats = get_pool_stats()
+        assert list(stats) == ['pool-1']
+        assert '10.0.0.8' not in str(stats)
+    finally:
+        close_all_pools()
+        database._create_connection = create_connection
+
+
+if __name__ == '__main__':
+    for test in (test_connection_reuse, test_borrow_timeout, test_waiter_gets_released_connection,
+                 test_health_check_and_recycling, test_idle_eviction_keeps_min_size,
+                 test_pool_stats_hide_address):
+        test()
+        logger.info(f"{test.__name__} 通过")
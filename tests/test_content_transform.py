@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+content转换测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import logging
+from src.core.content_transform import ContentTransformer, clean_html, html_to_text, make_excerpt
+from src.core.data_processor import DataProcessor
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_HTML = (
+    '<div id="js_content"><section><mp-common-profile data-nickname="老委鬼"><span>名片</span></mp-common-profile></section>'
+    '<section style="color: red; font-size: 17px;"><span leaf="">第一段&amp;内容</span></section>'
+    '<!-- 注释 --><p>第二段<br/>换行 <a href="https://a.com/?a=1&amp;b=2" style="x">链接</a></p>'
+    '<img data-src="https://img/1.png" style="width: 100%" /><script>var a = "<p>";</script></div>'
+)
+
+
+def test_clean_html():
+    """去掉内联样式、微信组件、脚本和注释，其余标签和实体保持原样"""
+    assert clean_html(SAMPLE_HTML) == (
+        '<div id="js_content"><section></section>'
+        '<section><span leaf="">第一段&amp;内容</span></section>'
+        '<p>第二段<br/>换行 <a href="https://a.com/?a=1&amp;b=2">链接</a></p>'
+        '<img data-src="https://img/1.png" /></div>'
+    )
+    # 只去掉组件时保留样式
+    assert 'style="color: red; font-size: 17px;"' in clean_html(SAMPLE_HTML, strip_styles=False)
+    assert 'mp-common-profile' in clean_html(SAMPLE_HTML, remove_widgets=False)
+    # 嵌套的同名组件整体移除
+    assert clean_html('<mp-style-type><mp-style-type>x</mp-style-type>y</mp-style-type>z') == 'z'
+
+
+def test_text_and_excerpt():
+    """纯文本按块级标签换行，摘要截断后以省略号结尾"""
+    assert html_to_text(SAMPLE_HTML) == '第一段&内容\n第二段\n换行 链接'
+    assert make_excerpt('一二三四五', 3) == '一二三…'
+    assert make_excerpt('一二三', 3) == '一二三'
+
+    transformer = ContentTransformer('excerpt', excerpt_length=4)
+    assert transformer.transform(SAMPLE_HTML) == '第一段&…'
+    try:
+        ContentTransformer('markdown')
+        assert False, "应当拒绝未知的转换模式"
+    except ValueError:
+        pass
+
+
+def test_data_processor_applies_transform():
+    """DataProcessor 按配置转换content，未配置时原样输出"""
+    feeds = [{'id': 'MP_1', 'mp_name': '公众号', 'mp_intro': ''}]
+    articles = [{'id': 'a1', 'mp_id': 'MP_1', 'title': '标题', 'content': SAMPLE_HTML, 'publish_time': 1}]
+
+    assert DataProcessor(3).process_data(feeds, articles)[0]['content'] == SAMPLE_HTML
+    assert DataProcessor(3, {'mode': 'none'}).process_data(feeds, articles)[0]['content'] == SAMPLE_HTML
+    record = DataProcessor(3, {'mode': 'text'}).process_data(feeds, articles)[0]
+    assert record['content'] == html_to_text(SAMPLE_HTML)
+
+
+def test_parallel_process_preserves_order():
+    """并行处理与串行结果一致且顺序不变，文章数不足时串行处理"""
+    feeds = [{'id': 'MP_1', 'mp_name': '公众号', 'mp_intro': ''}]
+    articles = [{'id': str(i), 'mp_id': 'MP_1' if i % 5 else 'MP_UNKNOWN', 'title': f'标题{i}',
+                 'content': f'<p style="x">第{i}段</p>', 'publish_time': i} for i in range(50)]
+    expected = DataProcessor(3, {'mode': 'clean'}).process_data(feeds, articles)
+
+    parallel = {'enabled': True, 'workers': 2, 'chunk_size': 3, 'min_articles': 10}
+    processor = DataProcessor(3, {'mode': 'clean'}, parallel)
+    assert processor.process_data(feeds, articles) == expected
+    assert list(processor.iter_process(feeds, iter(articles))) == expected
+    assert [record['content'] for record in expected[:2]] == ['<p>第1段</p>', '<p>第2段</p>']
+
+    # 提前结束迭代时取消未开始的批次并关闭进程池
+    records = processor.iter_process(feeds, iter(articles))
+    assert [next(records) for _ in range(20)] == expected[:20]
+    records.close()
+
+    # 文章数少于min_articles时不创建进程池
+    small = DataProcessor(3, {'mode': 'clean'}, dict(parallel, min_articles=1000))
+    assert small.process_data(feeds, articles) == expected
+
+
+if __name__ == '__main__':
+    test_clean_html()
+    test_text_and_excerpt()
+    test_data_processor_applies_transform()
+    test_parallel_process_preserves_order()
+    logger.info("content转换测试通过")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订阅生成测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+import xml.etree.ElementTree as ET
+import src.core.pipeline as pipeline_module
+from src.core.feeds import FeedWriter, get_feed_filename, ATOM_NS, CONTENT_NS
+from tests.test_file_manager import create_file_manager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECORDS = [
+    {'id': 1, 'mp_id': 'MP_1', 'mp_name': '公众号一', 'title': '标题 <一> & 更多', 'url': 'https://example.com/1?a=1&b=2',
+     'description': '摘要\x08一', 'content': '<p>正文<b>一</b></p>', 'publish_time': 1700000000},
+    {'id': 2, 'mp_id': 'MP_1', 'mp_name': '公众号一', 'title': '标题二', 'url': 'https://example.com/2',
+     'description': '', 'content': '', 'publish_time': 1700001000},
+    {'id': 3, 'mp_id': 'MP_2', 'mp_name': '公众号二', 'title': '标题三', 'url': 'https://example.com/3',
+     'description': '摘要三', 'content': '<p>正文三</p>', 'publish_time': 1699990000},
+]
+
+
+def publish(file_manager, records, etag='etag', **feeds_config):
+    writer = FeedWriter(file_manager, dict({'formats': ['atom', 'rss']}, **feeds_config))
+    for record in records:
+        writer.add(record)
+    writer.commit(etag)
+    return writer
+
+
+def parse(file_manager, filename):
+    return ET.parse(os.path.join(file_manager.storage_path, filename)).getroot()
+
+
+def test_atom_and_rss():
+    """生成合法的Atom和RSS 2.0文件，特殊字符正确转义，非法控制字符被去掉"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        publish(file_manager, RECORDS, title='合并订阅')
+
+        atom = parse(file_manager, get_feed_filename('atom'))
+        ns = {'a': ATOM_NS}
+        assert atom.tag == f"{{{ATOM_NS}}}feed"
+        assert atom.find('a:title', ns).text == '合并订阅'
+        assert atom.find('a:updated', ns).text == '2023-11-14T22:30:00Z'
+        entries = atom.findall('a:entry', ns)
+        assert [entry.find('a:title', ns).text for entry in entries] == ['标题 <一> & 更多', '标题二', '标题三']
+        assert entries[0].find('a:link', ns).get('href') == 'https://example.com/1?a=1&b=2'
+        assert entries[0].find('a:summary', ns).text == '摘要一'
+        assert entries[0].find('a:content', ns).text == '<p>正文<b>一</b></p>'
+        assert entries[0].find('a:author/a:name', ns).text == '公众号一'
+        # 空的摘要和正文不输出
+        assert entries[1].find('a:summary', ns) is None and entries[1].find('a:content', ns) is None
+
+        rss = parse(file_manager, get_feed_filename('rss'))
+        channel = rss.find('channel')
+        assert rss.get('version') == '2.0'
+        assert channel.find('lastBuildDate').text == 'Tue, 14 Nov 2023 22:30:00 GMT'
+        items = channel.findall('item')
+        assert len(items) == 3
+        assert items[0].find('guid').text == 'urn:wx-mp-rss-merge:article:1'
+        assert items[2].find(f"{{{CONTENT_NS}}}encoded").text == '<p>正文三</p>'
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_per_mp_and_options():
+    """按公众号生成订阅，不包含正文时不输出content，停用的公众号和格式的文件被删除"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        publish(file_manager, RECORDS, per_mp=True, include_content=False)
+        feed_dir = os.path.join(file_manager.storage_path, 'feeds')
+        assert sorted(os.listdir(feed_dir)) == ['all.atom.xml', 'all.rss.xml', 'mp_MP_1.atom.xml', 'mp_MP_1.rss.xml',
+                                                'mp_MP_2.atom.xml', 'mp_MP_2.rss.xml']
+        atom = parse(file_manager, get_feed_filename('atom', 'MP_1'))
+        ns = {'a': ATOM_NS}
+        assert len(atom.findall('a:entry', ns)) == 2
+        assert atom.find('a:entry/a:content', ns) is None
+        assert atom.find('a:title', ns).text.startswith('公众号一')
+
+        publish(file_manager, RECORDS[:2], etag='etag-2', formats=['atom'], per_mp=True)
+        assert sorted(os.listdir(feed_dir)) == ['all.atom.xml', 'mp_MP_1.atom.xml']
+
+        # 记录未按公众号分组时报错
+        writer = FeedWriter(file_manager, {'per_mp': True})
+        try:
+            for record in [RECORDS[0], RECORDS[2], RECORDS[1]]:
+                writer.add(record)
+            assert False, "应当提示记录未按公众号分组"
+        except ValueError:
+            writer.abort()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_unchanged_feed_is_not_replaced():
+    """数据未变化时不替换订阅文件，is_current 对应上次生成时的数据版本和配置"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        path = os.path.join(file_manager.storage_path, get_feed_filename('atom'))
+        writer = publish(file_manager, RECORDS)
+        assert writer.is_current('etag')
+        assert not writer.is_current('other')
+        assert not FeedWriter(file_manager, {'formats': ['atom', 'rss'], 'title': '新标题'}).is_current('etag')
+
+        inode = os.stat(path).st_ino
+        publish(file_manager, RECORDS, etag='etag-2')
+        assert os.stat(path).st_ino == inode
+
+        publish(file_manager, RECORDS[:2], etag='etag-3')
+        assert os.stat(path).st_ino != inode
+
+        # 放弃生成时已发布的文件不变
+        with open(path, 'rb') as file:
+            published = file.read()
+        writer = FeedWriter(file_manager, {'formats': ['atom']})
+        writer.add(RECORDS[2])
+        writer.abort()
+        with open(path, 'rb') as file:
+            assert file.read() == published
+        assert [name for name in os.listdir(os.path.dirname(path)) if not name.endswith('.xml')] == []
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_pipeline_generates_feeds_only_when_needed():
+    """发布流程中数据未变化时不生成订阅，数据或订阅配置变化时从已发布文件回放记录生成"""
+    workdir = tempfile.mkdtemp()
+    original = pipeline_module.FeedWriter
+    added = []
+
+    class CountingFeedWriter(FeedWriter):
+        def add(self, record):
+            added.append(record['id'])
+            super().add(record)
+
+    try:
+        pipeline_module.FeedWriter = CountingFeedWriter
+        file_manager = create_file_manager(workdir)
+        config = {'feeds': {'enabled': True, 'formats': ['atom']}}
+        pipeline_module._publish(config, file_manager, RECORDS)
+        assert added == [1, 2, 3]
+        ns = {'a': ATOM_NS}
+        entries = parse(file_manager, get_feed_filename('atom')).findall('a:entry', ns)
+        assert [entry.find('a:title', ns).text for entry in entries] == [record['title'] for record in RECORDS]
+
+        added.clear()
+        pipeline_module._publish(config, file_manager, RECORDS)
+        assert added == []
+        assert [name for name in os.listdir(os.path.join(file_manager.storage_path, 'feeds'))] == ['all.atom.xml']
+
+        config['feeds']['title'] = '新标题'
+        pipeline_module._publish(config, file_manager, RECORDS)
+        assert added == [1, 2, 3]
+    finally:
+        pipeline_module.FeedWriter = original
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_atom_and_rss()
+    test_per_mp_and_options()
+    test_unchanged_feed_is_not_replaced()
+    test_pipeline_generates_feeds_only_when_needed()
+    logger.info("订阅生成测试通过")
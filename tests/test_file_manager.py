@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件管理测试脚本（使用临时目录，无需数据库）
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import logging
+import yaml
+import msgpack
+from src.utils.file_manager import FileManager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_RECORDS = [
+    {
+        'id': '2650486735_1',
+        'mp_id': 'MP_WXS_2391412265',
+        'mp_name': '老委鬼',
+        'mp_intro': '体育情报研究',
+        'title': '芬超赫尔辛基德比前瞻',
+        'url': 'https://mp.weixin.qq.com/s/Oz1HpMKKgOZB7Vk3Yr5K6g',
+        'content': '<section style="color: red">\n正文\n</section>',
+        'description': '摘要',
+        'publish_time': 1753600000
+    },
+    {
+        'id': '2650486735_2',
+        'mp_id': 'MP_WXS_2391412265',
+        'mp_name': '老委鬼',
+        'mp_intro': '体育情报研究',
+        'title': '第二篇',
+        'url': 'https://mp.weixin.qq.com/s/2',
+        'content': '',
+        'description': '',
+        'publish_time': 1753500000
+    }
+]
+
+
+def create_file_manager(storage_path, **file_config):
+    """使用临时配置创建文件管理器"""
+    config_path = os.path.join(storage_path, 'config.yaml')
+    with open(config_path, 'w', encoding='utf-8') as file:
+        yaml.safe_dump({
+            'file': dict({
+                'storage_path': os.path.join(storage_path, 'storage'),
+                'url_prefix': 'http://localhost:8002/files'
+            }, **file_config)
+        }, file)
+    return FileManager(config_path)
+
+
+def test_save_json_stream_matches_json_dumps():
+    """流式写入的文件内容与 json.dumps 一次性序列化一致"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        for records in (SAMPLE_RECORDS, SAMPLE_RECORDS[:1], []):
+            filename, count = file_manager.save_json_stream(iter(records))
+            with open(os.path.join(file_manager.storage_path, filename), encoding='utf-8') as file:
+                actual = file.read()
+            assert count == len(records)
+            assert actual == json.dumps(records, ensure_ascii=False, indent=2)
+
+            filename, _ = file_manager.save_json_stream(iter(records), compact=True)
+            with open(os.path.join(file_manager.storage_path, filename), encoding='utf-8') as file:
+                actual = file.read()
+            assert actual == json.dumps(records, ensure_ascii=False, separators=(',', ':'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_failed_write_keeps_published_file():
+    """写入中途失败时已发布的文件保持不变，且不残留临时文件"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir)
+        filename = file_manager.save_json_file(SAMPLE_RECORDS)
+        file_path = os.path.join(file_manager.storage_path, filename)
+        with open(file_path, encoding='utf-8') as file:
+            published = file.read()
+
+        def broken_records():
+            yield SAMPLE_RECORDS[0]
+            raise RuntimeError("数据库连接中断")
+
+        try:
+            file_manager.save_json_stream(broken_records())
+            assert False, "应当抛出异常"
+        except RuntimeError:
+            pass
+
+        with open(file_path, encoding='utf-8') as file:
+            assert file.read() == published
+        assert [name for name in os.listdir(file_manager.storage_path) if name != '.state'] == [filename]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_precompressed_variants():
+    """发布时生成内容一致的预压缩文件，关闭预压缩后删除旧的压缩文件"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir, precompress=['gzip', 'br'])
+        filename = file_manager.save_json_file(SAMPLE_RECORDS)
+        file_path = os.path.join(file_manager.storage_path, filename)
+        with open(file_path, 'rb') as file:
+            raw = file.read()
+        with gzip.open(file_path + '.gz', 'rb') as file:
+            assert file.read() == raw
+        if 'br' in file_manager.precompress:
+            import brotli
+            with open(file_path + '.br', 'rb') as file:
+                assert brotli.decompress(file.read()) == raw
+        assert file_manager.get_variant_filename(filename, 'gzip') == filename + '.gz'
+
+        file_manager.precompress = []
+        file_manager.save_json_file(SAMPLE_RECORDS)
+        assert file_manager.get_variant_filename(filename, 'gzip') is None
+        assert [name for name in os.listdir(file_manager.storage_path) if name != '.state'] == [filename]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_unchanged_content_is_not_republished():
+    """内容与上次发布相同时不替换文件"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir, precompress=['gzip'])
+        first = file_manager.publish_json_stream(iter(SAMPLE_RECORDS))
+        assert first['changed']
+        file_path = os.path.join(file_manager.storage_path, first['filename'])
+        stat = os.stat(file_path)
+
+        second = file_manager.publish_json_stream(iter(SAMPLE_RECORDS))
+        assert not second['changed'] and second['etag'] == first['etag']
+        assert second['record_count'] == len(SAMPLE_RECORDS)
+        assert os.stat(file_path).st_ino == stat.st_ino
+        assert os.stat(file_path).st_mtime_ns == stat.st_mtime_ns
+        assert not [name for name in os.listdir(file_manager.storage_path) if name.endswith('.tmp')]
+
+        # 预压缩配置变化时即使内容相同也重新发布
+        file_manager.precompress = []
+        assert file_manager.publish_json_stream(iter(SAMPLE_RECORDS))['changed']
+
+        third = file_manager.publish_json_stream(iter(SAMPLE_RECORDS[:1]))
+        assert third['changed'] and third['etag'] != first['etag']
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_split_output():
+    """拆分输出：索引文件不含content，content按内容哈希保存一次，不再引用的content文件超过保留时间后删除"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir, precompress=['gzip'], split_output={'enabled': True})
+        records = SAMPLE_RECORDS + [dict(SAMPLE_RECORDS[0], id='copy')]
+        writer = file_manager.open_split_output()
+        for record in records:
+            writer.add(record)
+        writer.commit('etag')
+
+        with open(os.path.join(file_manager.storage_path, 'index.json'), encoding='utf-8') as file:
+            index = json.load(file)
+        content_hash = hashlib.sha256(SAMPLE_RECORDS[0]['content'].encode('utf-8')).hexdigest()
+        assert [item['content_hash'] for item in index] == [content_hash, None, content_hash]
+        assert list(index[0]) == [key if key != 'content' else 'content_hash' for key in SAMPLE_RECORDS[0]]
+        assert writer.blobs_written == 1
+
+        blob_path = os.path.join(file_manager.storage_path, file_manager.get_content_filename(content_hash))
+        with open(blob_path, encoding='utf-8') as file:
+            assert file.read() == SAMPLE_RECORDS[0]['content']
+        with gzip.open(blob_path + '.gz', 'rt', encoding='utf-8') as file:
+            assert file.read() == SAMPLE_RECORDS[0]['content']
+
+        # 不再引用的content文件在保留时间内保留，超过后删除
+        writer = file_manager.open_split_output()
+        writer.add(SAMPLE_RECORDS[1])
+        writer.commit('etag2')
+        assert os.path.exists(blob_path)
+        file_manager.blob_retention = 0
+        os.utime(blob_path, (0, 0))
+        os.utime(blob_path + '.gz', (0, 0))
+        file_manager.cleanup_content_blobs(set())
+        assert os.listdir(os.path.dirname(blob_path)) == []
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_format_writers():
+    """ndjson和msgpack格式逐条写入，内容与记录一致，放弃时不发布"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir, formats=['ndjson', 'msgpack', 'xml'])
+        assert file_manager.formats == ['ndjson', 'msgpack']
+        for output_format in file_manager.formats:
+            writer = file_manager.open_format_writer(output_format)
+            for record in SAMPLE_RECORDS:
+                writer.add(record)
+            writer.commit('etag')
+
+        with open(os.path.join(file_manager.storage_path, 'result.ndjson'), encoding='utf-8') as file:
+            assert [json.loads(line) for line in file] == SAMPLE_RECORDS
+        with open(os.path.join(file_manager.storage_path, 'result.msgpack'), 'rb') as file:
+            assert list(msgpack.Unpacker(file)) == SAMPLE_RECORDS
+        assert file_manager.get_file_meta('result.ndjson')['etag']
+
+        writer = file_manager.open_format_writer('ndjson')
+        writer.add(SAMPLE_RECORDS[0])
+        writer.abort()
+        with open(os.path.join(file_manager.storage_path, 'result.ndjson'), encoding='utf-8') as file:
+            assert len(file.readlines()) == len(SAMPLE_RECORDS)
+        assert not [name for name in os.listdir(file_manager.storage_path) if name.endswith('.tmp')]
+
+        # 停用的格式在清理时删除
+        file_manager.formats = ['ndjson']
+        file_manager.cleanup_old_files()
+        assert not os.path.exists(os.path.join(file_manager.storage_path, 'result.msgpack'))
+        assert os.path.exists(os.path.join(file_manager.storage_path, 'result.ndjson'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def write_shards(file_manager, records):
+    writer = file_manager.open_shard_writer()
+    for record in records:
+        writer.add(record)
+    writer.commit('etag')
+    return writer
+
+
+def test_shard_writer():
+    """按公众号拆分输出，只重写内容变化的文件，删除已停用公众号的文件"""
+    workdir = tempfile.mkdtemp()
+    try:
+        file_manager = create_file_manager(workdir, precompress=['gzip'])
+        other = [dict(record, mp_id='MP/2', id=f"other_{i}") for i, record in enumerate(SAMPLE_RECORDS)]
+        writer = write_shards(file_manager, SAMPLE_RECORDS + other)
+        assert writer.rewritten == 2
+
+        manifest = file_manager.get_shard_manifest()['shards']
+        assert list(manifest) == ['MP_WXS_2391412265', 'MP/2']
+        assert manifest['MP/2']['file'] == 'shards/MP_2.json'
+        assert manifest['MP/2']['count'] == len(other)
+        shard_path = os.path.join(file_manager.storage_path, manifest['MP/2']['file'])
+        with open(shard_path, 'rb') as file:
+            data = file.read()
+        assert json.loads(data) == other
+        assert manifest['MP/2']['hash'] == hashlib.sha256(data).hexdigest()
+        assert manifest['MP/2']['size'] == len(data)
+        assert os.path.exists(shard_path + '.gz')
+
+        # 内容未变化时不重写
+        stat = os.stat(shard_path)
+        changed = [dict(record, title='新标题') for record in SAMPLE_RECORDS]
+        writer = write_shards(file_manager, changed + other)
+        assert writer.rewritten == 1
+        assert os.stat(shard_path).st_ino == stat.st_ino
+
+        # 公众号停用后删除其文件
+        write_shards(file_manager, other)
+        assert list(file_manager.get_shard_manifest()['shards']) == ['MP/2']
+        assert not os.path.exists(os.path.join(file_manager.storage_path, 'shards', 'MP_WXS_2391412265.json'))
+
+        # 写入中的公众号数量有上限
+        file_manager.shard_workers = 1
+        writer = file_manager.open_shard_writer()
+        for i in range(20):
+            writer.add(dict(SAMPLE_RECORDS[0], mp_id=f'MP_{i}'))
+            assert len(writer._futures) <= 2
+        writer.commit('etag')
+        assert writer.rewritten == 20
+
+        writer = file_manager.open_shard_writer()
+        try:
+            for record in SAMPLE_RECORDS[:1] + other + SAMPLE_RECORDS[1:]:
+                writer.add(record)
+            assert False, "应当拒绝不连续的公众号记录"
+        except ValueError:
+            writer.abort()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_save_json_stream_matches_json_dumps()
+    test_failed_write_keeps_published_file()
+    test_precompressed_variants()
+    test_unchanged_content_is_not_republished()
+    test_split_output()
+    test_format_writers()
+    test_shard_writer()
+    logger.info("文件管理测试通过")
@@ -34,13 +34,10 @@ def test_full_workflow():
             feeds = db.get_all_feeds()
             logger.info(f"获取到 {len(feeds)} 个公众号")
             
-            all_articles = []
-            # 循环获取每个公众号的文章
-            for feed in feeds:
-                mp_id = feed['id']
-                articles = db.get_recent_articles(mp_id, 3)
-                logger.info(f"公众号 {feed.get('mp_name', mp_id)} 获取到 {len(articles)} 篇文章")
-                all_articles.extend(articles)
+            # 一次性批量获取所有公众号的文章
+            mp_ids = [feed['id'] for feed in feeds]
+            all_articles = db.get_recent_articles_bulk(mp_ids, 3)
+            logger.info(f"共获取到 {len(all_articles)} 篇文章")
             
             # 3. 处理数据
             processed_data = data_processor.process_data(feeds, all_articles)
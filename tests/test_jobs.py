@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台任务与请求合并测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import threading
+import time
+import logging
+from src.core.jobs import JobManager, SUCCEEDED, FAILED
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_concurrent_submits_share_one_run():
+    """同时提交的相同任务只执行一次，所有等待方得到相同结果"""
+    manager = JobManager(max_workers=4)
+    calls = []
+    release = threading.Event()
+
+    def build():
+        calls.append(1)
+        release.wait(1)
+        return {'record_count': 42}
+
+    jobs = [manager.submit('generate', build) for _ in range(5)]
+    release.set()
+    results = [job.wait(2) for job in jobs]
+    assert len(calls) == 1
+    assert len({job.id for job in jobs}) == 1
+    assert all(result == {'record_count': 42} for result in results)
+    assert manager.get(jobs[0].id).status == SUCCEEDED
+
+    # 完成后再次提交会重新执行
+    manager.submit('generate', build).wait(2)
+    assert len(calls) == 2
+    manager.shutdown()
+
+
+def test_failed_job_reraises_and_reports_error():
+    """任务失败时等待方收到异常，状态查询返回错误信息"""
+    manager = JobManager(max_workers=1)
+
+    def broken():
+        raise ValueError("数据库不可用")
+
+    job = manager.submit('generate', broken)
+    try:
+        job.wait(2)
+        assert False, "应当抛出异常"
+    except ValueError:
+        pass
+    assert job.status == FAILED
+    assert job.to_dict()['error'] == "数据库不可用"
+    manager.shutdown()
+
+
+def test_finished_jobs_are_trimmed():
+    """已完成任务的保留数量有上限"""
+    manager = JobManager(max_workers=1, retention=2)
+    jobs = []
+    for i in range(5):
+        job = manager.submit(f'job-{i}', time.sleep, 0)
+        job.wait(2)
+        jobs.append(job)
+    manager.submit('last', time.sleep, 0).wait(2)
+    assert manager.get(jobs[0].id) is None
+    assert manager.get(jobs[-1].id) is not None
+    manager.shutdown()
+
+
+def test_queued_job_runs_after_running_job():
+    """queue 提交的任务不合并到进行中的任务，排在其后执行；之后的普通提交合并到排队的任务"""
+    manager = JobManager(max_workers=2)
+    order = []
+    release = threading.Event()
+
+    def build(full=False):
+        order.append(('start', full))
+        if not full:
+            release.wait(2)
+        order.append(('end', full))
+        return {'full': full}
+
+    running = manager.submit('generate', build)
+    queued = manager.queue('generate', build, full=True)
+    assert queued is not running
+    assert manager.submit('generate', build) is queued
+    time.sleep(0.1)
+    release.set()
+    assert running.wait(2) == {'full': False}
+    assert queued.wait(2) == {'full': True}
+    assert order == [('start', False), ('end', False), ('start', True), ('end', True)]
+    manager.shutdown()
+
+
+def test_jobs_shared_between_processes():
+    """共享状态库的任务管理器（模拟多个工作进程）之间查询任务、依次执行并合并同key任务"""
+    workdir = tempfile.mkdtemp()
+    managers = [JobManager(max_workers=2, state_path=os.path.join(workdir, 'jobs.sqlite3')) for _ in range(3)]
+    try:
+        calls = []
+        running = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def build():
+            running.append(1)
+            assert len(running) == 1, "同key任务不应在多个进程中同时执行"
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            running.pop()
+            return {'record_count': len(calls)}
+
+        first = managers[0].submit('generate', build)
+        assert started.wait(2)
+        assert managers[1].is_running('generate')
+        # 其他进程可以查询任务状态
+        assert managers[1].get(first.id).to_dict()['status'] == 'running'
+
+        # 第一个任务开始之后提交的两个任务依次等待，只再执行一次
+        second = managers[1].submit('generate', build)
+        third = managers[2].submit('generate', build)
+        time.sleep(0.2)
+        release.set()
+        assert first.wait(2) == {'record_count': 1}
+        assert second.wait(2) == third.wait(2) == {'record_count': 2}
+        assert len(calls) == 2
+        assert not managers[2].is_running('generate')
+        assert managers[2].get(first.id).to_dict()['result'] == {'record_count': 1}
+        assert managers[0].get('missing') is None
+    finally:
+        for manager in managers:
+            manager.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_concurrent_submits_share_one_run()
+    test_failed_job_reraises_and_reports_error()
+    test_finished_jobs_are_trimmed()
+    test_queued_job_runs_after_running_job()
+    test_jobs_shared_between_processes()
+    logger.info("后台任务测试通过")
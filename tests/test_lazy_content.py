@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列裁剪和两阶段读取测试脚本，使用SQLite替身数据库，无需MySQL
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+from benchmarks.standin_db import StandInConnection, populate
+from src.core.data_processor import DataProcessor
+from src.core.database import DatabaseManager, FEED_COLUMNS, ARTICLE_COLUMNS, ARTICLE_METADATA_COLUMNS
+from src.core.transform_cache import TransformCache, content_hash
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_database(feed_count=3, articles_per_feed=20):
+    """创建填充了测试数据的替身数据库"""
+    db = DatabaseManager()
+    db.connection = StandInConnection()
+    # 文章分布在6天内，按7天窗口比较时不会有文章在两次读取之间滑出窗口
+    populate(db.connection, feed_count, articles_per_feed, content_size=200, days=6)
+    return db
+
+
+def test_column_projection():
+    """只读取需要的列，content摘要在数据库端计算且与本地哈希一致"""
+    db = create_database()
+    try:
+        feeds = db.get_all_feeds()
+        assert set(feeds[0]) == set(FEED_COLUMNS)
+        mp_ids = [feed['id'] for feed in feeds]
+
+        articles = db.get_recent_articles_bulk(mp_ids, 7)
+        assert set(articles[0]) == set(ARTICLE_COLUMNS)
+        assert set(next(db.iter_recent_articles_bulk(mp_ids, 7, include_content=False))) == \
+            set(ARTICLE_METADATA_COLUMNS)
+
+        metadata = db.get_recent_articles_bulk(mp_ids, 7, include_content=False, content_digest=True)
+        assert [article['id'] for article in metadata] == [article['id'] for article in articles]
+        assert 'content' not in metadata[0]
+        assert [article['content_md5'] for article in metadata] == \
+            [content_hash(article['content']) for article in articles]
+    finally:
+        db.disconnect()
+
+
+def test_get_article_contents():
+    """按文章ID分批读取content"""
+    db = create_database()
+    try:
+        articles = db.get_recent_articles_bulk([feed['id'] for feed in db.get_all_feeds()], 7)
+        ids = [article['id'] for article in articles]
+        db.connection.query_count = 0
+        contents = db.get_article_contents(ids + ids[:1] + ['missing'], chunk_size=25)
+        assert db.connection.query_count == (len(ids) + 1 + 24) // 25
+        assert contents == {article['id']: article['content'] for article in articles}
+        assert db.get_article_contents([]) == {}
+    finally:
+        db.disconnect()
+
+
+def test_lazy_content_loads_only_cache_misses():
+    """两阶段读取的结果与一次性读取一致，转换缓存命中的文章不加载content"""
+    workdir = tempfile.mkdtemp()
+    db = create_database()
+    try:
+        feeds = db.get_all_feeds()
+        mp_ids = [feed['id'] for feed in feeds]
+        transform = {'mode': 'clean'}
+        expected = DataProcessor(3, transform).process_data(feeds, db.get_recent_articles_bulk(mp_ids, 7))
+
+        loaded = []
+        batches = []
+
+        def load_contents(article_ids):
+            loaded.extend(article_ids)
+            batches.append(len(article_ids))
+            return db.get_article_contents(article_ids)
+
+        def process():
+            metadata = db.get_recent_articles_bulk(mp_ids, 7, include_content=False, content_digest=True)
+            with TransformCache(os.path.join(workdir, 'transform_cache.sqlite3')) as cache:
+                processor = DataProcessor(3, transform, {'chunk_size': 8}, transform_cache=cache)
+                return processor.process_data(feeds, metadata, load_contents)
+
+        assert process() == expected
+        assert len(loaded) == len(expected)
+        # 缓存未命中时按500篇一批加载，而不是按 chunk_size 逐批查询
+        assert len(expected) > 8 and batches == [len(expected)]
+
+        # 修改一篇文章后只加载这一篇的content
+        loaded.clear()
+        db.connection.sqlite.execute("UPDATE articles SET content = '<p style=\"x\">改</p>' WHERE id = ?",
+                                     (expected[0]['id'],))
+        records = process()
+        assert loaded == [expected[0]['id']]
+        assert records[0]['content'] == '<p>改</p>' and records[1:] == expected[1:]
+
+        # 没有缓存时按批加载，不转换时content原样输出
+        loaded.clear()
+        metadata = db.get_recent_articles_bulk(mp_ids, 7, include_content=False)
+        raw = DataProcessor(3, parallel={'chunk_size': 8}).process_data(feeds, metadata, load_contents)
+        current = db.get_recent_articles_bulk(mp_ids, 7)
+        assert [record['content'] for record in raw] == [article['content'] for article in current]
+        assert len(loaded) == len(raw)
+    finally:
+        db.disconnect()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_exclude_content():
+    """不输出content时只读取元数据，content为空字符串"""
+    db = create_database()
+    try:
+        feeds = db.get_all_feeds()
+        metadata = db.get_recent_articles_bulk([feed['id'] for feed in feeds], 7, include_content=False)
+        records = DataProcessor(3, {'mode': 'clean'}, include_content=False).process_data(feeds, metadata)
+        assert records and all(record['content'] == '' for record in records)
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    test_column_projection()
+    test_get_article_contents()
+    test_lazy_content_loads_only_cache_misses()
+    test_exclude_content()
+    logger.info("列裁剪和两阶段读取测试通过")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求频率限制测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import sqlite3
+import tempfile
+import logging
+from src.utils.rate_limiter import MemoryRateLimiter, SQLiteRateLimiter
+from src.utils.security import SecurityManager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FakeClock:
+    """可控的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def check_token_bucket(limiter, clock):
+    """容量10、窗口60秒：突发10次后被限制，6秒补充1个令牌"""
+    assert all(limiter.allow('1.2.3.4') for _ in range(10))
+    assert not limiter.allow('1.2.3.4')
+    # 其他客户端不受影响
+    assert limiter.allow('5.6.7.8')
+    clock.now += 6
+    assert limiter.allow('1.2.3.4')
+    assert not limiter.allow('1.2.3.4')
+
+
+def test_memory_limiter():
+    clock = FakeClock()
+    check_token_bucket(MemoryRateLimiter(10, 60, clock=clock), clock)
+
+
+def test_memory_limiter_bounded():
+    """空闲的桶被清理，桶数量不超过上限"""
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(10, 60, max_entries=100, clock=clock)
+    for i in range(500):
+        limiter.allow(f"10.0.{i // 256}.{i % 256}")
+    assert len(limiter) == 100
+    clock.now += 61
+    limiter.allow('1.2.3.4')
+    assert len(limiter) == 1
+
+
+def test_sqlite_limiter_shared_state():
+    """两个限流器实例（模拟两个工作进程）共享同一个文件中的限流状态"""
+    workdir = tempfile.mkdtemp()
+    try:
+        clock = FakeClock()
+        db_path = os.path.join(workdir, 'rate_limit.sqlite3')
+        check_token_bucket(SQLiteRateLimiter(10, 60, db_path, clock=clock), clock)
+        other_worker = SQLiteRateLimiter(10, 60, db_path, clock=clock)
+        assert not other_worker.allow('1.2.3.4')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_sqlite_limiter_bounded():
+    """桶数量达到上限时淘汰最久未访问的桶，空闲的桶被清理"""
+    workdir = tempfile.mkdtemp()
+    try:
+        clock = FakeClock()
+        db_path = os.path.join(workdir, 'rate_limit.sqlite3')
+        limiter = SQLiteRateLimiter(10, 60, db_path, max_entries=100, clock=clock)
+        for i in range(500):
+            clock.now += 0.001
+            limiter.allow(f"10.0.{i // 256}.{i % 256}")
+        connection = sqlite3.connect(db_path)
+        assert connection.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == 100
+        assert connection.execute("SELECT COUNT(*) FROM buckets WHERE key = '10.0.0.0'").fetchone()[0] == 0
+        clock.now += 61
+        limiter.allow('1.2.3.4')
+        assert connection.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == 1
+        assert connection.execute("SELECT count FROM bucket_count").fetchone()[0] == 1
+        connection.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_limit_enforced_across_security_managers():
+    """每个请求新建的 SecurityManager 共享限流状态"""
+    config = {'security': {'rate_limit_enabled': True, 'rate_limit_requests': 3,
+                           'rate_limit_window': 60, 'rate_limit_backend': 'memory'}}
+    results = [SecurityManager(config).check_rate_limit('9.9.9.9') for _ in range(4)]
+    assert results == [True, True, True, False]
+
+
+if __name__ == '__main__':
+    test_memory_limiter()
+    test_memory_limiter_bounded()
+    test_sqlite_limiter_shared_state()
+    test_sqlite_limiter_bounded()
+    test_limit_enforced_across_security_managers()
+    logger.info("请求频率限制测试通过")
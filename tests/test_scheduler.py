@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+定时生成测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import threading
+import logging
+from datetime import datetime
+import src.core.scheduler as scheduler_module
+from src.core.jobs import JobManager
+from src.core.scheduler import CronExpression, GenerationScheduler, GENERATE_JOB_KEY
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_cron_next_after():
+    """cron表达式计算下一次触发时间"""
+    start = datetime(2024, 1, 1, 10, 7, 30)
+    assert CronExpression('*/10 * * * *').next_after(start) == datetime(2024, 1, 1, 10, 10)
+    assert CronExpression('0 3 * * *').next_after(start) == datetime(2024, 1, 2, 3, 0)
+    assert CronExpression('30 8 1 */3 *').next_after(start) == datetime(2024, 4, 1, 8, 30)
+    # 2024-01-01是周一，下一个周日是1月7日
+    assert CronExpression('0 0 * * 7').next_after(start) == datetime(2024, 1, 7, 0, 0)
+    # 日和周同时限制时满足其一即可
+    assert CronExpression('0 0 15 * 3').next_after(start) == datetime(2024, 1, 3, 0, 0)
+    for invalid in ('* * * *', '61 * * * *', '*/0 * * * *'):
+        try:
+            CronExpression(invalid)
+            assert False, f"应当拒绝: {invalid}"
+        except ValueError:
+            pass
+
+
+def test_interval_with_jitter():
+    """间隔模式的下一次触发时间在 [interval, interval + jitter] 内"""
+    scheduler = GenerationScheduler(interval=60, jitter=5)
+    for _ in range(20):
+        delay = scheduler.next_run_time(1000.0) - 1000.0
+        assert 60 <= delay <= 65
+
+
+def test_skip_when_previous_run_in_progress():
+    """上一次生成未结束时跳过本次触发"""
+    release = threading.Event()
+    calls = []
+
+    def fake_generation(config, full=False):
+        calls.append(1)
+        release.wait(2)
+        return {'record_count': 1}
+
+    # 任务状态保存在临时目录中，不写入工作目录的 storage/
+    workdir = tempfile.mkdtemp()
+    job_manager = JobManager(state_path=os.path.join(workdir, 'jobs.sqlite3'))
+    original_run, original_load = scheduler_module.run_generation, scheduler_module.load_config
+    original_get_job_manager = scheduler_module.get_job_manager
+    scheduler_module.run_generation = fake_generation
+    scheduler_module.load_config = lambda: {}
+    scheduler_module.get_job_manager = lambda: job_manager
+    try:
+        running = job_manager.submit(GENERATE_JOB_KEY, fake_generation, {})
+        scheduler = GenerationScheduler(interval=60)
+        assert scheduler.run_once() is None
+        assert scheduler.skipped == 1
+        release.set()
+        running.wait(2)
+        assert scheduler.run_once() == {'record_count': 1}
+        assert scheduler.runs == 1 and len(calls) == 2
+    finally:
+        scheduler_module.run_generation = original_run
+        scheduler_module.load_config = original_load
+        scheduler_module.get_job_manager = original_get_job_manager
+        job_manager.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_cron_next_after()
+    test_interval_with_jitter()
+    test_skip_when_previous_run_in_progress()
+    logger.info("定时生成测试通过")
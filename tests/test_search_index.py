@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+全文搜索索引测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import shutil
+import tempfile
+import logging
+from src.core.search_index import tokenize, html_to_text, SearchIndex, SearchIndexBuilder
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECORDS = [
+    {'id': 'a1', 'mp_id': 'MP_1', 'mp_name': '体育', 'title': '赫尔辛基德比前瞻', 'url': 'http://a/1',
+     'description': '本周末焦点战', 'content': '<p style="color:red">两队历史交锋</p>', 'publish_time': 300},
+    {'id': 'a2', 'mp_id': 'MP_1', 'mp_name': '体育', 'title': '周末赛程', 'url': 'http://a/2',
+     'description': '', 'content': '<p>周日还有赫尔辛基德比</p><script>var 赫尔辛基 = 1;</script>', 'publish_time': 200},
+    {'id': 'a3', 'mp_id': 'MP_2', 'mp_name': '技术', 'title': 'Python 3.12 新特性', 'url': 'http://a/3',
+     'description': 'PEP 695', 'content': '<p>类型参数语法</p>', 'publish_time': 100},
+]
+
+
+def build_index(db_path, records, etag):
+    builder = SearchIndexBuilder(db_path)
+    for record in records:
+        builder.add(record)
+    builder.commit(etag)
+
+
+def test_tokenize():
+    """中文切分为二元组，英文和数字按单词切分"""
+    assert tokenize('赫尔辛基') == ['赫尔', '尔辛', '辛基']
+    assert tokenize('德') == ['德']
+    assert tokenize('Python3.12，新特性!') == ['python3', '12', '新特', '特性']
+    assert html_to_text('<p style="x">a&amp;b</p><script>alert(1)</script><style>p{}</style>') == 'a&b'
+
+
+def test_search_ranking_and_filters():
+    """标题命中排在正文命中之前，脚本内容不参与索引，支持多词、单字和公众号过滤"""
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, 'search.sqlite3')
+        assert SearchIndex(db_path).search('德比') is None
+
+        build_index(db_path, RECORDS, 'v1')
+        index = SearchIndex(db_path)
+        assert index.get_etag() == 'v1'
+
+        result = index.search('赫尔辛基德比')
+        assert [item['id'] for item in result['items']] == ['a1', 'a2']
+        assert result['total'] == 2
+        assert result['items'][0]['score'] > result['items'][1]['score']
+
+        # 子串不连续时不匹配
+        assert index.search('赫辛')['total'] == 0
+        assert [item['id'] for item in index.search('python 语法')['items']] == ['a3']
+        assert [item['id'] for item in index.search('PEP')['items']] == ['a3']
+        assert {item['id'] for item in index.search('周')['items']} == {'a1', 'a2'}
+        assert index.search('德比', mp_ids=['MP_2'])['total'] == 0
+        # FTS5语法字符按普通字符处理，不会导致查询出错
+        assert index.search('"德比*(')['total'] == 2
+        assert index.search('OR')['total'] == 0
+
+        page = index.search('德比', page=2, page_size=1)
+        assert [item['id'] for item in page['items']] == ['a2']
+
+        # 放弃构建时保留原索引
+        builder = SearchIndexBuilder(db_path)
+        builder.add(RECORDS[2])
+        builder.abort()
+        assert index.search('德比')['total'] == 2
+        assert os.listdir(workdir) == ['search.sqlite3']
+
+        # 未收到记录就放弃时不创建临时文件
+        builder = SearchIndexBuilder(db_path)
+        assert builder.is_current('v1')
+        builder.abort()
+        assert os.listdir(workdir) == ['search.sqlite3']
+
+        build_index(db_path, RECORDS[2:], 'v2')
+        assert index.search('德比')['total'] == 0
+        assert index.get_etag() == 'v2'
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_tokenize()
+    test_search_ranking_and_filters()
+    logger.info("全文搜索测试通过")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+content转换缓存测试脚本
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import time
+import shutil
+import tempfile
+import logging
+from src.core.data_processor import DataProcessor
+from src.core.transform_cache import TransformCache, content_hash, get_transform_cache_stats
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEEDS = [{'id': 'MP_1', 'mp_name': '公众号', 'mp_intro': ''}]
+
+
+def make_articles(count, edited=()):
+    return [{'id': str(i), 'mp_id': 'MP_1', 'title': f'标题{i}', 'publish_time': i,
+             'content': f'<p style="x">第{i}段{"（已修改）" if i in edited else ""}</p>'} for i in range(count)]
+
+
+def process(db_path, articles, mode='clean'):
+    """处理一次文章，返回结果和实际转换的文章数"""
+    with TransformCache(db_path) as cache:
+        processor = DataProcessor(3, {'mode': mode}, transform_cache=cache)
+        calls = []
+        transform = processor.content_transformer.transform
+        processor.content_transformer.transform = lambda html: calls.append(html) or transform(html)
+        return processor.process_data(FEEDS, articles), len(calls)
+
+
+def test_data_processor_only_transforms_changed_articles():
+    """再次处理时只转换新增或修改的文章，转换配置变化时全部重新转换"""
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, 'transform_cache.sqlite3')
+        first, calls = process(db_path, make_articles(50))
+        assert calls == 50
+
+        second, calls = process(db_path, make_articles(50))
+        assert calls == 0
+        assert second == first
+
+        edited, calls = process(db_path, make_articles(60, edited={3}))
+        assert calls == 11
+        assert edited[3]['content'] == '<p>第3段（已修改）</p>'
+
+        _, calls = process(db_path, make_articles(60), mode='text')
+        assert calls == 60
+
+        stats = get_transform_cache_stats(db_path)
+        assert stats['hits'] == 50 + 49
+        assert stats['misses'] == 50 + 11 + 60
+        assert stats['entries'] == 50 + 11 + 60
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_lru_eviction():
+    """超出大小上限时淘汰最久未使用的条目"""
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, 'transform_cache.sqlite3')
+        assert get_transform_cache_stats(db_path) is None
+
+        output = 'x' * 400
+        with TransformCache(db_path, max_size_mb=1000 / 1024 / 1024) as cache:
+            cache.put_many([('a', content_hash('a'), output)], 'v1')
+            time.sleep(0.01)
+            cache.put_many([('b', content_hash('b'), output)], 'v1')
+            time.sleep(0.01)
+            # 访问a后，b成为最久未使用的条目
+            assert cache.get_many([('a', content_hash('a'))], 'v1') == [output]
+            cache.put_many([('c', content_hash('c'), output)], 'v1')
+
+        with TransformCache(db_path) as cache:
+            keys = [(key, content_hash(key)) for key in 'abc']
+            assert cache.get_many(keys, 'v1') == [output, None, output]
+            assert cache.get_many(keys[:1], 'v2') == [None]
+
+        stats = get_transform_cache_stats(db_path)
+        assert stats['evictions'] == 1
+        assert stats['size_bytes'] == 800
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_large_lookup():
+    """一次查询大量键时分批查询（不超过SQLite的参数数量和表达式深度上限）"""
+    workdir = tempfile.mkdtemp()
+    try:
+        with TransformCache(os.path.join(workdir, 'transform_cache.sqlite3')) as cache:
+            keys = [(str(i), content_hash(str(i))) for i in range(2500)]
+            cache.put_many([(article_id, digest, f'输出{article_id}') for article_id, digest in keys[::2]], 'v1')
+            outputs = cache.get_many(keys, 'v1')
+            assert outputs == [f'输出{i}' if i % 2 == 0 else None for i in range(2500)]
+            assert (cache.hits, cache.misses) == (1250, 1250)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_data_processor_only_transforms_changed_articles()
+    test_lru_eviction()
+    test_large_lookup()
+    logger.info("content转换缓存测试通过")